@@ -12,5 +12,7 @@ import os
 from django.core.asgi import get_asgi_application
 
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'TrustRent.settings')
+# Read by settings: without a native pool, connections are not kept under ASGI
+os.environ['TRUSTRENT_ASGI'] = '1'
 
 application = get_asgi_application()
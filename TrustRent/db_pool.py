@@ -0,0 +1,112 @@
+"""
+Connection reuse for the PostgreSQL aliases.
+
+configure_pooling() is applied to DATABASES in settings. With psycopg 3 and
+psycopg_pool installed each alias gets Django's native connection pool, sized
+per alias and checking connections before handing them out. With psycopg2
+(no pool support) each alias falls back to persistent connections: one
+connection per worker thread kept for CONN_MAX_AGE seconds and health-checked
+before reuse. Under ASGI, where Django advises against persistent connections
+(a request's database work may run on any thread), the fallback opens a
+connection per request instead.
+
+pool_stats() reports, per alias, how many physical connections have been
+opened, which fallback is in use and why, and for native pools checkouts,
+waits and saturation.
+"""
+from collections import Counter
+
+try:
+    import psycopg  # noqa: F401
+    import psycopg_pool
+except ImportError:
+    psycopg_pool = None
+
+# Connections Django set up per alias since the process started (with a
+# native pool this counts checkouts; the pool reports physical connections)
+connections_created = Counter()
+
+
+def count_connection(sender, connection, **kwargs):
+    """connection_created receiver (connected in CoreConfig.ready)"""
+    connections_created[connection.alias] += 1
+
+
+def _pool(alias):
+    from django.db import connections
+
+    return getattr(connections[alias], 'pool', None)
+
+
+def connections_opened(alias):
+    """Physical connections opened for an alias since the process started"""
+    pool = _pool(alias)
+    if pool is not None:
+        return pool.get_stats().get('connections_num', 0)
+    return connections_created[alias]
+
+
+def pooling_available():
+    return psycopg_pool is not None
+
+
+def configure_pooling(databases, pool_sizes, conn_max_age=60, pool_timeout=10, use_pool=True, asgi=False):
+    """
+    Set up connection reuse for every alias in databases. pool_sizes maps an
+    alias to (min_size, max_size) for native pools; use_pool=False forces
+    persistent connections, also on databases configured with a pool before.
+    With asgi=True the fallback does not keep connections (CONN_MAX_AGE=0).
+    """
+    if asgi:
+        conn_max_age = 0
+    for alias, settings_dict in databases.items():
+        min_size, max_size = pool_sizes.get(alias, (1, 4))
+        if use_pool and pooling_available():
+            settings_dict['CONN_MAX_AGE'] = 0  # Django requires 0 when pooling
+            settings_dict.setdefault('OPTIONS', {})['pool'] = {
+                'min_size': min_size,
+                'max_size': max_size,
+                'timeout': pool_timeout,
+            }
+        else:
+            settings_dict.get('OPTIONS', {}).pop('pool', None)
+            settings_dict['CONN_MAX_AGE'] = conn_max_age
+        # Persistent connections are pinged before reuse; pooled ones on checkout
+        settings_dict['CONN_HEALTH_CHECKS'] = True
+    return databases
+
+
+def pool_stats():
+    """Connection metrics for each configured alias"""
+    from django.db import connections
+
+    stats = {}
+    for alias in connections:
+        conn_max_age = connections.settings[alias]['CONN_MAX_AGE']
+        alias_stats = {
+            'mode': 'per_request' if conn_max_age == 0 else 'persistent',
+            'conn_max_age': conn_max_age,
+            'connections_opened': connections_opened(alias),
+        }
+        pool = _pool(alias)
+        if pool is None:
+            alias_stats['fallback'] = 'pooling disabled' if pooling_available() else 'psycopg_pool not installed'
+        else:
+            counters = pool.get_stats()
+            size = counters.get('pool_size', 0)
+            available = counters.get('pool_available', 0)
+            alias_stats.update({
+                'mode': 'pool',
+                'min_size': pool.min_size,
+                'max_size': pool.max_size,
+                'size': size,
+                'available': available,
+                'checkouts': counters.get('requests_num', 0),
+                'waiting': counters.get('requests_waiting', 0),
+                'waits': counters.get('requests_queued', 0),
+                'wait_ms': counters.get('requests_wait_ms', 0),
+                'timeouts': counters.get('requests_errors', 0),
+                'saturation': round((size - available) / pool.max_size, 3) if pool.max_size else 0,
+            })
+        stats[alias] = alias_stats
+    return stats
@@ -1,3 +1,6 @@
+from django.db import connections
+
+
 class TrustRentRouter:
     def db_for_read(self, model, **hints):
         # For test cases, use the default database
@@ -15,7 +18,7 @@ class TrustRentRouter:
 
     def allow_migrate(self, db, app_label, model_name=None, **hints):
         # For test database, allow all migrations
-        if 'test' in db:
+        if 'test' in db or connections[db].settings_dict['NAME'].startswith('test_'):
             return True
         # Map apps to their databases
         if app_label == 'core' and db in ['core', 'default']:
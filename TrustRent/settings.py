@@ -10,8 +10,11 @@ For the full list of settings and their values, see
 https://docs.djangoproject.com/en/5.2/ref/settings/
 """
 
+import os
 from pathlib import Path
 
+from TrustRent.db_pool import configure_pooling
+
 # Build paths inside the project like this: BASE_DIR / 'subdir'.
 BASE_DIR = Path(__file__).resolve().parent.parent
 
@@ -54,6 +57,28 @@ REST_FRAMEWORK = {
     )
 }
 
+# PBKDF2 runs for login and registration on this many threads (core.hashing);
+# calls past the workers plus this queue get a 503
+PASSWORD_HASHING_WORKERS = 4
+PASSWORD_HASHING_QUEUE = 16
+# last_login is written in batches (core.logins): once this many users
+# logged in, or this many seconds after the previous batch
+LAST_LOGIN_BUFFER_SIZE = 1000
+LAST_LOGIN_FLUSH_INTERVAL = 30
+# Login attempts allowed per email and per client address in any sliding
+# window of LOGIN_THROTTLE_WINDOW seconds (core.throttle). Counters are kept
+# per process unless LOGIN_THROTTLE_CACHE names a shared cache alias. Behind
+# a reverse proxy, LOGIN_THROTTLE_IP_HEADER is the header it puts the client
+# address in (e.g. 'X-Forwarded-For').
+LOGIN_THROTTLE_WINDOW = 300
+LOGIN_THROTTLE_EMAIL_LIMIT = 10
+LOGIN_THROTTLE_IP_LIMIT = 50
+LOGIN_THROTTLE_MAX_KEYS = 100000
+LOGIN_THROTTLE_CACHE = None
+LOGIN_THROTTLE_IP_HEADER = None
+# Most user ids one verify_users request may approve
+USER_VERIFY_BATCH_MAX = 50000
+
 # JWT settings
 from datetime import timedelta
 SIMPLE_JWT = {
@@ -72,6 +97,7 @@ MIDDLEWARE = [
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
     'django.contrib.auth.middleware.AuthenticationMiddleware',
+    'core.auth.JWTAuthenticationMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
 ]
@@ -147,6 +173,22 @@ DATABASES = {
     }
 }
 
+# Connection reuse: native psycopg pools when psycopg 3 and psycopg_pool are
+# installed, otherwise persistent health-checked connections (see TrustRent/db_pool.py).
+# psycopg_pool is not a dependency yet, so the fallback is what runs; /api/health/db/
+# reports it. Under ASGI (TrustRent/asgi.py sets TRUSTRENT_ASGI) the fallback keeps
+# no connections, as Django advises, and each request opens its own.
+# (min_size, max_size) of each alias's pool, per worker process.
+DATABASE_POOL_SIZES = {
+    'core': (2, 10),
+    'ops': (2, 10),
+    'ledger': (1, 4),
+    'default': (1, 4),
+}
+configure_pooling(DATABASES, DATABASE_POOL_SIZES, asgi=bool(os.environ.get('TRUSTRENT_ASGI')))
+# Runs the tests on persistent connections (see TrustRent/test_runner.py)
+TEST_RUNNER = 'TrustRent.test_runner.PersistentConnectionsTestRunner'
+
 
 # Password validation
 # https://docs.djangoproject.com/en/5.2/ref/settings/#auth-password-validators
@@ -198,4 +240,92 @@ import os
 MEDIA_URL = '/media/'
 MEDIA_ROOT = os.path.join(BASE_DIR, 'media')
 
-
+# Media delivery (core.serving): None streams files from Django; 'x-sendfile'
+# or 'x-accel-redirect' hands them to the web server. For nginx, map
+# MEDIA_ACCEL_REDIRECT_PREFIX to MEDIA_ROOT in an internal location.
+MEDIA_SERVE_MODE = None
+MEDIA_ACCEL_REDIRECT_PREFIX = '/protected-media/'
+# Browser cache lifetime of media that is not content-addressed
+MEDIA_CACHE_MAX_AGE = 3600
+# Lifetime in seconds of signed title-deed download links (core.downloads),
+# and the cache holding revoked access requests
+DOCUMENT_DOWNLOAD_TTL = 15 * 60
+DOCUMENT_DOWNLOAD_DENYLIST_CACHE = 'default'
+
+# Uploads
+# Files above this size are spooled to a temporary file instead of memory
+FILE_UPLOAD_MAX_MEMORY_SIZE = 256 * 1024
+# Bytes copied to storage at a time
+UPLOAD_CHUNK_SIZE = 64 * 1024
+UPLOAD_MAX_IMAGE_SIZE = 10 * 1024 * 1024
+UPLOAD_MAX_DOCUMENT_SIZE = 20 * 1024 * 1024
+# Batch image uploads: whole request size, files per request, and the
+# threads writing them to storage
+UPLOAD_MAX_BATCH_SIZE = 100 * 1024 * 1024
+UPLOAD_MAX_BATCH_FILES = 20
+UPLOAD_BATCH_WORKERS = 4
+
+# Property image derivatives: bounding box of each rendition, and its encoding
+# (WEBP falls back to JPEG when Pillow lacks WebP support)
+IMAGE_DERIVATIVE_SIZES = {
+    'thumbnail': (320, 320),
+    'medium': (1024, 1024),
+}
+IMAGE_DERIVATIVE_FORMAT = 'WEBP'
+IMAGE_DERIVATIVE_QUALITY = 80
+
+# Background jobs (core.jobs): tries per job, exponential retry backoff in
+# seconds, and how long a running job may go without finishing before
+# another worker reclaims it
+JOB_MAX_ATTEMPTS = 5
+JOB_RETRY_BASE_DELAY = 10
+JOB_RETRY_MAX_DELAY = 3600
+JOB_LOCK_TIMEOUT = 600
+
+
+# Listings
+# Upper bound on the images returned per property by the browse endpoints (None = no cap)
+LISTING_MAX_IMAGES_PER_PROPERTY = 10
+# Largest page and ops read batch used by cursor pagination of /api/listings/,
+# and the most batches one page may read before it is returned partly filled
+LISTING_CURSOR_MAX_PAGE_SIZE = 100
+LISTING_CURSOR_BATCH_SIZE = 50
+LISTING_CURSOR_MAX_BATCHES = 20
+
+# Serve the browse endpoints from the denormalized listing_search table (ops database).
+# Enable after populating it with `python manage.py rebuild_listing_search`.
+LISTING_SEARCH_READ_MODEL = False
+
+# Caches
+# 'browse' holds cached responses of the public browse endpoints. Local memory is
+# per process; use a shared backend (Redis, Memcached) when running several workers
+# so invalidations reach all of them.
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        'LOCATION': 'trustrent-default',
+    },
+    'browse': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        'LOCATION': 'trustrent-browse',
+        # Least recently used entries are culled past MAX_ENTRIES
+        'OPTIONS': {'MAX_ENTRIES': 2000, 'CULL_FREQUENCY': 4},
+    },
+    'auth': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        'LOCATION': 'trustrent-auth',
+        'OPTIONS': {'MAX_ENTRIES': 10000, 'CULL_FREQUENCY': 10},
+    },
+}
+# Active / verified status of token holders (core.auth), and how many
+# seconds a status is trusted before core_user is read again
+AUTH_USER_CACHE_ALIAS = 'auth'
+AUTH_USER_CACHE_TIMEOUT = 60
+BROWSE_CACHE_ALIAS = 'browse'
+# Seconds a cached browse response lives (0 disables the cache)
+BROWSE_CACHE_TIMEOUT = 60
+# Seconds a cached property detail document lives; writes invalidate it per property.
+# The per-property version behind the detail ETag expires after the same time, so
+# with the per-process local memory cache a worker that missed an invalidation
+# answers 304 for a stale ETag for at most this long
+PROPERTY_DETAIL_CACHE_TIMEOUT = 300
@@ -0,0 +1,19 @@
+"""
+Test runner for manage.py test.
+
+Django's test runner closes only the default alias's connection pool before
+it drops the test database, and here every alias mirrors that database, so
+the tests run on persistent connections instead of native pools.
+"""
+from django.conf import settings
+from django.test.runner import DiscoverRunner
+
+from TrustRent.db_pool import configure_pooling
+
+
+class PersistentConnectionsTestRunner(DiscoverRunner):
+
+    def setup_test_environment(self, **kwargs):
+        # Before any connection is opened, so no pool is ever created
+        configure_pooling(settings.DATABASES, settings.DATABASE_POOL_SIZES, use_pool=False)
+        super().setup_test_environment(**kwargs)
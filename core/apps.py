@@ -1,6 +1,21 @@
 from django.apps import AppConfig
+from django.db.backends.signals import connection_created
+from django.db.models.signals import post_delete, post_save
 
 
 class CoreConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'core'
+
+    def ready(self):
+        from TrustRent import db_pool
+        from . import auth, media, tasks  # noqa: F401 - tasks registers the background tasks
+        from .models import PropertyDocument, PropertyImage, User
+
+        connection_created.connect(db_pool.count_connection)
+        # Stored files lose a reference when an ORM delete removes their row
+        for model in (PropertyImage, PropertyDocument):
+            post_delete.connect(media.release_on_delete, sender=model)
+        # Verification and deactivation take effect on the next request
+        post_save.connect(auth.invalidate_on_change, sender=User)
+        post_delete.connect(auth.invalidate_on_change, sender=User)
@@ -0,0 +1,197 @@
+"""
+Validation, metadata and fingerprints of uploaded title deeds.
+
+check_pdf() runs while the deed is uploaded and only reads its first and
+last few kilobytes: the %PDF- header, the startxref offset and %%EOF marker
+of the trailer, the encryption flag and, for linearized files, the page
+count. inspect_pdf() is run afterwards by the inspect_deed job
+(core.tasks): it scans the whole file through mmap, inflating compressed
+object streams one at a time, for the page count and the producer. Both
+results are stored on PropertyDocument for the review queue.
+
+DeedFingerprint spots one deed filed for several properties. The SHA-256
+of the upload (core.media) only matches byte-identical copies.
+Opening and re-saving a PDF rewrites its creation and modification dates,
+producer, document /ID and cross-reference offsets while the deed itself is
+unchanged, so DeedFingerprint hashes the file with those parts removed.
+Both digests are fed the upload's chunks as it streams to storage, are kept
+on PropertyDocument and indexed, and get_unverified_properties looks up
+other properties filed with either one.
+"""
+import hashlib
+import mmap
+import re
+import zlib
+
+# Metadata a PDF writer sets on every save, in the Info dictionary and XMP
+VOLATILE = re.compile(
+    rb'/(?:CreationDate|ModDate|Producer|Creator)\s*\((?:\\.|[^\\()]|\((?:\\.|[^\\()])*\))*\)'
+    rb'|/(?:ID\s*\[[^\]]*\]|Prev\s+\d+|XRefStm\s+\d+)'
+    rb'|<(xmp:\w*Date|xmp:CreatorTool|pdf:Producer|xmpMM:\w*ID)>[^<]*</\1>'
+)
+# Cross-reference entries and the startxref offset move with every edit
+OFFSET_LINE = re.compile(rb'\d{10} \d{5} [fn]|\d+')
+LINE_BREAK = re.compile(rb'\r\n|\r|\n')
+# Lines longer than this (binary stream data) are hashed as they are
+MAX_LINE = 64 * 1024
+
+
+class DeedFingerprint:
+    """Streaming hash of a PDF with its volatile metadata and offsets removed"""
+
+    def __init__(self):
+        self._sha256 = hashlib.sha256()
+        self._pending = b''
+        self._long_line = False
+
+    def update(self, chunk):
+        lines = LINE_BREAK.split(self._pending + chunk)
+        # The last piece may continue in the next chunk
+        self._pending = lines.pop()
+        for line in lines:
+            self._add_line(line, complete=True)
+        if len(self._pending) > MAX_LINE:
+            self._add_line(self._pending, complete=False)
+            self._pending = b''
+
+    def _add_line(self, line, complete):
+        if self._long_line or not complete:
+            self._sha256.update(line)
+        else:
+            line = VOLATILE.sub(b'', line).strip()
+            if not line or OFFSET_LINE.fullmatch(line):
+                return
+            self._sha256.update(line)
+        self._long_line = not complete
+        if complete:
+            self._sha256.update(b'\n')
+
+    def hexdigest(self):
+        self._add_line(self._pending, complete=True)
+        self._pending = b''
+        return self._sha256.hexdigest()
+
+
+def fingerprint_file(file, chunk_size=64 * 1024):
+    """SHA-256 and DeedFingerprint hex digests of an open file"""
+    sha256, fingerprint = hashlib.sha256(), DeedFingerprint()
+    for chunk in iter(lambda: file.read(chunk_size), b''):
+        sha256.update(chunk)
+        fingerprint.update(chunk)
+    return sha256.hexdigest(), fingerprint.hexdigest()
+
+
+# Readers accept the header anywhere in the first kilobyte, and look for
+# %%EOF near the end of the file
+HEADER_SIZE = 1024
+TRAILER_SIZE = 4096
+PDF_HEADER = re.compile(rb'%PDF-(\d\.\d)')
+LINEARIZED = re.compile(rb'/Linearized\b[^>]*?/N\s+(\d+)')
+STARTXREF = re.compile(rb'startxref\s+(\d+)')
+PAGE_TREE = re.compile(rb'/Type\s*/Pages\b[^>]*?/Count\s+(\d+)|/Count\s+(\d+)[^>]*?/Type\s*/Pages\b')
+PRODUCER = re.compile(
+    rb'/Producer\s*(?:\(((?:\\.|[^\\()]|\((?:\\.|[^\\()])*\))*)\)|<([0-9A-Fa-f\s]*)>)'
+    rb'|<pdf:Producer>([^<]*)</pdf:Producer>'
+)
+OBJECT_STREAM = re.compile(rb'/Type\s*/ObjStm\b')
+STREAM_LENGTH = re.compile(rb'/Length\s+(\d+)(?!\s+\d+\s+R)')
+STRING_ESCAPE = re.compile(rb'\\([0-7]{1,3}|\r\n|[\r\n]|.)', re.DOTALL)
+ESCAPES = {b'n': b'\n', b'r': b'\r', b't': b'\t', b'b': b'\b', b'f': b'\f'}
+# Upper bound on the inflated size of one object stream
+MAX_OBJECT_STREAM = 16 * 1024 * 1024
+
+
+class InvalidDeed(Exception):
+    pass
+
+
+def check_pdf(file, size):
+    """
+    Check that an uploaded file is a PDF from its header and trailer alone.
+    Returns its version, its page count when the file is linearized (None
+    otherwise) and whether it is encrypted; raises InvalidDeed.
+    """
+    file.seek(0)
+    head = file.read(HEADER_SIZE)
+    file.seek(max(size - TRAILER_SIZE, 0))
+    tail = file.read(TRAILER_SIZE)
+    file.seek(0)
+
+    header = PDF_HEADER.search(head)
+    if not header:
+        raise InvalidDeed('File is not a PDF document')
+    eof = tail.rfind(b'%%EOF')
+    if eof == -1:
+        raise InvalidDeed('PDF document is incomplete')
+    offsets = STARTXREF.findall(tail, 0, eof)
+    if not offsets or int(offsets[-1]) >= size:
+        raise InvalidDeed('PDF document has no valid cross-reference table')
+
+    linearized = LINEARIZED.search(head)
+    return {
+        'pdf_version': header.group(1).decode(),
+        'page_count': int(linearized.group(1)) if linearized else None,
+        'encrypted': b'/Encrypt' in tail,
+    }
+
+
+def _pdf_text(match):
+    literal, hex_string, xmp = match.groups()
+    if hex_string is not None:
+        digits = re.sub(rb'\s', b'', hex_string)
+        value = bytes.fromhex((digits + b'0' * (len(digits) % 2)).decode())
+    elif literal is not None:
+        def unescape(escape):
+            code = escape.group(1)
+            if code[:1].isdigit():
+                return bytes([int(code, 8) & 0xFF])
+            if code in (b'\r\n', b'\r', b'\n'):
+                return b''
+            return ESCAPES.get(code, code)
+        value = STRING_ESCAPE.sub(unescape, literal)
+    else:
+        return xmp.decode('utf-8', 'replace').strip()
+    if value.startswith(b'\xfe\xff'):
+        return value[2:].decode('utf-16-be', 'replace')
+    return value.decode('latin-1')
+
+
+def _scan(data):
+    counts = [int(match.group(1) or match.group(2)) for match in PAGE_TREE.finditer(data)]
+    producer = PRODUCER.search(data)
+    # The root of the page tree counts every page
+    return max(counts) if counts else None, _pdf_text(producer) if producer else None
+
+
+def _object_streams(data):
+    """Inflated contents of the compressed object streams in data"""
+    for match in OBJECT_STREAM.finditer(data):
+        start = data.rfind(b'<<', 0, match.start())
+        stream = data.find(b'stream', match.end())
+        if start == -1 or stream == -1:
+            continue
+        dictionary = data[start:stream]
+        body = stream + len(b'stream')
+        body += 2 if data[body:body + 2] == b'\r\n' else 1
+        length = STREAM_LENGTH.search(dictionary)
+        end = body + int(length.group(1)) if length else data.find(b'endstream', body)
+        if b'/FlateDecode' not in dictionary or end < body:
+            continue
+        try:
+            yield zlib.decompressobj().decompress(data[body:end], MAX_OBJECT_STREAM)
+        except zlib.error:
+            continue
+
+
+def inspect_pdf(path):
+    """Page count and producer of the PDF at path (None when not found)"""
+    with open(path, 'rb') as file, mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ) as data:
+        page_count, producer = _scan(data)
+        if page_count is None or producer is None:
+            # PDF 1.5+ writers keep dictionaries in compressed object streams
+            for objects in _object_streams(data):
+                count, found = _scan(objects)
+                if count is not None:
+                    page_count = max(page_count or 0, count)
+                producer = producer or found
+    return {'page_count': page_count, 'producer': producer[:255] if producer else None}
@@ -0,0 +1,73 @@
+"""
+Signed, expiring title-deed downloads.
+
+Approving a DocumentAccessRequest mints a download URL per deed. The token
+carries the storage path, the access request id and an expiry, signed with
+an HMAC of SECRET_KEY (django.core.signing), so the download view trusts it
+without a database query. Revoking an access request adds its id to a
+denylist in the DOCUMENT_DOWNLOAD_DENYLIST_CACHE cache. An entry only lives
+as long as a token could, so the list holds just the revocations of the last
+DOCUMENT_DOWNLOAD_TTL seconds. The local-memory cache keeps it per process;
+point the alias at a shared cache to revoke everywhere at once.
+"""
+import time
+
+from django.conf import settings
+from django.core import signing
+from django.core.cache import caches
+from django.db import connections
+from django.urls import reverse
+
+SALT = 'core.downloads'
+
+
+class InvalidDownload(Exception):
+    pass
+
+
+def _denylist():
+    return caches[settings.DOCUMENT_DOWNLOAD_DENYLIST_CACHE]
+
+
+def sign_download(path, request_id=None, ttl=None):
+    """Download URL for the stored deed path and its expiry (a Unix timestamp)"""
+    expires = int(time.time()) + (ttl or settings.DOCUMENT_DOWNLOAD_TTL)
+    token = signing.dumps({'p': path, 'r': request_id, 'e': expires}, salt=SALT, compress=True)
+    return reverse('download_document', args=[token]), expires
+
+
+def verify_download(token):
+    """Storage path a token grants; raises InvalidDownload when it is forged, expired or revoked"""
+    try:
+        grant = signing.loads(token, salt=SALT)
+    except signing.BadSignature:
+        raise InvalidDownload('Invalid download link')
+    if grant['e'] < time.time():
+        raise InvalidDownload('Download link has expired')
+    if grant['r'] is not None and _denylist().get(f'download-revoked:{grant["r"]}'):
+        raise InvalidDownload('Access to this document has been revoked')
+    return grant['p']
+
+
+def revoke(request_id):
+    """Stop every outstanding download link of an access request"""
+    _denylist().set(f'download-revoked:{request_id}', True, settings.DOCUMENT_DOWNLOAD_TTL)
+
+
+def download_urls(request_ids):
+    """Fresh download links for the deeds behind each approved access request id"""
+    urls = {request_id: [] for request_id in request_ids}
+    if not urls:
+        return urls
+    with connections['core'].cursor() as cursor:
+        cursor.execute("""
+            SELECT dar.id, pd.attachment
+            FROM core_documentaccessrequest dar
+            JOIN core_propertydocument pd ON pd.user_property_id = dar.user_property_id
+            WHERE dar.id = ANY(%s) AND dar.status = 'approved'
+            ORDER BY dar.id, pd.uploaded_at DESC
+        """, [list(urls)])
+        for request_id, path in cursor.fetchall():
+            url, expires = sign_download(path, request_id)
+            urls[request_id].append({'url': url, 'expires_at': expires})
+    return urls
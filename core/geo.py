@@ -0,0 +1,159 @@
+"""
+Coordinates for properties.
+
+Property.location is free text and owners are asked to add GPS coordinates.
+parse_coordinates() pulls a decimal latitude/longitude pair out of it, and each
+located property also stores its geohash. Geohash cells nest by prefix, so a
+varchar_pattern_ops index on the geohash answers "which properties are in these
+cells" with a few index range scans; the exact radius check only runs on those.
+"""
+import math
+import re
+
+EARTH_RADIUS_KM = 6371.0
+GEOHASH_PRECISION = 9
+MAX_RADIUS_KM = 100
+
+GEOHASH_ALPHABET = '0123456789bcdefghjkmnpqrstuvwxyz'
+
+# A decimal pair such as "5.6037, -0.1870" or "5.6037° N, 0.1870° W".
+# Decimals are required so street numbers are never mistaken for coordinates.
+COORDINATE_PATTERN = re.compile(
+    r'(?<![\w.])(?P<lat>[-+]?\d{1,2}\.\d+)\s*°?\s*(?P<lat_hemisphere>[NS])?'
+    r'\s*[,;/ ]\s*'
+    r'(?P<lon>[-+]?\d{1,3}\.\d+)\s*°?\s*(?P<lon_hemisphere>[EW])?(?![\w.])',
+    re.IGNORECASE
+)
+
+
+def parse_coordinates(location):
+    """Return (latitude, longitude) found in a location string, or None"""
+    for match in COORDINATE_PATTERN.finditer(location or ''):
+        latitude = float(match.group('lat'))
+        longitude = float(match.group('lon'))
+        if (match.group('lat_hemisphere') or '').upper() == 'S':
+            latitude = -abs(latitude)
+        if (match.group('lon_hemisphere') or '').upper() == 'W':
+            longitude = -abs(longitude)
+        if -90 <= latitude <= 90 and -180 <= longitude <= 180:
+            return latitude, longitude
+    return None
+
+
+def encode_geohash(latitude, longitude, precision=GEOHASH_PRECISION):
+    """Standard base32 geohash of a point"""
+    lat_range, lon_range = [-90.0, 90.0], [-180.0, 180.0]
+    geohash, bits, bit_count, even = [], 0, 0, True
+    while len(geohash) < precision:
+        value, value_range = (longitude, lon_range) if even else (latitude, lat_range)
+        middle = (value_range[0] + value_range[1]) / 2
+        bits <<= 1
+        if value >= middle:
+            bits |= 1
+            value_range[0] = middle
+        else:
+            value_range[1] = middle
+        even = not even
+        bit_count += 1
+        if bit_count == 5:
+            geohash.append(GEOHASH_ALPHABET[bits])
+            bits, bit_count = 0, 0
+    return ''.join(geohash)
+
+
+def location_fields(location):
+    """latitude, longitude and geohash to store for a location string (None when not located)"""
+    coordinates = parse_coordinates(location)
+    if not coordinates:
+        return None, None, None
+    return coordinates[0], coordinates[1], encode_geohash(*coordinates)
+
+
+def _cell_size(precision):
+    """Height and width in degrees of a geohash cell"""
+    bits = precision * 5
+    lon_bits = (bits + 1) // 2
+    lat_bits = bits // 2
+    return 180.0 / (2 ** lat_bits), 360.0 / (2 ** lon_bits)
+
+
+def covering_cells(latitude, longitude, radius_km):
+    """
+    Geohash prefixes whose cells together cover the circle: the cell holding the
+    centre plus its eight neighbours, at the finest precision whose cells are
+    still at least radius_km across.
+    """
+    km_per_degree_lat = math.pi * EARTH_RADIUS_KM / 180
+    km_per_degree_lon = km_per_degree_lat * max(math.cos(math.radians(latitude)), 0.01)
+    precision = 1
+    for candidate in range(GEOHASH_PRECISION, 0, -1):
+        height, width = _cell_size(candidate)
+        if height * km_per_degree_lat >= radius_km and width * km_per_degree_lon >= radius_km:
+            precision = candidate
+            break
+
+    height, width = _cell_size(precision)
+    cells = set()
+    for lat_step in (-1, 0, 1):
+        for lon_step in (-1, 0, 1):
+            cell_lat = min(max(latitude + lat_step * height, -90.0), 90.0)
+            cell_lon = (longitude + lon_step * width + 180.0) % 360.0 - 180.0
+            cells.add(encode_geohash(cell_lat, cell_lon, precision))
+    return sorted(cells)
+
+
+def distance_sql(alias):
+    """Great-circle distance in km from %s (latitude), %s (longitude) to the row's coordinates"""
+    return f"""
+        ({EARTH_RADIUS_KM} * 2 * ASIN(SQRT(
+            POWER(SIN(RADIANS({alias}.latitude - %s) / 2), 2) +
+            COS(RADIANS(%s)) * COS(RADIANS({alias}.latitude)) *
+            POWER(SIN(RADIANS({alias}.longitude - %s) / 2), 2)
+        )))
+    """
+
+
+def parse_geo_filters(params):
+    """
+    Read lat/lon/radius_km and bbox=min_lat,min_lon,max_lat,max_lon from query
+    parameters. Raises ValueError for malformed or out-of-range values.
+    """
+    filters = {'near': None, 'bbox': None}
+    lat, lon, radius_km = params.get('lat'), params.get('lon'), params.get('radius_km')
+    if lat is not None or lon is not None or radius_km is not None:
+        if lat is None or lon is None:
+            raise ValueError('lat and lon must be provided together')
+        lat, lon = float(lat), float(lon)
+        radius_km = float(radius_km) if radius_km is not None else 5.0
+        if not (-90 <= lat <= 90 and -180 <= lon <= 180 and 0 < radius_km <= MAX_RADIUS_KM):
+            raise ValueError('Coordinates or radius out of range')
+        filters['near'] = {'lat': lat, 'lon': lon, 'radius_km': radius_km}
+
+    bbox = params.get('bbox')
+    if bbox:
+        min_lat, min_lon, max_lat, max_lon = [float(value) for value in bbox.split(',')]
+        if not (-90 <= min_lat <= max_lat <= 90 and -180 <= min_lon <= 180 and -180 <= max_lon <= 180):
+            raise ValueError('Invalid bounding box')
+        filters['bbox'] = {'min_lat': min_lat, 'min_lon': min_lon, 'max_lat': max_lat, 'max_lon': max_lon}
+    return filters
+
+
+def geo_condition(alias, near=None, bbox=None):
+    """SQL conditions and params for the radius and bounding-box filters on a table alias"""
+    conditions, params = [], []
+    if near:
+        cells = covering_cells(near['lat'], near['lon'], near['radius_km'])
+        conditions.append('(' + ' OR '.join(f'{alias}.geohash LIKE %s' for _ in cells) + ')')
+        params.extend(f'{cell}%' for cell in cells)
+        conditions.append(f"{distance_sql(alias)} <= %s")
+        params.extend([near['lat'], near['lat'], near['lon'], near['radius_km']])
+    if bbox:
+        conditions.append(f"{alias}.latitude BETWEEN %s AND %s")
+        params.extend([bbox['min_lat'], bbox['max_lat']])
+        if bbox['min_lon'] <= bbox['max_lon']:
+            conditions.append(f"{alias}.longitude BETWEEN %s AND %s")
+        else:
+            # Box crossing the antimeridian
+            conditions.append(f"({alias}.longitude >= %s OR {alias}.longitude <= %s)")
+        params.extend([bbox['min_lon'], bbox['max_lon']])
+    return ''.join(f" AND {condition}" for condition in conditions), params
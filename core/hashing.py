@@ -0,0 +1,66 @@
+"""
+Password hashing off the request path.
+
+PBKDF2 takes tens of milliseconds of CPU per call, so the async login and
+registration views run it on a dedicated pool of PASSWORD_HASHING_WORKERS
+threads (hashlib releases the GIL while it hashes). Under an ASGI server
+(TrustRent.asgi) the event loop keeps serving other requests meanwhile;
+under WSGI the views run through async_to_sync and the request thread still
+waits for the hash, so only the bound below applies. At most
+PASSWORD_HASHING_QUEUE calls wait for a worker; past that run() raises
+HashingBusy at once and the view answers 503, rather than letting a login
+storm queue without bound.
+
+The pool is built from the settings on first use; tests that override them
+call reset().
+"""
+import asyncio
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from django.conf import settings
+from django.http import JsonResponse
+
+_lock = threading.Lock()
+_pool_state = None
+
+
+class HashingBusy(Exception):
+    pass
+
+
+def _pool():
+    global _pool_state
+    if _pool_state is None:
+        with _lock:
+            if _pool_state is None:
+                workers, queue = settings.PASSWORD_HASHING_WORKERS, settings.PASSWORD_HASHING_QUEUE
+                executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix='password-hashing')
+                _pool_state = (executor, threading.BoundedSemaphore(workers + queue))
+    return _pool_state
+
+
+def reset():
+    """Drop the pool so the next call builds one from the current settings"""
+    global _pool_state
+    with _lock:
+        if _pool_state is not None:
+            _pool_state[0].shutdown(wait=False)
+        _pool_state = None
+
+
+async def run(function, *args):
+    """Await function(*args) on the hashing pool; raises HashingBusy when it is saturated"""
+    executor, slots = _pool()
+    if not slots.acquire(blocking=False):
+        raise HashingBusy()
+    future = executor.submit(function, *args)
+    # Released when the hash is done, even if the request went away meanwhile
+    future.add_done_callback(lambda _: slots.release())
+    return await asyncio.wrap_future(future)
+
+
+def busy_response():
+    response = JsonResponse({'error': 'Server busy, please retry shortly'}, status=503)
+    response['Retry-After'] = '1'
+    return response
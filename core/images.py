@@ -0,0 +1,121 @@
+"""
+Resized renditions of property images.
+
+Every PropertyImage gets a thumbnail and a medium derivative. Each is the
+original scaled to fit inside the box from IMAGE_DERIVATIVE_SIZES and encoded
+as WebP, or as JPEG when Pillow was built without WebP. The paths are stored
+in PropertyImage.thumbnail / .medium next to the original. The browse and
+detail endpoints take size=original|medium|thumbnail and fall back to the
+original while a derivative is missing.
+"""
+import io
+import logging
+import os
+
+from django.conf import settings
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.db import connections
+from PIL import Image, ImageOps, features
+
+from .storage import shard_name
+
+logger = logging.getLogger(__name__)
+
+IMAGE_SIZES = ('original', 'medium', 'thumbnail')
+DERIVATIVE_SIZES = ('thumbnail', 'medium')
+
+
+def image_column(alias, size):
+    """SQL expression for the image path of the requested size on a core_propertyimage alias"""
+    if size == 'original':
+        return f"{alias}.image"
+    return f"COALESCE(NULLIF({alias}.{size}, ''), {alias}.image)"
+
+
+def pick_image(image, size):
+    """Path of the requested size from an image dict holding 'image' and its derivatives"""
+    if size == 'original':
+        return image['image']
+    return image.get(size) or image['image']
+
+
+def _output_format():
+    if settings.IMAGE_DERIVATIVE_FORMAT == 'WEBP' and features.check('webp'):
+        return 'WEBP', 'webp'
+    return 'JPEG', 'jpg'
+
+
+def _derivative_name(name, size, extension):
+    stem = os.path.splitext(os.path.basename(name))[0]
+    return shard_name(f'property_images/derivatives/{size}/{stem}.{extension}')
+
+
+def derivative_names(name):
+    """Every path a derivative of the stored image name may have"""
+    return [
+        _derivative_name(name, size, extension)
+        for size in DERIVATIVE_SIZES for extension in ('webp', 'jpg')
+    ]
+
+
+def generate_derivatives(name, storage=default_storage, replace=False):
+    """
+    Write the derivatives of the stored image name; returns {size: stored path}.
+    Content-addressed originals share their derivatives, so existing ones are
+    reused unless replace is set.
+    """
+    image_format, extension = _output_format()
+    paths = {size: _derivative_name(name, size, extension) for size in DERIVATIVE_SIZES}
+    if replace:
+        for path in paths.values():
+            if storage.exists(path):
+                storage.delete(path)
+    elif all(storage.exists(path) for path in paths.values()):
+        return paths
+
+    with storage.open(name, 'rb') as source:
+        original = ImageOps.exif_transpose(Image.open(source))
+        original.load()
+    if image_format == 'JPEG' or original.mode not in ('RGB', 'RGBA'):
+        original = original.convert('RGB' if image_format == 'JPEG' else 'RGBA')
+
+    for size in DERIVATIVE_SIZES:
+        if storage.exists(paths[size]):
+            continue
+        rendition = original.copy()
+        rendition.thumbnail(settings.IMAGE_DERIVATIVE_SIZES[size], Image.LANCZOS)
+        buffer = io.BytesIO()
+        rendition.save(buffer, image_format, quality=settings.IMAGE_DERIVATIVE_QUALITY)
+        paths[size] = storage.save(paths[size], ContentFile(buffer.getvalue()))
+    return paths
+
+
+def create_derivatives(image_ids, storage=default_storage, replace=False):
+    """
+    Generate and record derivatives for the given PropertyImage ids. Images
+    that cannot be read are logged and skipped. Returns the number updated.
+    """
+    with connections['core'].cursor() as cursor:
+        cursor.execute("SELECT id, image FROM core_propertyimage WHERE id = ANY(%s)", [list(image_ids)])
+        rows = cursor.fetchall()
+
+    values, params = [], []
+    for image_id, name in rows:
+        try:
+            paths = generate_derivatives(name, storage, replace)
+        except Exception:
+            logger.exception('Could not create derivatives of image %s (%s)', image_id, name)
+            continue
+        values.append('(%s, %s, %s)')
+        params.extend([image_id, paths['thumbnail'], paths['medium']])
+
+    if values:
+        with connections['core'].cursor() as cursor:
+            cursor.execute(f"""
+                UPDATE core_propertyimage pi
+                SET thumbnail = v.thumbnail, medium = v.medium
+                FROM (VALUES {', '.join(values)}) AS v(id, thumbnail, medium)
+                WHERE pi.id = v.id
+            """, params)
+    return len(values)
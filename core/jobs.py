@@ -0,0 +1,187 @@
+"""
+Database-backed background jobs.
+
+Views call enqueue() to record a Job row in the core database and return
+straight away. The run_jobs management command claims due jobs with
+SELECT ... FOR UPDATE SKIP LOCKED, so any number of worker processes can
+share the table, and runs them on a thread pool. A job that raises is retried
+with exponential backoff until it has used max_attempts. A job left running
+by a worker that died is picked up again once JOB_LOCK_TIMEOUT has passed, so
+task functions must be safe to run more than once; one that has already used
+max_attempts (it keeps killing its worker) is marked failed instead. Only the
+worker holding a job's lock can record its outcome. An idempotency key makes
+enqueueing the same work twice return the existing job.
+
+Task functions are registered by name with @task and receive the job payload
+as keyword arguments; their return value is stored as the job result.
+"""
+import json
+import logging
+import random
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import connections
+from django.utils import timezone
+
+logger = logging.getLogger(__name__)
+
+_tasks = {}
+
+JOB_COLUMNS = [
+    'id', 'task', 'status', 'attempts', 'max_attempts', 'run_after',
+    'last_error', 'result', 'created_at', 'finished_at'
+]
+
+
+class UnknownTask(Exception):
+    pass
+
+
+def task(name):
+    """Register the decorated function as the handler of jobs named name"""
+    def decorator(function):
+        _tasks[name] = function
+        return function
+    return decorator
+
+
+def enqueue(task_name, payload=None, idempotency_key=None, max_attempts=None, delay=None):
+    """
+    Queue task_name with a JSON-serialisable payload and return the job id.
+    When a job with idempotency_key already exists its id is returned and
+    nothing new is queued.
+    """
+    if task_name not in _tasks:
+        raise UnknownTask(task_name)
+    now = timezone.now()
+    params = [
+        task_name, json.dumps(payload or {}), idempotency_key,
+        max_attempts or settings.JOB_MAX_ATTEMPTS, now + (delay or timedelta()), now
+    ]
+    with connections['core'].cursor() as cursor:
+        cursor.execute("""
+            INSERT INTO core_job
+            (task, payload, idempotency_key, status, attempts, max_attempts, run_after, created_at)
+            VALUES (%s, %s, %s, 'pending', 0, %s, %s, %s)
+            ON CONFLICT (idempotency_key) DO NOTHING
+            RETURNING id
+        """, params)
+        row = cursor.fetchone()
+        if row is None:
+            cursor.execute("SELECT id FROM core_job WHERE idempotency_key = %s", [idempotency_key])
+            row = cursor.fetchone()
+    return row[0]
+
+
+def get_job(job_id):
+    """Status document of a job, or None"""
+    with connections['core'].cursor() as cursor:
+        cursor.execute(f"SELECT {', '.join(JOB_COLUMNS)} FROM core_job WHERE id = %s", [job_id])
+        row = cursor.fetchone()
+    if row is None:
+        return None
+    job = dict(zip(JOB_COLUMNS, row))
+    job['result'] = _json(job['result'])
+    return job
+
+
+def _json(value):
+    # Raw cursors return jsonb columns as text
+    return json.loads(value) if isinstance(value, str) else value
+
+
+def retry_delay(attempts):
+    """Backoff before the next try of a job that has failed attempts times"""
+    delay = min(settings.JOB_RETRY_BASE_DELAY * 2 ** (attempts - 1), settings.JOB_RETRY_MAX_DELAY)
+    # Jitter keeps jobs that failed together from retrying in lockstep
+    return timedelta(seconds=delay * random.uniform(0.8, 1.2))
+
+
+def claim(worker_id, limit):
+    """
+    Mark up to limit due jobs as running under worker_id and return them as
+    (id, task, payload, attempts, max_attempts). Jobs whose lock has expired
+    are reclaimed along with pending ones while they have attempts left, and
+    marked failed otherwise.
+    """
+    now = timezone.now()
+    expired = now - timedelta(seconds=settings.JOB_LOCK_TIMEOUT)
+    with connections['core'].cursor() as cursor:
+        cursor.execute("""
+            UPDATE core_job
+            SET status = 'failed', locked_by = NULL, locked_at = NULL, finished_at = %s,
+                last_error = 'Worker lost: lock expired on the last attempt'
+            WHERE status = 'running' AND locked_at < %s AND attempts >= max_attempts
+        """, [now, expired])
+        cursor.execute("""
+            UPDATE core_job j
+            SET status = 'running', attempts = j.attempts + 1, locked_by = %s, locked_at = %s
+            FROM (
+                SELECT id FROM core_job
+                WHERE (status = 'pending' AND run_after <= %s)
+                OR (status = 'running' AND locked_at < %s AND attempts < max_attempts)
+                ORDER BY run_after, id
+                LIMIT %s
+                FOR UPDATE SKIP LOCKED
+            ) due
+            WHERE j.id = due.id
+            RETURNING j.id, j.task, j.payload, j.attempts, j.max_attempts
+        """, [worker_id, now, now, expired, limit])
+        jobs = cursor.fetchall()
+    return [
+        (job_id, task_name, _json(payload), attempts, max_attempts)
+        for job_id, task_name, payload, attempts, max_attempts in jobs
+    ]
+
+
+def run_job(job, worker_id):
+    """Run a job claimed by worker_id and record its outcome; returns the new status"""
+    job_id, task_name, payload, attempts, max_attempts = job
+    try:
+        if task_name not in _tasks:
+            raise UnknownTask(task_name)
+        result = _tasks[task_name](**payload)
+    except Exception as e:
+        logger.exception('Job %s (%s) failed on attempt %s', job_id, task_name, attempts)
+        error = f'{type(e).__name__}: {e}'
+        if attempts < max_attempts and not isinstance(e, UnknownTask):
+            status = 'pending'
+            recorded = _finish(job_id, worker_id, status, "last_error = %s, run_after = %s",
+                               [error, timezone.now() + retry_delay(attempts)])
+        else:
+            status = 'failed'
+            recorded = _finish(job_id, worker_id, status, "last_error = %s, finished_at = %s",
+                               [error, timezone.now()])
+    else:
+        status = 'succeeded'
+        recorded = _finish(job_id, worker_id, status, "result = %s, last_error = NULL, finished_at = %s",
+                           [json.dumps(result, default=str), timezone.now()])
+    if not recorded:
+        # The lock expired and another worker reclaimed the job; its outcome stands
+        logger.warning('Job %s (%s) finished as %s after its lock was lost', job_id, task_name, status)
+        status = 'lost'
+    # Each pool thread keeps its own connections; closing them between jobs
+    # leaves an idle worker holding none, and a connect is cheap next to a job
+    connections.close_all()
+    return status
+
+
+def _finish(job_id, worker_id, status, assignments, params):
+    """Record the outcome of a job if worker_id still holds its lock; returns whether it did"""
+    with connections['core'].cursor() as cursor:
+        cursor.execute(f"""
+            UPDATE core_job
+            SET status = %s, locked_by = NULL, locked_at = NULL, {assignments}
+            WHERE id = %s AND locked_by = %s
+        """, [status, *params, job_id, worker_id])
+        return cursor.rowcount == 1
+
+
+def run_pending(worker_id, executor, batch_size):
+    """Claim one batch of due jobs and run it on executor; returns {status: count}"""
+    jobs = claim(worker_id, batch_size)
+    outcomes = {}
+    for status in executor.map(run_job, jobs, [worker_id] * len(jobs)):
+        outcomes[status] = outcomes.get(status, 0) + 1
+    return outcomes
@@ -0,0 +1,76 @@
+"""
+Write-behind buffer for User.last_login.
+
+login_user records the time of each successful login here instead of
+writing core_user. The buffer keeps the latest time per user and is written
+with one UPDATE ... FROM (VALUES ...) when it holds LAST_LOGIN_BUFFER_SIZE
+users or LAST_LOGIN_FLUSH_INTERVAL seconds have passed since the last
+write, by the login that notices it, or by a timer thread once logins stop.
+last_login may lag by up to that interval, and a process that is killed
+loses its unwritten logins.
+"""
+import logging
+import threading
+import time
+
+from django.conf import settings
+from django.db import connections
+
+logger = logging.getLogger(__name__)
+
+_lock = threading.Lock()
+_pending = {}
+_last_flush = time.monotonic()
+_timer = None
+
+
+def record(user_id, when):
+    """Buffer a login; returns True when the caller should flush()"""
+    global _timer
+    with _lock:
+        _pending[user_id] = max(when, _pending.get(user_id, when))
+        if (len(_pending) >= settings.LAST_LOGIN_BUFFER_SIZE
+                or time.monotonic() - _last_flush >= settings.LAST_LOGIN_FLUSH_INTERVAL):
+            return True
+        if _timer is None:
+            _timer = threading.Timer(settings.LAST_LOGIN_FLUSH_INTERVAL, _flush_later)
+            _timer.daemon = True
+            _timer.start()
+    return False
+
+
+def _flush_later():
+    global _timer
+    with _lock:
+        _timer = None
+    try:
+        flush()
+    finally:
+        connections.close_all()
+
+
+def flush():
+    """Write the buffered logins; returns how many users were written (0 on failure)"""
+    global _pending, _last_flush
+    with _lock:
+        batch, _pending = _pending, {}
+        _last_flush = time.monotonic()
+    if not batch:
+        return 0
+
+    try:
+        with connections['core'].cursor() as cursor:
+            cursor.execute(f"""
+                UPDATE core_user u
+                SET last_login = v.last_login
+                FROM (VALUES {', '.join(['(%s, %s::timestamptz)'] * len(batch))}) AS v(id, last_login)
+                WHERE u.id = v.id AND (u.last_login IS NULL OR u.last_login < v.last_login)
+            """, [value for item in batch.items() for value in item])
+    except Exception:
+        # Kept for the next flush
+        with _lock:
+            for user_id, when in batch.items():
+                _pending[user_id] = max(when, _pending.get(user_id, when))
+        logger.exception('Could not write %d buffered logins', len(batch))
+        return 0
+    return len(batch)
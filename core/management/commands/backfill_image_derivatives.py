@@ -0,0 +1,42 @@
+from django.core.management.base import BaseCommand
+from django.db import connections
+
+from core.images import create_derivatives
+from ops import browse_cache, listing_search
+
+
+class Command(BaseCommand):
+    help = 'Generate thumbnail and medium derivatives for property images that lack them'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=100,
+                            help='Images processed per batch')
+        parser.add_argument('--all', action='store_true',
+                            help='Regenerate derivatives for every image, not only missing ones')
+
+    def handle(self, *args, **options):
+        missing = "" if options['all'] else "AND (thumbnail IS NULL OR thumbnail = '' OR medium IS NULL OR medium = '')"
+        last_id, created, failed = 0, 0, 0
+        while True:
+            with connections['core'].cursor() as cursor:
+                cursor.execute(f"""
+                    SELECT id, property_id FROM core_propertyimage
+                    WHERE id > %s {missing}
+                    ORDER BY id
+                    LIMIT %s
+                """, [last_id, options['batch_size']])
+                rows = cursor.fetchall()
+            if not rows:
+                break
+            last_id = rows[-1][0]
+
+            updated = create_derivatives([row[0] for row in rows], replace=options['all'])
+            created += updated
+            failed += len(rows) - updated
+
+            property_ids = sorted({row[1] for row in rows})
+            listing_search.refresh_listing_search(property_ids=property_ids)
+            browse_cache.invalidate(property_ids=property_ids)
+            self.stdout.write(f'Processed images up to id {last_id} ({created} done, {failed} failed)')
+
+        self.stdout.write(self.style.SUCCESS(f'Created derivatives for {created} images ({failed} failed)'))
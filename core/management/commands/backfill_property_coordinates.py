@@ -0,0 +1,52 @@
+from django.core.management.base import BaseCommand
+from django.db import connections
+
+from core.geo import location_fields
+from ops.listing_search import refresh_listing_search
+
+
+class Command(BaseCommand):
+    help = 'Parse GPS coordinates out of Property.location into latitude, longitude and geohash'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=1000, help='Properties updated per statement')
+        parser.add_argument('--all', action='store_true',
+                            help='Re-parse every property instead of only those without coordinates')
+
+    def handle(self, *args, **options):
+        located = scanned = 0
+        last_id = 0
+        while True:
+            with connections['core'].cursor() as cursor:
+                cursor.execute(f"""
+                    SELECT id, location FROM core_property
+                    WHERE id > %s {'' if options['all'] else 'AND latitude IS NULL'}
+                    ORDER BY id
+                    LIMIT %s
+                """, [last_id, options['batch_size']])
+                rows = cursor.fetchall()
+                if not rows:
+                    break
+                last_id = rows[-1][0]
+                scanned += len(rows)
+
+                updates = [(property_id, *location_fields(location)) for property_id, location in rows]
+                if not options['all']:
+                    updates = [update for update in updates if update[1] is not None]
+                if not updates:
+                    continue
+
+                cursor.execute(f"""
+                    UPDATE core_property p
+                    SET latitude = v.latitude, longitude = v.longitude, geohash = v.geohash
+                    FROM (VALUES {', '.join(['(%s, %s::double precision, %s::double precision, %s)'] * len(updates))})
+                        AS v(id, latitude, longitude, geohash)
+                    WHERE p.id = v.id
+                """, [value for update in updates for value in update])
+
+            refresh_listing_search(property_ids=[update[0] for update in updates])
+            located += sum(1 for update in updates if update[1] is not None)
+
+        self.stdout.write(self.style.SUCCESS(
+            f'Successfully scanned {scanned} properties, {located} have coordinates'
+        ))
@@ -0,0 +1,76 @@
+import statistics
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from django.core.management.base import BaseCommand
+from django.db import close_old_connections, connections
+
+from TrustRent import db_pool
+
+QUERY = "SELECT COUNT(*) FROM core_property WHERE status = 'available'"
+
+
+class Command(BaseCommand):
+    help = (
+        'Simulate concurrent requests against a database alias, opening a fresh '
+        'connection per request versus the configured pooled/persistent connections'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--database', default='core', help='Database alias to run against')
+        parser.add_argument('--concurrency', type=int, default=8, help='Concurrent workers')
+        parser.add_argument('--requests', type=int, default=400, help='Requests per mode')
+        parser.add_argument('--query', default=QUERY, help='Query each request runs')
+
+    def handle(self, *args, **options):
+        alias = options['database']
+        self.stdout.write(
+            f"{options['requests']} requests, {options['concurrency']} workers, alias '{alias}' "
+            f"({'native pool' if db_pool.pooling_available() else 'persistent connections'})"
+        )
+        self.stdout.write(f"{'mode':<16}{'req/s':>10}{'p50 ms':>10}{'p95 ms':>10}{'connections':>14}")
+
+        for mode, request in [('fresh', self._fresh_request), ('reused', self._reused_request)]:
+            opened_before = db_pool.connections_opened(alias)
+            self._opened = 0
+            self._lock = threading.Lock()
+            elapsed, timings = self._run(request, alias, options)
+            opened = self._opened if mode == 'fresh' else db_pool.connections_opened(alias) - opened_before
+            timings.sort()
+            self.stdout.write(
+                f"{mode:<16}{len(timings) / elapsed:>10.0f}{statistics.median(timings):>10.2f}"
+                f"{timings[int(len(timings) * 0.95) - 1]:>10.2f}{opened:>14}"
+            )
+
+    def _run(self, request, alias, options):
+        def worker(_):
+            started = time.perf_counter()
+            request(alias, options['query'])
+            return (time.perf_counter() - started) * 1000
+
+        started = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=options['concurrency']) as executor:
+            timings = list(executor.map(worker, range(options['requests'])))
+        return time.perf_counter() - started, timings
+
+    def _fresh_request(self, alias, query):
+        # What every request paid before: connect, run, disconnect
+        wrapper = connections[alias]
+        connection = wrapper.Database.connect(**wrapper.get_connection_params())
+        try:
+            with connection.cursor() as cursor:
+                cursor.execute(query)
+                cursor.fetchall()
+        finally:
+            connection.close()
+        with self._lock:
+            self._opened += 1
+
+    def _reused_request(self, alias, query):
+        # Django's request cycle: the connection is reused (or returned to the
+        # pool) by close_old_connections() when the request finishes
+        with connections[alias].cursor() as cursor:
+            cursor.execute(query)
+            cursor.fetchall()
+        close_old_connections()
@@ -0,0 +1,88 @@
+import statistics
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import connections
+
+from core.search import SEARCH_VECTOR_SQL, prefix_tsquery
+
+ADJECTIVES = ['Spacious', 'Cozy', 'Modern', 'Furnished', 'Luxury', 'Affordable', 'Quiet', 'Serviced']
+PROPERTY_WORDS = ['Apartment', 'Bungalow', 'Townhouse', 'Villa', 'Studio', 'Duplex', 'Chamber', 'Flat']
+FEATURES = ['garden', 'balcony', 'parking', 'swimming pool', 'borehole', 'security', 'generator', 'air conditioning']
+AREAS = ['East Legon', 'Osu', 'Cantonments', 'Airport Residential', 'Spintex', 'Adenta', 'Tema', 'Kasoa']
+CITIES = ['Accra', 'Kumasi', 'Takoradi', 'Tamale', 'Cape Coast']
+
+DEFAULT_TERMS = ['pool', 'villa garden', 'legon', 'swim', 'cantonments']
+
+
+def _pick(words):
+    array = 'ARRAY[' + ', '.join(f"'{word}'" for word in words) + ']'
+    return f"({array})[1 + floor(random() * {len(words)})::int]"
+
+
+class Command(BaseCommand):
+    help = (
+        'Compare the full-text search path against the old LOWER(...) LIKE filters '
+        'on a synthetic catalog held in a temporary table'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--rows', type=int, default=1_000_000, help='Synthetic properties to generate')
+        parser.add_argument('--repeat', type=int, default=5, help='Runs per query; the median is reported')
+        parser.add_argument('--term', action='append', dest='terms', help='Search term (repeatable)')
+        parser.add_argument('--database', default='core', help='Database alias to run against')
+
+    def handle(self, *args, **options):
+        terms = options['terms'] or DEFAULT_TERMS
+        with connections[options['database']].cursor() as cursor:
+            self.stdout.write(f"Generating {options['rows']} synthetic properties...")
+            started = time.perf_counter()
+            cursor.execute("DROP TABLE IF EXISTS bench_property")
+            cursor.execute(f"""
+                CREATE TEMP TABLE bench_property AS
+                SELECT
+                    g AS id,
+                    {_pick(ADJECTIVES)} || ' ' || {_pick(PROPERTY_WORDS)} || ' ' || g AS title,
+                    {_pick(ADJECTIVES)} || ' home with ' || {_pick(FEATURES)} || ' and ' || {_pick(FEATURES)} AS description,
+                    {_pick(AREAS)} || ', ' || {_pick(CITIES)} AS location
+                FROM generate_series(1, %s) g
+            """, [options['rows']])
+            cursor.execute(f"""
+                ALTER TABLE bench_property ADD COLUMN search_vector tsvector
+                GENERATED ALWAYS AS ({SEARCH_VECTOR_SQL}) STORED
+            """)
+            cursor.execute("CREATE INDEX ON bench_property USING GIN (search_vector)")
+            cursor.execute("ANALYZE bench_property")
+            self.stdout.write(f"Catalog ready in {time.perf_counter() - started:.1f}s\n")
+
+            self.stdout.write(f"{'term':<16}{'like count':>14}{'fts count':>12}{'like ms':>12}{'fts ms':>12}{'speedup':>10}")
+            try:
+                for term in terms:
+                    like_count, like_ms = self._time(cursor, options['repeat'], """
+                        SELECT COUNT(*) FROM bench_property
+                        WHERE LOWER(title) LIKE LOWER(%s) OR LOWER(description) LIKE LOWER(%s)
+                    """, [f'%{term}%', f'%{term}%'])
+                    fts_count, fts_ms = self._time(cursor, options['repeat'], """
+                        SELECT COUNT(*) FROM bench_property
+                        WHERE search_vector @@ to_tsquery('english', %s)
+                    """, [prefix_tsquery(term)])
+                    self.stdout.write(
+                        f"{term:<16}{like_count:>14}{fts_count:>12}{like_ms:>12.1f}{fts_ms:>12.1f}"
+                        f"{like_ms / fts_ms if fts_ms else float('inf'):>9.1f}x"
+                    )
+            finally:
+                cursor.execute("DROP TABLE IF EXISTS bench_property")
+
+        self.stdout.write(
+            'Counts differ where the LIKE path cannot see the location, or where word-prefix '
+            'and substring matching disagree.'
+        )
+
+    def _time(self, cursor, repeat, query, params):
+        timings = []
+        for _ in range(repeat):
+            started = time.perf_counter()
+            cursor.execute(query, params)
+            count = cursor.fetchone()[0]
+            timings.append((time.perf_counter() - started) * 1000)
+        return count, statistics.median(timings)
@@ -0,0 +1,117 @@
+import asyncio
+import json
+import statistics
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from django.contrib.auth.hashers import check_password, make_password
+from django.core.management.base import BaseCommand
+from django.db import close_old_connections
+from django.test import AsyncClient, Client, override_settings
+
+from core.models import User
+
+EMAIL = 'login-storm@benchmark.invalid'
+PASSWORD = 'benchmark-password'
+
+
+def _percentile(timings, fraction):
+    return sorted(timings)[max(int(len(timings) * fraction) - 1, 0)]
+
+
+class Command(BaseCommand):
+    help = (
+        'Measure login throughput and browse latency during a login storm, hashing '
+        'passwords on the server threads (the old synchronous views) versus the '
+        'async views with the core.hashing pool'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--logins', type=int, default=200, help='Login requests in the storm')
+        parser.add_argument('--concurrency', type=int, default=32, help='Logins in flight at once')
+        parser.add_argument('--server-threads', type=int, default=8,
+                            help='Request threads of the simulated WSGI server')
+        parser.add_argument('--browse-url', default='/api/properties/', help='Browse endpoint to time')
+        parser.add_argument('--browse-interval', type=float, default=0.02,
+                            help='Seconds between browse requests during the storm')
+
+    def handle(self, *args, **options):
+        User.objects.filter(email=EMAIL).delete()
+        User.objects.create(
+            firstname='Login', lastname='Storm', email=EMAIL, phone_number='+233000000000',
+            password_hash=make_password(PASSWORD), role='property_seeker',
+            id_type='Ghana Card', id_value='GHA-000000000-0', is_verified=True
+        )
+        try:
+            self.stdout.write(
+                f"{options['logins']} logins, {options['concurrency']} concurrent, "
+                f"browse every {options['browse_interval'] * 1000:.0f} ms"
+            )
+            self.stdout.write(
+                f"{'mode':<14}{'logins/s':>10}{'503s':>7}{'browse':>8}{'p50 ms':>10}{'p99 ms':>10}"
+            )
+            # The test clients send Host: testserver
+            with override_settings(ALLOWED_HOSTS=['testserver']):
+                self._report('sync', *self._sync_storm(options))
+                self._report('async-pool', *asyncio.run(self._async_storm(options)))
+        finally:
+            User.objects.filter(email=EMAIL).delete()
+
+    def _report(self, mode, elapsed, statuses, browse_timings):
+        succeeded = statuses.count(200)
+        self.stdout.write(
+            f"{mode:<14}{succeeded / elapsed:>10.1f}{statuses.count(503):>7}{len(browse_timings):>8}"
+            f"{statistics.median(browse_timings):>10.1f}{_percentile(browse_timings, 0.99):>10.1f}"
+        )
+
+    def _sync_storm(self, options):
+        # Every request, login or browse, takes one of a fixed number of server
+        # threads, and a login holds its thread for the whole PBKDF2 run
+        def login():
+            user = User.objects.get(email=EMAIL)
+            ok = check_password(PASSWORD, user.password_hash)
+            close_old_connections()
+            return 200 if ok else 401
+
+        def browse(submitted):
+            Client().get(options['browse_url'])
+            close_old_connections()
+            return (time.perf_counter() - submitted) * 1000
+
+        with ThreadPoolExecutor(max_workers=options['server_threads']) as server:
+            started = time.perf_counter()
+            logins = [server.submit(login) for _ in range(options['logins'])]
+            browses = []
+            while not all(future.done() for future in logins):
+                browses.append(server.submit(browse, time.perf_counter()))
+                time.sleep(options['browse_interval'])
+            elapsed = time.perf_counter() - started
+            statuses = [future.result() for future in logins]
+            timings = [future.result() for future in browses]
+        return elapsed, statuses, timings
+
+    async def _async_storm(self, options):
+        # One event loop serves everything, as under an ASGI server
+        client = AsyncClient()
+        body = json.dumps({'email': EMAIL, 'password': PASSWORD})
+        in_flight = asyncio.Semaphore(options['concurrency'])
+
+        async def login():
+            async with in_flight:
+                response = await client.post('/api/user/login/', data=body, content_type='application/json')
+                return response.status_code
+
+        async def browse():
+            submitted = time.perf_counter()
+            await client.get(options['browse_url'])
+            return (time.perf_counter() - submitted) * 1000
+
+        started = time.perf_counter()
+        storm = asyncio.gather(*(login() for _ in range(options['logins'])))
+        browses = []
+        while not storm.done():
+            browses.append(asyncio.ensure_future(browse()))
+            await asyncio.sleep(options['browse_interval'])
+        statuses = await storm
+        elapsed = time.perf_counter() - started
+        return elapsed, statuses, await asyncio.gather(*browses)
@@ -0,0 +1,83 @@
+import multiprocessing
+import os
+import shutil
+import tempfile
+from concurrent.futures import ThreadPoolExecutor
+
+from django.core.files.base import ContentFile, File
+from django.core.files.storage import FileSystemStorage
+from django.core.management.base import BaseCommand
+
+from core.uploads import save_upload
+
+
+def _memory_kb(field):
+    with open('/proc/self/status') as status:
+        for line in status:
+            if line.startswith(field + ':'):
+                return int(line.split()[1])
+    return 0
+
+
+def _buffered_save(storage, source, name):
+    # The old upload path: read the whole file, then write it
+    with open(source, 'rb') as upload:
+        storage.save(name, ContentFile(upload.read()))
+
+
+def _streamed_save(storage, source, name):
+    with open(source, 'rb') as upload:
+        save_upload(File(upload, name=name), name, storage=storage)
+
+
+def _run_scenario(save, source, concurrency, target, results):
+    # Runs in a forked child so its peak RSS is measured on its own
+    storage = FileSystemStorage(location=target)
+    baseline = _memory_kb('VmRSS')
+    with ThreadPoolExecutor(max_workers=concurrency) as executor:
+        list(executor.map(lambda index: save(storage, source, f'upload_{index}.bin'), range(concurrency)))
+    results.put(_memory_kb('VmHWM') - baseline)
+
+
+class Command(BaseCommand):
+    help = (
+        'Measure peak RSS while saving concurrent uploads, buffering each file in '
+        'memory (the old path) versus streaming it through core.uploads.save_upload'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--sizes', default='1,5,10', help='Upload sizes in MB, comma-separated')
+        parser.add_argument('--concurrency', default='1,4,8', help='Concurrent uploads, comma-separated')
+
+    def handle(self, *args, **options):
+        sizes = [int(size) for size in options['sizes'].split(',')]
+        concurrencies = [int(count) for count in options['concurrency'].split(',')]
+        context = multiprocessing.get_context('fork')
+        workdir = tempfile.mkdtemp(prefix='upload-bench-')
+        try:
+            sources = {}
+            for size in sizes:
+                sources[size] = os.path.join(workdir, f'source_{size}mb.bin')
+                with open(sources[size], 'wb') as source:
+                    for _ in range(size):
+                        source.write(os.urandom(1024 * 1024))
+
+            self.stdout.write(f"{'size MB':>8}{'uploads':>9}{'buffered +RSS MB':>19}{'streamed +RSS MB':>19}")
+            for size in sizes:
+                for concurrency in concurrencies:
+                    peaks = []
+                    for save in (_buffered_save, _streamed_save):
+                        target = tempfile.mkdtemp(dir=workdir)
+                        results = context.Queue()
+                        process = context.Process(
+                            target=_run_scenario, args=(save, sources[size], concurrency, target, results)
+                        )
+                        process.start()
+                        peaks.append(results.get())
+                        process.join()
+                        shutil.rmtree(target)
+                    self.stdout.write(
+                        f"{size:>8}{concurrency:>9}{peaks[0] / 1024:>19.1f}{peaks[1] / 1024:>19.1f}"
+                    )
+        finally:
+            shutil.rmtree(workdir)
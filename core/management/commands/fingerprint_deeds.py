@@ -0,0 +1,48 @@
+from django.core.files.storage import default_storage
+from django.core.management.base import BaseCommand
+from django.db import connections
+
+from core.deeds import fingerprint_file
+
+
+class Command(BaseCommand):
+    help = 'Compute the SHA-256 and fingerprint of title deeds uploaded before they were recorded'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=100,
+                            help='Documents processed per batch')
+
+    def handle(self, *args, **options):
+        last_id, updated, missing = 0, 0, 0
+        while True:
+            with connections['core'].cursor() as cursor:
+                cursor.execute("""
+                    SELECT id, attachment FROM core_propertydocument
+                    WHERE id > %s AND (fingerprint IS NULL OR sha256 IS NULL)
+                    ORDER BY id
+                    LIMIT %s
+                """, [last_id, options['batch_size']])
+                rows = cursor.fetchall()
+            if not rows:
+                break
+            last_id = rows[-1][0]
+
+            values = []
+            for document_id, name in rows:
+                try:
+                    with default_storage.open(name, 'rb') as file:
+                        values.append((document_id, *fingerprint_file(file)))
+                except FileNotFoundError:
+                    missing += 1
+            if values:
+                with connections['core'].cursor() as cursor:
+                    cursor.execute(f"""
+                        UPDATE core_propertydocument pd
+                        SET sha256 = COALESCE(pd.sha256, v.sha256), fingerprint = v.fingerprint
+                        FROM (VALUES {', '.join(['(%s, %s, %s)'] * len(values))}) AS v(id, sha256, fingerprint)
+                        WHERE pd.id = v.id
+                    """, [value for row in values for value in row])
+            updated += len(values)
+            self.stdout.write(f'Processed documents up to id {last_id} ({updated} done, {missing} missing)')
+
+        self.stdout.write(self.style.SUCCESS(f'Fingerprinted {updated} documents ({missing} files missing)'))
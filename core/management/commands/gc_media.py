@@ -0,0 +1,29 @@
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand
+
+from core.media import collect_garbage
+
+
+class Command(BaseCommand):
+    help = 'Delete stored images and title deeds that no PropertyImage or PropertyDocument uses'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--grace-minutes', type=int, default=60,
+                            help='Keep files unreferenced for less than this long')
+        parser.add_argument('--scan-files', action='store_true',
+                            help='Also delete files in the media directories that no row names')
+        parser.add_argument('--dry-run', action='store_true',
+                            help='Report what would be deleted without deleting it')
+
+    def handle(self, *args, **options):
+        stats = collect_garbage(
+            grace=timedelta(minutes=options['grace_minutes']),
+            scan_files=options['scan_files'],
+            dry_run=options['dry_run']
+        )
+        verb = 'Would delete' if options['dry_run'] else 'Deleted'
+        self.stdout.write(self.style.SUCCESS(
+            f"{verb} {stats['blobs']} unreferenced blobs, {stats['files']} files, "
+            f"{stats['bytes'] / (1024 * 1024):.1f}MB ({stats['recounted']} reference counts repaired)"
+        ))
@@ -0,0 +1,63 @@
+import multiprocessing
+import os
+import signal
+import socket
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from django.core.management.base import BaseCommand
+from django.db import connections
+
+from core import jobs
+
+
+class Command(BaseCommand):
+    help = 'Run queued background jobs (see core.jobs) until stopped'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--processes', type=int, default=1,
+                            help='Worker processes, each with its own thread pool')
+        parser.add_argument('--threads', type=int, default=4,
+                            help='Jobs run concurrently per process')
+        parser.add_argument('--poll-interval', type=float, default=2.0,
+                            help='Seconds to wait when no job is due')
+        parser.add_argument('--once', action='store_true',
+                            help='Exit once no job is due instead of polling')
+
+    def handle(self, *args, **options):
+        if options['processes'] == 1:
+            self._work(options)
+            return
+
+        # Children must not share the parent's database sockets
+        connections.close_all()
+        context = multiprocessing.get_context('fork')
+        workers = [context.Process(target=self._work, args=(options,)) for _ in range(options['processes'])]
+        for worker in workers:
+            worker.start()
+        try:
+            for worker in workers:
+                worker.join()
+        except KeyboardInterrupt:
+            for worker in workers:
+                worker.terminate()
+                worker.join()
+
+    def _work(self, options):
+        worker_id = f'{socket.gethostname()}:{os.getpid()}'
+        stopping = []
+        signal.signal(signal.SIGTERM, lambda *_: stopping.append(True))
+
+        totals = {}
+        with ThreadPoolExecutor(max_workers=options['threads']) as executor:
+            while not stopping:
+                outcomes = jobs.run_pending(worker_id, executor, options['threads'])
+                for status, count in outcomes.items():
+                    totals[status] = totals.get(status, 0) + count
+                if not outcomes:
+                    if options['once']:
+                        break
+                    time.sleep(options['poll_interval'])
+
+        summary = ', '.join(f'{count} {status}' for status, count in sorted(totals.items())) or 'no jobs'
+        self.stdout.write(self.style.SUCCESS(f'Worker {worker_id} finished: {summary}'))
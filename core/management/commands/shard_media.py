@@ -0,0 +1,109 @@
+from django.core.files.storage import default_storage
+from django.core.management.base import BaseCommand
+from django.db import connections
+
+from core.storage import is_sharded, shard_name
+from ops import browse_cache, listing_search
+
+# (table, key column, path column) of every stored media path
+MEDIA_COLUMNS = [
+    ('core_propertyimage', 'id', 'image'),
+    ('core_propertyimage', 'id', 'thumbnail'),
+    ('core_propertyimage', 'id', 'medium'),
+    ('core_propertydocument', 'id', 'attachment'),
+    ('core_mediablob', 'sha256', 'name'),
+]
+
+
+class Command(BaseCommand):
+    help = (
+        'Move media files stored in the flat directories into the sharded layout '
+        '(see core.storage), rewriting their database paths batch by batch while '
+        'the site keeps serving'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=200,
+                            help='Rows examined per batch')
+        parser.add_argument('--keep-old', action='store_true',
+                            help='Leave the old files in place (gc_media --scan-files removes them later)')
+        parser.add_argument('--dry-run', action='store_true',
+                            help='Report what would move without moving anything')
+
+    def handle(self, *args, **options):
+        self.storage = default_storage
+        moved_files = set()
+        totals = {'rows': 0, 'files': 0, 'missing': 0}
+        for table, key, column in MEDIA_COLUMNS:
+            last_key = '' if key == 'sha256' else 0
+            while True:
+                with connections['core'].cursor() as cursor:
+                    cursor.execute(f"""
+                        SELECT {key}, {column} FROM {table}
+                        WHERE {key} > %s AND {column} IS NOT NULL AND {column} <> ''
+                        ORDER BY {key}
+                        LIMIT %s
+                    """, [last_key, options['batch_size']])
+                    rows = cursor.fetchall()
+                if not rows:
+                    break
+                last_key = rows[-1][0]
+
+                moves = self._move_files({row[1] for row in rows if not is_sharded(row[1])}, options, totals)
+                moved_files.update(moves)
+                if moves and not options['dry_run']:
+                    totals['rows'] += self._rewrite_paths(table, column, moves)
+
+            self.stdout.write(f'{table}.{column}: done')
+
+        if not options['keep_old'] and not options['dry_run']:
+            # Only now, so pages rendered before their batch was rewritten keep working meanwhile
+            for name in moved_files:
+                if self.storage.exists(name):
+                    self.storage.delete(name)
+
+        verb = 'Would move' if options['dry_run'] else 'Moved'
+        self.stdout.write(self.style.SUCCESS(
+            f"{verb} {totals['files']} files, rewrote {totals['rows']} rows "
+            f"({totals['missing']} paths had no file and were left as they are)"
+        ))
+
+    def _move_files(self, names, options, totals):
+        """Copy each file to its shard; returns {old name: new name} for the ones now in place"""
+        moves = {}
+        for name in sorted(names):
+            new_name = shard_name(name)
+            if self.storage.exists(new_name):
+                # Moved by an earlier batch or column, or identical content already sharded
+                moves[name] = new_name
+            elif self.storage.exists(name):
+                if not options['dry_run']:
+                    with self.storage.open(name, 'rb') as source:
+                        self.storage.save(new_name, source)
+                moves[name] = new_name
+                totals['files'] += 1
+            else:
+                totals['missing'] += 1
+        return moves
+
+    def _rewrite_paths(self, table, column, moves):
+        """Point every row using a moved file at its new name"""
+        values = ', '.join(['(%s, %s)'] * len(moves))
+        params = [value for move in moves.items() for value in move]
+        with connections['core'].cursor() as cursor:
+            returning = ', t.property_id' if table == 'core_propertyimage' else ''
+            cursor.execute(f"""
+                UPDATE {table} t
+                SET {column} = v.new_name
+                FROM (VALUES {values}) AS v(old_name, new_name)
+                WHERE t.{column} = v.old_name
+                RETURNING t.{column}{returning}
+            """, params)
+            rows = cursor.fetchall()
+
+        # The read model and cached pages embed image paths
+        property_ids = sorted({row[1] for row in rows}) if returning else []
+        if property_ids:
+            listing_search.refresh_listing_search(property_ids=property_ids)
+            browse_cache.invalidate(property_ids=property_ids)
+        return len(rows)
@@ -0,0 +1,196 @@
+"""
+Content-addressed storage for uploaded images and title deeds.
+
+An upload is stored once per distinct content, as <directory>/<sha256><ext>
+in its shard (see core.storage). save_deduplicated() streams the upload
+into <directory>/incoming/ with save_upload(), hashing it in the same pass,
+then moves it to its content name, or drops it when a file with that hash
+already exists, so re-uploads and resubmitted deeds cost no disk space.
+Every stored file has a MediaBlob row counting the PropertyImage and
+PropertyDocument rows that use it: reference_blob() adds one when a row is
+inserted, and the post_delete receiver drops one. collect_garbage() recounts the references and deletes
+files nothing uses any more.
+"""
+import os
+import uuid
+from datetime import timedelta
+
+from django.core.files.storage import default_storage
+from django.db import connections
+from django.utils import timezone
+
+from .images import derivative_names
+from .storage import shard_name
+from .uploads import save_upload
+
+# Directories holding uploads, scanned for unreferenced files
+MEDIA_DIRECTORIES = ('property_images', 'title_deeds')
+
+
+def content_name(directory, checksum, original_name):
+    """Storage name of the content with the given hash, in its shard"""
+    return shard_name(f'{directory}/{checksum}{os.path.splitext(original_name)[1].lower()}')
+
+
+def save_deduplicated(uploaded_file, directory, max_size=None, storage=default_storage, digests=()):
+    """
+    Store uploaded_file in directory under its content hash. Returns the
+    stored name, the SHA-256 hex digest, the size in bytes and whether the
+    content was new; raises UploadTooLarge, leaving nothing behind, when the
+    file passes max_size. digests are fed the file while it is copied.
+    """
+    extension = os.path.splitext(uploaded_file.name)[1].lower()
+    staged, checksum, size = save_upload(
+        uploaded_file, f'{directory}/incoming/{uuid.uuid4().hex}{extension}', max_size, storage, digests
+    )
+    name = content_name(directory, checksum, uploaded_file.name)
+    if storage.exists(name):
+        storage.delete(staged)
+        return name, checksum, size, False
+
+    _promote(storage, staged, name)
+    return name, checksum, size, True
+
+
+def _promote(storage, staged, name):
+    """Give the staged file its content name"""
+    try:
+        staged_path, path = storage.path(staged), storage.path(name)
+    except NotImplementedError:
+        # Remote storage has no rename: copy, then drop the staged file
+        with storage.open(staged) as content:
+            saved_name = storage.save(name, content)
+        storage.delete(staged)
+        if saved_name != name:
+            # An identical upload was stored while this one was being copied
+            storage.delete(saved_name)
+        return
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    # Atomic; an identical upload moved here meanwhile is replaced by the same bytes
+    os.replace(staged_path, path)
+
+
+def reference_blob(cursor, checksum, name, size):
+    """Count one more row using the stored file, on the caller's core cursor"""
+    reference_blobs(cursor, [(checksum, name, size)])
+
+
+def reference_blobs(cursor, stored_files):
+    """Count one more row per (checksum, name, size) in stored_files, which may repeat"""
+    references = {}
+    for checksum, name, size in stored_files:
+        references.setdefault(checksum, [name, size, 0])[2] += 1
+    if not references:
+        return
+
+    now = timezone.now()
+    cursor.execute(f"""
+        INSERT INTO core_mediablob (sha256, name, size, ref_count, created_at, referenced_at)
+        VALUES {', '.join(['(%s, %s, %s, %s, %s, %s)'] * len(references))}
+        ON CONFLICT (sha256) DO UPDATE
+        SET ref_count = core_mediablob.ref_count + EXCLUDED.ref_count, referenced_at = EXCLUDED.referenced_at
+    """, [value for checksum, (name, size, count) in references.items()
+          for value in (checksum, name, size, count, now, now)])
+
+
+def release_blobs(checksums):
+    """Count one row fewer per hash in checksums (which may repeat)"""
+    checksums = [checksum for checksum in checksums if checksum]
+    if not checksums:
+        return
+    with connections['core'].cursor() as cursor:
+        cursor.execute("""
+            UPDATE core_mediablob b
+            SET ref_count = b.ref_count - v.released
+            FROM (
+                SELECT sha256, COUNT(*) AS released FROM unnest(%s::text[]) AS sha256 GROUP BY sha256
+            ) v
+            WHERE b.sha256 = v.sha256
+        """, [checksums])
+
+
+def release_on_delete(sender, instance, **kwargs):
+    """post_delete receiver for PropertyImage and PropertyDocument"""
+    release_blobs([instance.sha256])
+
+
+def collect_garbage(grace=timedelta(hours=1), scan_files=False, dry_run=False, storage=default_storage):
+    """
+    Delete stored files that no row uses. Reference counts are recounted
+    from the image and document tables first, so counts that drifted (a raw
+    DELETE, a crash between the file write and the row insert) are
+    repaired. Only files unreferenced for longer than grace are removed,
+    which leaves uploads that are still being saved alone. With scan_files,
+    files under MEDIA_DIRECTORIES that no row or blob names are removed as
+    well. Returns counts of what was (or, with dry_run, would be) done.
+    """
+    with connections['core'].cursor() as cursor:
+        cursor.execute("""
+            UPDATE core_mediablob b
+            SET ref_count = counted.ref_total
+            FROM (
+                SELECT b.sha256,
+                    (SELECT COUNT(*) FROM core_propertyimage pi WHERE pi.sha256 = b.sha256)
+                    + (SELECT COUNT(*) FROM core_propertydocument pd WHERE pd.sha256 = b.sha256) AS ref_total
+                FROM core_mediablob b
+            ) counted
+            WHERE b.sha256 = counted.sha256 AND b.ref_count <> counted.ref_total
+        """)
+        recounted = cursor.rowcount
+
+        orphans = """
+            FROM core_mediablob
+            WHERE ref_count <= 0 AND referenced_at < %s
+        """
+        cutoff = timezone.now() - grace
+        if dry_run:
+            cursor.execute(f"SELECT name, size {orphans}", [cutoff])
+        else:
+            cursor.execute(f"DELETE {orphans} RETURNING name, size", [cutoff])
+        blobs = cursor.fetchall()
+
+    stats = {'recounted': recounted, 'blobs': len(blobs), 'files': 0, 'bytes': sum(size for _, size in blobs)}
+    for name, _ in blobs:
+        for stored_name in [name, *derivative_names(name)]:
+            if storage.exists(stored_name):
+                if not dry_run:
+                    storage.delete(stored_name)
+                stats['files'] += 1
+
+    if scan_files:
+        for name, size in _unreferenced_files(storage, cutoff):
+            if not dry_run:
+                storage.delete(name)
+            stats['files'] += 1
+            stats['bytes'] += size
+    return stats
+
+
+def _walk(storage, directory):
+    """Names of the files under directory, at any depth (the shards, incoming/)"""
+    directories, filenames = storage.listdir(directory)
+    for filename in filenames:
+        yield f'{directory}/{filename}'
+    for subdirectory in directories:
+        yield from _walk(storage, f'{directory}/{subdirectory}')
+
+
+def _unreferenced_files(storage, cutoff):
+    """Files under MEDIA_DIRECTORIES, older than cutoff, that nothing refers to"""
+    with connections['core'].cursor() as cursor:
+        cursor.execute("""
+            SELECT image FROM core_propertyimage
+            UNION SELECT thumbnail FROM core_propertyimage WHERE thumbnail IS NOT NULL
+            UNION SELECT medium FROM core_propertyimage WHERE medium IS NOT NULL
+            UNION SELECT attachment FROM core_propertydocument
+            UNION SELECT name FROM core_mediablob
+        """)
+        referenced = {row[0] for row in cursor.fetchall()}
+
+    for directory in MEDIA_DIRECTORIES:
+        if not storage.exists(directory):
+            continue
+        for name in _walk(storage, directory):
+            if name in referenced or storage.get_modified_time(name) >= cutoff:
+                continue
+            yield name, storage.size(name)
@@ -0,0 +1,26 @@
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0002_documentaccessrequest'),
+    ]
+
+    operations = [
+        migrations.RunSQL(
+            sql="""
+                ALTER TABLE core_property ADD COLUMN search_vector tsvector
+                GENERATED ALWAYS AS (
+                    setweight(to_tsvector('english'::regconfig, coalesce(title, '')), 'A') ||
+                    setweight(to_tsvector('english'::regconfig, coalesce(description, '')), 'B') ||
+                    setweight(to_tsvector('simple'::regconfig, coalesce(location, '')), 'C')
+                ) STORED;
+                CREATE INDEX core_property_search_vector_idx ON core_property USING GIN (search_vector);
+            """,
+            reverse_sql="""
+                DROP INDEX IF EXISTS core_property_search_vector_idx;
+                ALTER TABLE core_property DROP COLUMN IF EXISTS search_vector;
+            """,
+        ),
+    ]
@@ -0,0 +1,29 @@
+# Generated by Django 5.2.18 on 2026-10-18 16:45
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0004_property_coordinates'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='property',
+            index=models.Index(condition=models.Q(('status', 'available')), fields=['-created_at'], name='core_property_available_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='propertyimage',
+            index=models.Index(condition=models.Q(('is_active', True)), fields=['property', '-uploaded_at', '-id'], name='core_propimage_active_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='userproperty',
+            index=models.Index(condition=models.Q(('is_active', True), ('is_verified', True)), fields=['property'], include=('owner',), name='core_up_listed_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='userproperty',
+            index=models.Index(condition=models.Q(('verification_status', 'pending')), fields=['is_verified', 'is_active'], name='core_up_pending_idx'),
+        ),
+    ]
@@ -0,0 +1,23 @@
+# Generated by Django 5.2.18 on 2026-10-18 16:58
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0005_listing_indexes'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='propertyimage',
+            name='medium',
+            field=models.ImageField(blank=True, null=True, upload_to='property_images/derivatives/medium/'),
+        ),
+        migrations.AddField(
+            model_name='propertyimage',
+            name='thumbnail',
+            field=models.ImageField(blank=True, null=True, upload_to='property_images/derivatives/thumbnail/'),
+        ),
+    ]
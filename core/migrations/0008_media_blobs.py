@@ -0,0 +1,57 @@
+# Generated by Django 5.2.18 on 2026-10-18 17:06
+
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0007_job'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='MediaBlob',
+            fields=[
+                ('sha256', models.CharField(max_length=64, primary_key=True, serialize=False)),
+                ('name', models.CharField(max_length=255)),
+                ('size', models.BigIntegerField()),
+                ('ref_count', models.IntegerField(default=0)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('referenced_at', models.DateTimeField(default=django.utils.timezone.now)),
+            ],
+        ),
+        migrations.AddField(
+            model_name='propertydocument',
+            name='sha256',
+            field=models.CharField(blank=True, max_length=64, null=True),
+        ),
+        migrations.AddField(
+            model_name='propertyimage',
+            name='sha256',
+            field=models.CharField(blank=True, max_length=64, null=True),
+        ),
+        migrations.AlterField(
+            model_name='propertyimage',
+            name='medium',
+            field=models.ImageField(blank=True, max_length=255, null=True, upload_to='property_images/derivatives/medium/'),
+        ),
+        migrations.AlterField(
+            model_name='propertyimage',
+            name='thumbnail',
+            field=models.ImageField(blank=True, max_length=255, null=True, upload_to='property_images/derivatives/thumbnail/'),
+        ),
+        migrations.AddIndex(
+            model_name='propertydocument',
+            index=models.Index(fields=['sha256'], name='core_propdoc_sha256_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='propertyimage',
+            index=models.Index(fields=['sha256'], name='core_propimage_sha256_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='mediablob',
+            index=models.Index(condition=models.Q(('ref_count__lte', 0)), fields=['referenced_at'], name='core_mediablob_orphan_idx'),
+        ),
+    ]
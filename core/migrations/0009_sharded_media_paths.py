@@ -0,0 +1,24 @@
+# Generated by Django 5.2.18 on 2026-10-18 17:07
+
+import core.storage
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0008_media_blobs'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='propertydocument',
+            name='attachment',
+            field=models.FileField(max_length=255, upload_to=core.storage.property_document_path),
+        ),
+        migrations.AlterField(
+            model_name='propertyimage',
+            name='image',
+            field=models.ImageField(max_length=255, upload_to=core.storage.property_image_path),
+        ),
+    ]
@@ -0,0 +1,22 @@
+# Generated by Django 5.2.18 on 2026-10-18 17:16
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0009_sharded_media_paths'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='propertydocument',
+            name='fingerprint',
+            field=models.CharField(blank=True, max_length=64, null=True),
+        ),
+        migrations.AddIndex(
+            model_name='propertydocument',
+            index=models.Index(fields=['fingerprint'], name='core_propdoc_fingerprint_idx'),
+        ),
+    ]
@@ -0,0 +1,38 @@
+# Generated by Django 5.2.18 on 2026-10-18 17:19
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0010_propertydocument_fingerprint'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='propertydocument',
+            name='encrypted',
+            field=models.BooleanField(db_default=False, default=False),
+        ),
+        migrations.AddField(
+            model_name='propertydocument',
+            name='inspected_at',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='propertydocument',
+            name='page_count',
+            field=models.PositiveIntegerField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='propertydocument',
+            name='pdf_version',
+            field=models.CharField(blank=True, max_length=8, null=True),
+        ),
+        migrations.AddField(
+            model_name='propertydocument',
+            name='producer',
+            field=models.CharField(blank=True, max_length=255, null=True),
+        ),
+    ]
@@ -1,6 +1,9 @@
 from django.db import models
 from django.utils import timezone
 
+from .geo import location_fields
+from .storage import property_document_path, property_image_path
+
 # User Model
 class User(models.Model):
     ROLE_CHOICES = [
@@ -50,6 +53,26 @@ class Property(models.Model):
     location = models.CharField(max_length=150, help_text="Enter the full address including street number, street name, city/town, and GPS coordinates if available.")
     status = models.CharField(max_length=20, choices=STATUS_CHOICES, default='unlisted')
     created_at = models.DateTimeField(auto_now_add=True)
+    # Parsed from the GPS coordinates in location, see core.geo
+    latitude = models.FloatField(null=True, blank=True)
+    longitude = models.FloatField(null=True, blank=True)
+    geohash = models.CharField(max_length=12, null=True, blank=True)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['geohash'], name='core_property_geohash_idx',
+                         opclasses=['varchar_pattern_ops']),
+            # Browse queries only ever show available properties
+            models.Index(fields=['-created_at'], name='core_property_available_idx',
+                         condition=models.Q(status='available')),
+        ]
+
+    def save(self, *args, **kwargs):
+        self.latitude, self.longitude, self.geohash = location_fields(self.location)
+        update_fields = kwargs.get('update_fields')
+        if update_fields is not None and 'location' in update_fields:
+            kwargs['update_fields'] = set(update_fields) | {'latitude', 'longitude', 'geohash'}
+        super().save(*args, **kwargs)
 
     def __str__(self):
         return f"{self.title} ({self.property_type}) - {self.status}"
@@ -59,13 +82,28 @@ class Property(models.Model):
 class PropertyImage(models.Model):
     property = models.ForeignKey(Property, on_delete=models.CASCADE, 
       related_name='images')
-    image = models.ImageField(upload_to='property_images/')
+    image = models.ImageField(upload_to=property_image_path, max_length=255)
+    # Resized renditions of the image (see core.images)
+    thumbnail = models.ImageField(upload_to='property_images/derivatives/thumbnail/', max_length=255,
+                                  blank=True, null=True)
+    medium = models.ImageField(upload_to='property_images/derivatives/medium/', max_length=255,
+                               blank=True, null=True)
+    # Content hash of the stored original (see core.media)
+    sha256 = models.CharField(max_length=64, null=True, blank=True)
     uploaded_at = models.DateTimeField(auto_now_add=True)
     is_active = models.BooleanField(default=True)
 
     def __str__(self):
         return f"Image for {self.property.title} (Active:  {self.is_active})"
 
+    class Meta:
+        indexes = [
+            # Newest active images per property, in the order the listings show them
+            models.Index(fields=['property', '-uploaded_at', '-id'], name='core_propimage_active_idx',
+                         condition=models.Q(is_active=True)),
+            models.Index(fields=['sha256'], name='core_propimage_sha256_idx'),
+        ]
+
 
 # User Property Model
 class UserProperty(models.Model):
@@ -91,15 +129,41 @@ class UserProperty(models.Model):
     class Meta:
         db_table = 'core_userproperty'
         unique_together = ('owner', 'property')
+        indexes = [
+            # Listed (verified and active) ownership records, joined from core_property
+            models.Index(fields=['property'], include=['owner'], name='core_up_listed_idx',
+                         condition=models.Q(is_verified=True, is_active=True)),
+            # Admin verification queue
+            models.Index(fields=['is_verified', 'is_active'], name='core_up_pending_idx',
+                         condition=models.Q(verification_status='pending')),
+        ]
 
 
 # Property Document Model
 class PropertyDocument(models.Model):
     user_property = models.ForeignKey(UserProperty, 
      on_delete=models.CASCADE, related_name='documents')
-    attachment = models.FileField(upload_to='property_documents/')
+    attachment = models.FileField(upload_to=property_document_path, max_length=255)
+    # Content hash of the stored file (see core.media)
+    sha256 = models.CharField(max_length=64, null=True, blank=True)
+    # Hash ignoring metadata rewritten on every save, for duplicate deeds (see core.deeds)
+    fingerprint = models.CharField(max_length=64, null=True, blank=True)
+    # Read from the PDF for the review queue (see core.deeds): the version
+    # and encryption flag on upload, the page count and producer by the
+    # inspect_deed job, which sets inspected_at
+    pdf_version = models.CharField(max_length=8, null=True, blank=True)
+    encrypted = models.BooleanField(default=False, db_default=False)
+    page_count = models.PositiveIntegerField(null=True, blank=True)
+    producer = models.CharField(max_length=255, null=True, blank=True)
+    inspected_at = models.DateTimeField(null=True, blank=True)
     uploaded_at = models.DateTimeField(auto_now_add=True)
 
+    class Meta:
+        indexes = [
+            models.Index(fields=['sha256'], name='core_propdoc_sha256_idx'),
+            models.Index(fields=['fingerprint'], name='core_propdoc_fingerprint_idx'),
+        ]
+
     def __str__(self):
         return f"Title Deed for {self.user_property.property.title}"
 
@@ -142,3 +206,61 @@ class DocumentAccessRequest(models.Model):
 
     def __str__(self):
         return f"Document request for property {self.user_property.property.title} by {self.requester.email}"
+
+
+# A stored file named by its content hash, shared by every image and
+# document row with the same bytes (see core.media)
+class MediaBlob(models.Model):
+    sha256 = models.CharField(max_length=64, primary_key=True)
+    name = models.CharField(max_length=255)
+    size = models.BigIntegerField()
+    ref_count = models.IntegerField(default=0)
+    created_at = models.DateTimeField(auto_now_add=True)
+    referenced_at = models.DateTimeField(default=timezone.now)
+
+    class Meta:
+        indexes = [
+            # Garbage collection candidates
+            models.Index(fields=['referenced_at'], name='core_mediablob_orphan_idx',
+                         condition=models.Q(ref_count__lte=0)),
+        ]
+
+    def __str__(self):
+        return f"{self.name} ({self.ref_count} references)"
+
+
+# Background job queue (see core.jobs)
+class Job(models.Model):
+    STATUS_CHOICES = [
+        ('pending', 'Pending'),
+        ('running', 'Running'),
+        ('succeeded', 'Succeeded'),
+        ('failed', 'Failed'),
+    ]
+
+    task = models.CharField(max_length=100)
+    payload = models.JSONField(default=dict)
+    # Enqueueing twice with the same key returns the existing job
+    idempotency_key = models.CharField(max_length=255, unique=True, null=True, blank=True)
+    status = models.CharField(max_length=10, choices=STATUS_CHOICES, default='pending')
+    attempts = models.PositiveIntegerField(default=0)
+    max_attempts = models.PositiveIntegerField(default=5)
+    run_after = models.DateTimeField(default=timezone.now)
+    locked_by = models.CharField(max_length=100, null=True, blank=True)
+    locked_at = models.DateTimeField(null=True, blank=True)
+    last_error = models.TextField(null=True, blank=True)
+    result = models.JSONField(null=True, blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    finished_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        indexes = [
+            # Workers claim due pending jobs in run_after order
+            models.Index(fields=['run_after', 'id'], name='core_job_due_idx',
+                         condition=models.Q(status='pending')),
+            models.Index(fields=['locked_at'], name='core_job_running_idx',
+                         condition=models.Q(status='running')),
+        ]
+
+    def __str__(self):
+        return f"{self.task} job {self.id} ({self.status})"
@@ -0,0 +1,53 @@
+"""
+Full-text search helpers for property listings.
+
+core_property.search_vector (and listing_search.search_vector) is a stored
+tsvector generated from the title (weight A), description (weight B) and
+location (weight C), backed by a GIN index. The browse endpoints filter and
+rank with the tsqueries built here instead of LOWER(col) LIKE '%term%'.
+"""
+import re
+
+# Same expression for every table that carries a search_vector column
+SEARCH_VECTOR_SQL = """
+    setweight(to_tsvector('english'::regconfig, coalesce(title, '')), 'A') ||
+    setweight(to_tsvector('english'::regconfig, coalesce(description, '')), 'B') ||
+    setweight(to_tsvector('simple'::regconfig, coalesce(location, '')), 'C')
+"""
+
+WORD_PATTERN = re.compile(r'\w+')
+
+
+def prefix_tsquery(term, weights=''):
+    """
+    Turn free text into a tsquery string where every word must match as a
+    prefix, e.g. 'east leg' -> 'east:* & leg:*', so partial input works for
+    type-ahead. weights restricts matches to those lexeme weights ('C' for
+    location). Returns None when the text has no searchable words.
+    """
+    words = WORD_PATTERN.findall(term or '')
+    if not words:
+        return None
+    return ' & '.join(f"{word.lower()}:*{weights}" for word in words)
+
+
+def search_condition(alias, search=None, location=None):
+    """
+    SQL conditions and params for the search and location filters on the
+    search_vector column of the given table alias.
+    """
+    conditions, params = [], []
+    location_query = prefix_tsquery(location, weights='C')
+    if location_query:
+        conditions.append(f"{alias}.search_vector @@ to_tsquery('simple', %s)")
+        params.append(location_query)
+    search_query = prefix_tsquery(search)
+    if search_query:
+        conditions.append(f"{alias}.search_vector @@ to_tsquery('english', %s)")
+        params.append(search_query)
+    return ''.join(f" AND {condition}" for condition in conditions), params
+
+
+def rank_expression(alias, search):
+    """ts_rank expression (and params) for ordering by relevance to search"""
+    return f"ts_rank({alias}.search_vector, to_tsquery('english', %s))", [prefix_tsquery(search)]
@@ -0,0 +1,142 @@
+"""
+Serving of uploaded media.
+
+serve_media() answers conditional requests (ETag / Last-Modified) with 304
+and single byte ranges (as PDF viewers send them) with 206. Content-addressed
+originals never change, so they are cached for a year as immutable; other
+files get MEDIA_CACHE_MAX_AGE. With MEDIA_SERVE_MODE set to 'x-sendfile' or
+'x-accel-redirect', Django only resolves and checks the request and the web
+server (Apache mod_xsendfile, nginx internal location) sends the bytes.
+"""
+import mimetypes
+import os
+import posixpath
+import re
+
+from django.conf import settings
+from django.core.exceptions import SuspiciousFileOperation
+from django.core.files.storage import default_storage
+from django.http import FileResponse, Http404, HttpResponse, StreamingHttpResponse
+from django.utils.cache import get_conditional_response
+from django.utils.http import http_date, parse_http_date_safe
+from django.views.decorators.http import require_http_methods
+
+from .storage import HEX_DIGEST
+
+RANGE_HEADER = re.compile(r'bytes=(\d*)-(\d*)$')
+IMMUTABLE_CACHE_CONTROL = 'max-age=31536000, immutable'
+# Title deeds are only served through signed links (core.downloads), and
+# never kept by shared caches
+PRIVATE_DIRECTORIES = ('title_deeds/',)
+
+
+def is_content_addressed(name):
+    """Whether name is an original stored under its content hash (derivatives can be regenerated)"""
+    if '/derivatives/' in name:
+        return False
+    return bool(HEX_DIGEST.fullmatch(os.path.basename(name).split('.', 1)[0]))
+
+
+def byte_range(request, size, etag, last_modified):
+    """
+    The (start, end) inclusive range the request asks for, None for the whole
+    file, or False when the range cannot be satisfied. Several ranges, and
+    an If-Range naming another version, get the whole file.
+    """
+    match = RANGE_HEADER.match(request.headers.get('Range', '').replace(' ', ''))
+    if not match or not any(match.groups()):
+        return None
+    if_range = request.headers.get('If-Range')
+    if if_range and if_range != etag and parse_http_date_safe(if_range) != last_modified:
+        return None
+
+    first, last = match.groups()
+    if not first:
+        # bytes=-N is the last N bytes
+        start, end = max(size - int(last), 0), size - 1
+    else:
+        start, end = int(first), min(int(last), size - 1) if last else size - 1
+    if start >= size or start > end:
+        return False
+    return start, end
+
+
+def _read_range(path, start, length):
+    with open(path, 'rb') as file:
+        file.seek(start)
+        while length > 0:
+            chunk = file.read(min(length, settings.UPLOAD_CHUNK_SIZE))
+            if not chunk:
+                break
+            length -= len(chunk)
+            yield chunk
+
+
+def _cache_headers(response, name, etag, last_modified):
+    response['ETag'] = etag
+    response['Last-Modified'] = http_date(last_modified)
+    response['Accept-Ranges'] = 'bytes'
+    scope = 'private' if name.startswith(PRIVATE_DIRECTORIES) else 'public'
+    if is_content_addressed(name):
+        response['Cache-Control'] = f'{scope}, {IMMUTABLE_CACHE_CONTROL}'
+    else:
+        response['Cache-Control'] = f'{scope}, max-age={settings.MEDIA_CACHE_MAX_AGE}'
+    return response
+
+
+def file_response(request, name):
+    """Response for the stored file name, honouring conditional and Range headers"""
+    try:
+        path = default_storage.path(name)
+        stat = os.stat(path)
+    except (SuspiciousFileOperation, FileNotFoundError, NotADirectoryError):
+        raise Http404('File not found')
+    if not os.path.isfile(path):
+        raise Http404('File not found')
+
+    if is_content_addressed(name):
+        etag = f'"{os.path.basename(name).split(".", 1)[0]}"'
+    else:
+        etag = f'"{stat.st_size:x}-{stat.st_mtime_ns:x}"'
+    last_modified = int(stat.st_mtime)
+
+    not_modified = get_conditional_response(request, etag=etag, last_modified=last_modified)
+    if not_modified is not None:
+        return _cache_headers(not_modified, name, etag, last_modified)
+
+    content_type = mimetypes.guess_type(path)[0] or 'application/octet-stream'
+    mode = settings.MEDIA_SERVE_MODE
+    if mode:
+        # The web server sends the file (and handles Range itself)
+        response = HttpResponse(content_type=content_type)
+        if mode == 'x-accel-redirect':
+            response['X-Accel-Redirect'] = settings.MEDIA_ACCEL_REDIRECT_PREFIX + name
+        else:
+            response['X-Sendfile'] = path
+        return _cache_headers(response, name, etag, last_modified)
+
+    requested = byte_range(request, stat.st_size, etag, last_modified)
+    if requested is False:
+        response = HttpResponse(status=416)
+        response['Content-Range'] = f'bytes */{stat.st_size}'
+        return _cache_headers(response, name, etag, last_modified)
+    if requested is None:
+        # FileResponse lets the WSGI server use sendfile()
+        response = FileResponse(open(path, 'rb'), content_type=content_type)
+    else:
+        start, end = requested
+        response = StreamingHttpResponse(
+            _read_range(path, start, end - start + 1), status=206, content_type=content_type
+        )
+        response['Content-Range'] = f'bytes {start}-{end}/{stat.st_size}'
+        response['Content-Length'] = str(end - start + 1)
+    return _cache_headers(response, name, etag, last_modified)
+
+
+@require_http_methods(["GET", "HEAD"])
+def serve_media(request, path):
+    """Serve an uploaded file from MEDIA_ROOT"""
+    name = posixpath.normpath(path)
+    if name.startswith(PRIVATE_DIRECTORIES):
+        raise Http404('File not found')
+    return file_response(request, name)
@@ -0,0 +1,42 @@
+"""
+Sharded layout of the media directories.
+
+Files are spread over two levels of 256 subdirectories, so no directory
+grows past a few thousand entries: property_images/<sha256>.png is stored as
+property_images/ab/cd/<sha256>.png. Content-addressed names shard on their
+own leading hex digits; any other name shards on the MD5 of its file name.
+The shard_media command moves files stored before the layout existed.
+"""
+import hashlib
+import posixpath
+import re
+
+HEX_DIGEST = re.compile(r'[0-9a-f]{64}')
+
+
+def _prefix(filename):
+    stem = filename.rsplit('.', 1)[0]
+    digest = stem if HEX_DIGEST.fullmatch(stem) else hashlib.md5(filename.encode()).hexdigest()
+    return digest[:2], digest[2:4]
+
+
+def is_sharded(name):
+    """Whether name already sits in its shard"""
+    parts = name.split('/')
+    return len(parts) >= 4 and tuple(parts[-3:-1]) == _prefix(parts[-1])
+
+
+def shard_name(name):
+    """The sharded form of a storage name: dir/file -> dir/ab/cd/file"""
+    if is_sharded(name):
+        return name
+    directory, filename = posixpath.split(name)
+    return posixpath.join(directory, *_prefix(filename), filename)
+
+
+def property_image_path(instance, filename):
+    return shard_name(f'property_images/{filename}')
+
+
+def property_document_path(instance, filename):
+    return shard_name(f'title_deeds/{filename}')
@@ -0,0 +1,47 @@
+"""Background tasks run by the job queue (see core.jobs)"""
+from django.core.files.storage import default_storage
+from django.db import connections
+from django.utils import timezone
+
+from ops import browse_cache, listing_search
+
+from .deeds import inspect_pdf
+from .images import create_derivatives
+from .jobs import task
+
+
+@task('process_property_image')
+def process_property_image(image_id, property_id):
+    """Create the derivatives of a freshly uploaded image and publish them"""
+    return process_property_images([image_id], property_id)
+
+
+@task('process_property_images')
+def process_property_images(image_ids, property_id):
+    """Create the derivatives of a batch of uploaded images of one property and publish them"""
+    created = create_derivatives(image_ids)
+    if not created:
+        raise RuntimeError(f'No derivatives created for images {image_ids}')
+    listing_search.refresh_listing_search(property_ids=[property_id])
+    browse_cache.invalidate(property_ids=[property_id])
+    return {'image_ids': image_ids, 'created': created}
+
+
+@task('inspect_deed')
+def inspect_deed(document_id):
+    """Read the page count and producer of an uploaded title deed for the review queue"""
+    with connections['core'].cursor() as cursor:
+        cursor.execute("SELECT attachment FROM core_propertydocument WHERE id = %s", [document_id])
+        row = cursor.fetchone()
+    if row is None:
+        # The document was replaced or removed before the job ran
+        return {'document_id': document_id, 'skipped': True}
+
+    metadata = inspect_pdf(default_storage.path(row[0]))
+    with connections['core'].cursor() as cursor:
+        cursor.execute("""
+            UPDATE core_propertydocument
+            SET page_count = COALESCE(%s, page_count), producer = %s, inspected_at = %s
+            WHERE id = %s
+        """, [metadata['page_count'], metadata['producer'], timezone.now(), document_id])
+    return {'document_id': document_id, **metadata}
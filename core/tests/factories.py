@@ -0,0 +1,70 @@
+"""
+Rows the core and ops tests share: an owner, their properties, and the
+ownership and listing rows that put a property on the browse endpoints.
+Every helper takes keyword overrides for the model fields.
+"""
+from rest_framework_simplejwt.tokens import AccessToken
+
+from core.models import Property, User, UserProperty
+from ops.models import PropertyListing
+
+
+def create_user(email='owner@example.com', role='property_owner', **fields):
+    values = {
+        'firstname': 'Test',
+        'lastname': 'Owner',
+        'email': email,
+        'phone_number': '+233555555555',
+        'password_hash': 'hashed_password',
+        'role': role,
+        'id_type': 'Ghana Card',
+        'id_value': 'GHA-123456789-0',
+        'is_verified': True,
+        **fields,
+    }
+    return User.objects.using('core').create(**values)
+
+
+def bearer(user):
+    """Authorization header carrying a login token of user, for the test client"""
+    token = AccessToken()
+    token['user_id'] = user.id
+    token['email'] = user.email
+    token['role'] = user.role
+    return {'HTTP_AUTHORIZATION': f'Bearer {token}'}
+
+
+def create_property(title='Test Property', **fields):
+    values = {
+        'title': title,
+        'property_type': '1_bedroom',
+        'description': 'A test property',
+        'location': 'Test Location',
+        'status': 'available',
+        **fields,
+    }
+    return Property.objects.using('core').create(**values)
+
+
+def create_ownership(owner, property, is_verified=True, **fields):
+    values = {
+        'is_verified': is_verified,
+        'is_active': True,
+        'verification_status': 'approved' if is_verified else 'pending',
+        'transaction_hash': '',
+        **fields,
+    }
+    return UserProperty.objects.using('core').create(owner=owner, property=property, **values)
+
+
+def create_listing(user_property, price=1000.00, listing_type='rent', **fields):
+    return PropertyListing.objects.using('ops').create(
+        user_property_id=user_property.id, listing_type=listing_type, price=price, **fields
+    )
+
+
+def create_listed_property(owner, title='Test Property', price=1000.00, is_verified=True, **property_fields):
+    """A property owned by owner and listed for rent; returns (property, user_property, listing)"""
+    property = create_property(title, **property_fields)
+    user_property = create_ownership(owner, property, is_verified)
+    return property, user_property, create_listing(user_property, price)
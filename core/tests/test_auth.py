@@ -0,0 +1,91 @@
+import json
+from datetime import timedelta
+
+from django.core.cache import caches
+from django.test import TransactionTestCase
+from rest_framework_simplejwt.tokens import AccessToken
+
+from core import throttle
+from core.auth import user_status
+from core.tests.factories import bearer, create_user, create_property
+
+
+class JWTAuthenticationTests(TransactionTestCase):
+    databases = {'default', 'core', 'ops'}
+
+    def setUp(self):
+        throttle.reset()
+        caches['auth'].clear()
+        caches['browse'].clear()
+        self.user = create_user('seeker@example.com', 'property_seeker', lastname='Seeker')
+        property = create_property('Auth Property')
+        self.url = f'/api/property/{property.id}/'
+
+    def bearer(self, user_id=None, lifetime=None):
+        token = AccessToken()
+        token['user_id'] = user_id or self.user.id
+        if lifetime is not None:
+            token.set_exp(lifetime=lifetime)
+        return {'HTTP_AUTHORIZATION': f'Bearer {token}'}
+
+    def test_tokens_are_verified(self):
+        self.assertEqual(self.client.get(self.url).status_code, 401)
+        for header in [{'HTTP_AUTHORIZATION': 'Bearer test-token'}, self.bearer(lifetime=timedelta(seconds=-1))]:
+            response = self.client.get(self.url, **header)
+            self.assertEqual(response.status_code, 401)
+            self.assertEqual(response.json()['error'], 'Invalid or expired token')
+        self.assertEqual(self.client.get(self.url, **self.bearer(user_id=999999)).status_code, 401)
+
+    def test_login_token_is_accepted(self):
+        # Stored in plain text, as by accounts created before hashing; login upgrades it
+        self.user.password_hash = 'secret'
+        self.user.save()
+        response = self.client.post('/api/user/login/', data=json.dumps({
+            'email': 'seeker@example.com', 'password': 'secret'
+        }), content_type='application/json')
+        token = response.json()['token']
+
+        response = self.client.get(self.url, HTTP_AUTHORIZATION=f'Bearer {token}')
+        self.assertNotEqual(response.status_code, 401)
+
+    def test_status_is_cached(self):
+        user_status(self.user.id)
+        with self.assertNumQueries(0, using='core'):
+            self.assertEqual(user_status(self.user.id), (True, True))
+            self.assertEqual(user_status(self.user.id), (True, True))
+
+    def test_deactivation_takes_effect_at_once(self):
+        header = self.bearer()
+        self.assertNotEqual(self.client.get(self.url, **header).status_code, 401)
+
+        self.user.is_active = False
+        self.user.save()
+        response = self.client.get(self.url, **header)
+        self.assertEqual(response.status_code, 401)
+        self.assertEqual(response.json()['error'], 'User account is disabled')
+
+    def test_verify_user_refreshes_the_status(self):
+        self.user.is_verified = False
+        self.user.save()
+        self.assertEqual(user_status(self.user.id), (False, True))
+
+        admin = create_user('admin@example.com', 'sys_admin', id_value='admin')
+        response = self.client.patch('/api/user/verify/', data=json.dumps({'user_id': self.user.id}),
+                                     content_type='application/json', **bearer(admin))
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(user_status(self.user.id), (True, True))
+
+    def test_admin_views_check_the_role(self):
+        admin = create_user('admin@example.com', 'sys_admin', id_value='admin')
+        self.assertEqual(self.client.get('/api/user/unverified/').status_code, 401)
+        self.assertEqual(self.client.get('/api/user/unverified/', **bearer(self.user)).status_code, 403)
+        self.assertEqual(self.client.get('/api/user/unverified/', **bearer(admin)).status_code, 200)
+        response = self.client.patch('/api/user/verify/', data=json.dumps({'user_id': self.user.id}),
+                                     content_type='application/json', **bearer(self.user))
+        self.assertEqual(response.status_code, 403)
+        self.assertEqual(self.client.get('/api/health/db/', **bearer(self.user)).status_code, 403)
+
+        # Browsers send CORS preflights without the token
+        response = self.client.options('/api/user/unverified/')
+        self.assertEqual(response.status_code, 200)
+        self.assertIn('Authorization', response['Access-Control-Allow-Headers'])
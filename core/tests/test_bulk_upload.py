@@ -0,0 +1,87 @@
+import shutil
+import tempfile
+
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.db import connections
+from django.test import TransactionTestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+
+from core.models import Job, MediaBlob, PropertyImage
+from core.tests.factories import create_user, create_property, create_ownership
+
+
+class BulkImageUploadTests(TransactionTestCase):
+    databases = {'default', 'core', 'ops'}
+
+    def setUp(self):
+        self.media_root = tempfile.mkdtemp()
+        self.settings_override = override_settings(MEDIA_ROOT=self.media_root)
+        self.settings_override.enable()
+        self.owner = create_user()
+        self.property = create_property('Bulk Property')
+        create_ownership(self.owner, self.property)
+
+    def tearDown(self):
+        self.settings_override.disable()
+        shutil.rmtree(self.media_root)
+
+    def upload(self, images, user_id=None):
+        return self.client.post('/api/property/upload-images/', {
+            'property_id': self.property.id,
+            'user_id': user_id or self.owner.id,
+            'images': images,
+        })
+
+    def test_each_file_gets_a_status(self):
+        images = [
+            SimpleUploadedFile('front.png', b'front bytes', content_type='image/png'),
+            SimpleUploadedFile('notes.txt', b'not an image', content_type='text/plain'),
+            SimpleUploadedFile('back.jpg', b'back bytes', content_type='image/jpeg'),
+        ]
+        with CaptureQueriesContext(connections['core']) as queries:
+            response = self.upload(images)
+
+        self.assertEqual(response.status_code, 200)
+        files = {result['file']: result for result in response.json()['files']}
+        self.assertEqual(files['notes.txt']['status'], 'failed')
+        self.assertEqual([files['front.png']['status'], files['back.jpg']['status']], ['uploaded', 'uploaded'])
+
+        image_ids = [files['front.png']['image_id'], files['back.jpg']['image_id']]
+        stored = PropertyImage.objects.using('core').filter(property=self.property)
+        self.assertEqual(sorted(image.id for image in stored), sorted(image_ids))
+        self.assertEqual(Job.objects.using('core').get(id=response.json()['job_id']).payload['image_ids'], image_ids)
+
+        statements = [query['sql'] for query in queries.captured_queries]
+        self.assertEqual(sum('INSERT INTO core_propertyimage' in sql for sql in statements), 1)
+        self.assertEqual(sum('SELECT up.id' in sql for sql in statements), 1)
+
+    def test_identical_files_share_a_blob(self):
+        images = [
+            SimpleUploadedFile(f'copy{i}.png', b'same bytes', content_type='image/png') for i in range(3)
+        ]
+        response = self.upload(images)
+
+        checksums = {result['sha256'] for result in response.json()['files']}
+        self.assertEqual(len(checksums), 1)
+        self.assertEqual(MediaBlob.objects.using('core').get(sha256=checksums.pop()).ref_count, 3)
+
+    @override_settings(UPLOAD_MAX_IMAGE_SIZE=16)
+    def test_oversize_file_does_not_fail_the_batch(self):
+        response = self.upload([
+            SimpleUploadedFile('small.png', b'small', content_type='image/png'),
+            SimpleUploadedFile('large.png', b'x' * 5000, content_type='image/png'),
+        ])
+
+        self.assertEqual(response.status_code, 200)
+        statuses = {result['file']: result['status'] for result in response.json()['files']}
+        self.assertEqual(statuses, {'small.png': 'uploaded', 'large.png': 'failed'})
+
+    @override_settings(UPLOAD_MAX_BATCH_FILES=2)
+    def test_batch_limits(self):
+        images = [SimpleUploadedFile(f'{i}.png', b'bytes', content_type='image/png') for i in range(3)]
+        self.assertEqual(self.upload(images).status_code, 400)
+
+        response = self.upload([SimpleUploadedFile('a.txt', b'text', content_type='text/plain')])
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(self.upload(images[:1], user_id=999999).status_code, 404)
+        self.assertFalse(PropertyImage.objects.using('core').exists())
@@ -0,0 +1,75 @@
+from unittest import mock
+
+from django.test import SimpleTestCase, TestCase
+
+from core.tests.factories import bearer, create_user
+from TrustRent import db_pool
+
+
+def databases():
+    return {
+        'core': {'NAME': 'trustrent_core_db', 'OPTIONS': {}},
+        'ledger': {'NAME': 'trustrent_ledger_db'},
+    }
+
+
+class ConfigurePoolingTests(SimpleTestCase):
+
+    def test_native_pool_per_alias(self):
+        """With psycopg_pool available each alias gets a pool of its own size"""
+        with mock.patch.object(db_pool, 'psycopg_pool', object()):
+            configured = db_pool.configure_pooling(databases(), {'core': (2, 10)})
+
+        self.assertEqual(configured['core']['CONN_MAX_AGE'], 0)
+        self.assertEqual(configured['core']['OPTIONS']['pool']['max_size'], 10)
+        self.assertEqual(configured['ledger']['OPTIONS']['pool']['min_size'], 1)
+        self.assertTrue(configured['core']['CONN_HEALTH_CHECKS'])
+
+    def test_persistent_fallback(self):
+        """Without pool support connections are kept and health-checked instead"""
+        with mock.patch.object(db_pool, 'psycopg_pool', None):
+            configured = db_pool.configure_pooling(databases(), {}, conn_max_age=30)
+
+        self.assertEqual(configured['core']['CONN_MAX_AGE'], 30)
+        self.assertTrue(configured['core']['CONN_HEALTH_CHECKS'])
+        self.assertNotIn('pool', configured['core']['OPTIONS'])
+
+    def test_no_persistent_connections_under_asgi(self):
+        with mock.patch.object(db_pool, 'psycopg_pool', None):
+            configured = db_pool.configure_pooling(databases(), {}, asgi=True)
+        self.assertEqual(configured['core']['CONN_MAX_AGE'], 0)
+        self.assertNotIn('pool', configured['core']['OPTIONS'])
+
+        with mock.patch.object(db_pool, 'psycopg_pool', object()):
+            configured = db_pool.configure_pooling(databases(), {'core': (2, 10)}, asgi=True)
+        self.assertEqual(configured['core']['OPTIONS']['pool']['max_size'], 10)
+
+    def test_pool_can_be_disabled(self):
+        with mock.patch.object(db_pool, 'psycopg_pool', object()):
+            configured = db_pool.configure_pooling(databases(), {}, use_pool=False)
+        self.assertNotIn('pool', configured['core']['OPTIONS'])
+
+    def test_disabling_removes_a_configured_pool(self):
+        with mock.patch.object(db_pool, 'psycopg_pool', object()):
+            configured = db_pool.configure_pooling(databases(), {})
+            db_pool.configure_pooling(configured, {}, use_pool=False)
+        self.assertNotIn('pool', configured['core']['OPTIONS'])
+        self.assertEqual(configured['core']['CONN_MAX_AGE'], 60)
+
+
+class DatabaseHealthTests(TestCase):
+    databases = {'default', 'core', 'ops', 'ledger'}
+
+    def test_reports_every_alias(self):
+        admin = create_user('admin@example.com', 'sys_admin')
+        response = self.client.get('/api/health/db/', **bearer(admin))
+        self.assertEqual(response.status_code, 200)
+        body = response.json()
+        self.assertTrue(body['healthy'])
+        self.assertEqual(set(body['databases']), {'default', 'core', 'ops', 'ledger'})
+        for stats in body['databases'].values():
+            self.assertEqual(stats['status'], 'ok')
+            self.assertIn('connections_opened', stats)
+            # The tests run without native pools, so every alias reports the fallback
+            self.assertEqual((stats['mode'], stats['conn_max_age']), ('persistent', 60))
+            self.assertIn(stats['fallback'], ['pooling disabled', 'psycopg_pool not installed'])
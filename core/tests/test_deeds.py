@@ -0,0 +1,158 @@
+import io
+import shutil
+import tempfile
+import zlib
+
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.test import SimpleTestCase, TransactionTestCase, override_settings
+
+from core.deeds import DeedFingerprint, InvalidDeed, check_pdf, inspect_pdf
+from core.models import Job, PropertyDocument
+from core.tasks import inspect_deed
+from core.tests.factories import bearer, create_user, create_property, create_ownership
+
+DEED = (
+    b'%PDF-1.4\n1 0 obj\n<< /Title (Deed of Assignment) /CreationDate (D:20200101) /Producer (Word) >>\n'
+    b'endobj\nxref\n0 2\n0000000000 65535 f \n0000000009 00000 n \n'
+    b'trailer << /Size 2 /ID [<aa01><aa01>] >>\nstartxref\n123\n%%EOF\n'
+)
+# The same deed opened and saved again by another program
+RESAVED = (
+    DEED.replace(b'D:20200101', b'D:20261018').replace(b'(Word)', b'(Acrobat \\(9\\))')
+    .replace(b'0000000009', b'0000000015').replace(b'<aa01>', b'<bb02>').replace(b'\n123\n', b'\n131\n')
+    .replace(b'\n', b'\r\n')
+)
+
+# A PDF 1.5 file keeping its page tree and Info dictionary in a compressed object stream
+OBJECTS = zlib.compress(b'<< /Type /Pages /Kids [3 0 R 4 0 R 5 0 R] /Count 3 >> << /Producer (Scanner \\(v2\\)) >>')
+COMPRESSED = (
+    b'%PDF-1.5\n%\xe2\xe3\xcf\xd3\n7 0 obj\n<< /Type /ObjStm /N 2 /First 12 /Filter /FlateDecode /Length '
+    + str(len(OBJECTS)).encode() + b' >>\nstream\n' + OBJECTS + b'\nendstream\nendobj\nstartxref\n15\n%%EOF\n'
+)
+
+
+def fingerprint(content, chunk_size):
+    digest = DeedFingerprint()
+    for start in range(0, len(content), chunk_size):
+        digest.update(content[start:start + chunk_size])
+    return digest.hexdigest()
+
+
+class DeedFingerprintTests(SimpleTestCase):
+
+    def test_resaved_deed_keeps_its_fingerprint(self):
+        self.assertEqual(fingerprint(DEED, 4096), fingerprint(RESAVED, 4096))
+
+    def test_fingerprint_does_not_depend_on_chunking(self):
+        self.assertEqual({fingerprint(RESAVED, size) for size in (1, 2, 7, 4096)}, {fingerprint(DEED, 4096)})
+
+    def test_different_deeds_differ(self):
+        other = DEED.replace(b'Deed of Assignment', b'Deed of Gift')
+        self.assertNotEqual(fingerprint(DEED, 4096), fingerprint(other, 4096))
+
+
+class PdfValidationTests(SimpleTestCase):
+
+    def test_header_and_trailer_checks(self):
+        self.assertEqual(check_pdf(io.BytesIO(DEED), len(DEED)),
+                         {'pdf_version': '1.4', 'page_count': None, 'encrypted': False})
+        cases = [
+            (b'GIF89a not a pdf', 'File is not a PDF document'),
+            (DEED[:-20], 'PDF document is incomplete'),
+            (DEED.replace(b'\n123\n', b'\n99999\n'), 'PDF document has no valid cross-reference table'),
+        ]
+        for content, error in cases:
+            with self.assertRaisesMessage(InvalidDeed, error):
+                check_pdf(io.BytesIO(content), len(content))
+
+    def test_linearized_page_count_and_encryption(self):
+        content = DEED.replace(b'1 0 obj\n', b'1 0 obj\n<< /Linearized 1 /L 900 /N 4 >>\n').replace(
+            b'/Size 2', b'/Size 2 /Encrypt 5 0 R')
+        metadata = check_pdf(io.BytesIO(content), len(content))
+        self.assertEqual((metadata['page_count'], metadata['encrypted']), (4, True))
+
+    def test_inspection_reads_compressed_object_streams(self):
+        with tempfile.NamedTemporaryFile() as file:
+            file.write(COMPRESSED)
+            file.flush()
+            self.assertEqual(inspect_pdf(file.name), {'page_count': 3, 'producer': 'Scanner (v2)'})
+
+
+class DuplicateDeedTests(TransactionTestCase):
+    databases = {'default', 'core', 'ops'}
+
+    def setUp(self):
+        self.media_root = tempfile.mkdtemp()
+        self.settings_override = override_settings(MEDIA_ROOT=self.media_root)
+        self.settings_override.enable()
+
+    def tearDown(self):
+        self.settings_override.disable()
+        shutil.rmtree(self.media_root)
+
+    def unverified(self):
+        rep = create_user('rep@example.com', 'land_commission_rep', id_value='rep')
+        return self.client.get('/api/property/unverified/', **bearer(rep))
+
+    def create_listing(self, email):
+        owner = create_user(email, id_value=email)
+        property = create_property('Deed Property')
+        user_property = create_ownership(owner, property, is_verified=False)
+        return owner, property, user_property
+
+    def upload(self, owner, property, content):
+        response = self.client.post('/api/property/upload-document/', {
+            'user_id': owner.id,
+            'property_id': property.id,
+            'attachment': SimpleUploadedFile('deed.pdf', content, content_type='application/pdf'),
+        })
+        self.assertEqual(response.status_code, 201)
+
+    def test_review_queue_is_for_reviewers(self):
+        owner, property, _ = self.create_listing('owner@example.com')
+        self.upload(owner, property, DEED)
+
+        self.assertEqual(self.client.get('/api/property/unverified/').status_code, 401)
+        response = self.client.get('/api/property/unverified/', **bearer(owner))
+        self.assertEqual(response.status_code, 403)
+        self.assertEqual(len(self.unverified().json()), 1)
+
+    def test_reused_deeds_are_flagged(self):
+        first = self.create_listing('first@example.com')
+        second = self.create_listing('second@example.com')
+        honest = self.create_listing('honest@example.com')
+        self.upload(*first[:2], DEED)
+        self.upload(*second[:2], RESAVED)
+        self.upload(*honest[:2], DEED.replace(b'Deed of Assignment', b'Deed of Gift'))
+
+        documents = PropertyDocument.objects.using('core').order_by('id')
+        self.assertNotEqual(documents[0].sha256, documents[1].sha256)
+        self.assertEqual(documents[0].fingerprint, documents[1].fingerprint)
+
+        response = self.unverified()
+        rows = {row['user_property_id']: row for row in response.json()}
+        self.assertEqual(rows[first[2].id]['duplicate_user_property_ids'], [second[2].id])
+        self.assertEqual(rows[second[2].id]['duplicate_user_property_ids'], [first[2].id])
+        self.assertTrue(rows[first[2].id]['duplicate_deed'])
+        self.assertFalse(rows[honest[2].id]['duplicate_deed'])
+
+    def test_upload_is_checked_and_inspected(self):
+        owner, property, _ = self.create_listing('owner@example.com')
+        response = self.client.post('/api/property/upload-document/', {
+            'user_id': owner.id,
+            'property_id': property.id,
+            'attachment': SimpleUploadedFile('deed.pdf', b'MZ renamed program', content_type='application/pdf'),
+        })
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(response.json()['error'], 'File is not a PDF document')
+
+        self.upload(owner, property, COMPRESSED)
+        document = PropertyDocument.objects.using('core').get()
+        job = Job.objects.using('core').get(task='inspect_deed')
+        self.assertEqual(job.payload, {'document_id': document.id})
+
+        inspect_deed(**job.payload)
+        metadata = self.unverified().json()[0]['document_metadata']
+        self.assertEqual(metadata['pdf_version'], '1.5')
+        self.assertEqual((metadata['page_count'], metadata['producer']), (3, 'Scanner (v2)'))
+        self.assertIsNotNone(metadata['inspected_at'])
@@ -0,0 +1,116 @@
+import json
+import shutil
+import tempfile
+
+from django.core.cache import cache
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.test import TransactionTestCase, override_settings
+
+from core.downloads import download_urls
+from core.models import DocumentAccessRequest, PropertyDocument
+from core.storage import shard_name
+from core.tests.factories import bearer, create_user, create_property, create_ownership
+
+DEED = b'%PDF-1.4 title deed'
+
+
+class SignedDownloadTests(TransactionTestCase):
+    databases = {'default', 'core', 'ops'}
+
+    def setUp(self):
+        cache.clear()
+        self.media_root = tempfile.mkdtemp()
+        self.settings_override = override_settings(MEDIA_ROOT=self.media_root)
+        self.settings_override.enable()
+        self.owner = create_user(id_value='owner')
+        self.seeker = create_user('seeker@example.com', 'property_seeker', id_value='seeker')
+        property = create_property('Deed Property')
+        user_property = create_ownership(self.owner, property)
+        self.deed_path = default_storage.save(shard_name('title_deeds/deed.pdf'), ContentFile(DEED))
+        PropertyDocument.objects.using('core').create(user_property=user_property, attachment=self.deed_path)
+        self.access_request = DocumentAccessRequest.objects.using('core').create(
+            user_property=user_property, requester=self.seeker, reason='Due diligence'
+        )
+
+    def tearDown(self):
+        self.settings_override.disable()
+        shutil.rmtree(self.media_root)
+
+    def approve(self):
+        response = self.client.post('/api/document/respond/', data=json.dumps({
+            'request_id': self.access_request.id,
+            'decision': 'approved'
+        }), content_type='application/json', **bearer(self.owner))
+        self.assertEqual(response.status_code, 200)
+        return response.json()['download_urls']
+
+    def test_approval_mints_a_working_link(self):
+        urls = self.approve()
+        self.assertEqual(len(urls), 1)
+
+        with self.assertNumQueries(0, using='core'), self.assertNumQueries(0, using='default'):
+            response = self.client.get(urls[0]['url'])
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(b''.join(response.streaming_content), DEED)
+        self.assertTrue(response['Cache-Control'].startswith('private'))
+
+        partial = self.client.get(urls[0]['url'], HTTP_RANGE='bytes=0-3')
+        self.assertEqual(b''.join(partial.streaming_content), b'%PDF')
+
+    def test_seeker_sees_links_of_approved_requests(self):
+        self.approve()
+        response = self.client.get('/api/document/requests/', **bearer(self.seeker))
+
+        links = response.json()[0]['download_urls']
+        self.assertEqual(self.client.get(links[0]['url']).status_code, 200)
+
+    def test_requests_belong_to_the_token_user(self):
+        self.approve()
+        response = self.client.get(f'/api/document/requests/?user_id={self.seeker.id}&role=property_seeker')
+        self.assertEqual(response.status_code, 401)
+
+        # The query string names the seeker, the token another seeker
+        other = create_user('other@example.com', 'property_seeker', id_value='other')
+        response = self.client.get(f'/api/document/requests/?user_id={self.seeker.id}&role=property_seeker',
+                                   **bearer(other))
+        self.assertEqual(response.json(), [])
+
+    def test_only_the_owner_can_approve(self):
+        response = self.client.post('/api/document/respond/', data=json.dumps({
+            'request_id': self.access_request.id,
+            'owner_id': self.owner.id,
+            'decision': 'approved'
+        }), content_type='application/json', **bearer(self.seeker))
+        self.assertEqual(response.status_code, 403)
+        self.assertNotIn('download_urls', response.json())
+
+    def test_tampered_and_expired_links_are_refused(self):
+        url = self.approve()[0]['url']
+        self.assertEqual(self.client.get(url[:-3] + 'xx/').status_code, 403)
+
+        with override_settings(DOCUMENT_DOWNLOAD_TTL=-1):
+            expired = download_urls([self.access_request.id])[self.access_request.id][0]['url']
+        response = self.client.get(expired)
+        self.assertEqual(response.status_code, 403)
+        self.assertEqual(response.json()['error'], 'Download link has expired')
+
+    def test_revocation_stops_outstanding_links(self):
+        url = self.approve()[0]['url']
+
+        response = self.client.post('/api/document/revoke/', data=json.dumps({
+            'request_id': self.access_request.id
+        }), content_type='application/json', **bearer(self.owner))
+        self.assertEqual(response.status_code, 200)
+
+        response = self.client.get(url)
+        self.assertEqual(response.status_code, 403)
+        self.assertEqual(response.json()['error'], 'Access to this document has been revoked')
+
+    def test_only_the_owner_can_revoke(self):
+        self.approve()
+        response = self.client.post('/api/document/revoke/', data=json.dumps({
+            'request_id': self.access_request.id,
+            'owner_id': self.owner.id
+        }), content_type='application/json', **bearer(self.seeker))
+        self.assertEqual(response.status_code, 404)
@@ -0,0 +1,62 @@
+import json
+
+from django.test import SimpleTestCase, TestCase
+
+from core.geo import covering_cells, encode_geohash, parse_coordinates, parse_geo_filters
+from core.models import Property
+from core.tests.factories import create_user
+
+
+class CoordinateParsingTests(SimpleTestCase):
+
+    def test_decimal_pair(self):
+        self.assertEqual(parse_coordinates('12 Oxford St, Osu, Accra. GPS: 5.5560, -0.1820'), (5.556, -0.182))
+
+    def test_hemispheres(self):
+        self.assertEqual(parse_coordinates('Adum, Kumasi (6.6885° N, 1.6244° W)'), (6.6885, -1.6244))
+
+    def test_street_numbers_are_not_coordinates(self):
+        self.assertIsNone(parse_coordinates('House 12, 45 Liberation Road, Accra'))
+        self.assertIsNone(parse_coordinates('Plot 5.5, Block 200.1'))
+
+    def test_geohash(self):
+        self.assertEqual(encode_geohash(57.64911, 10.40744), 'u4pruydqq')
+
+    def test_covering_cells_contain_the_centre(self):
+        cells = covering_cells(5.556, -0.182, 2)
+        self.assertIn(encode_geohash(5.556, -0.182)[:len(cells[0])], cells)
+        self.assertLessEqual(len(cells), 9)
+
+    def test_geo_filter_validation(self):
+        self.assertEqual(
+            parse_geo_filters({'lat': '5.5', 'lon': '-0.2', 'radius_km': '3'})['near'],
+            {'lat': 5.5, 'lon': -0.2, 'radius_km': 3.0}
+        )
+        with self.assertRaises(ValueError):
+            parse_geo_filters({'lat': '5.5'})
+        with self.assertRaises(ValueError):
+            parse_geo_filters({'lat': '95', 'lon': '0'})
+        with self.assertRaises(ValueError):
+            parse_geo_filters({'bbox': '1,2,3'})
+
+
+class PropertyCoordinatesTests(TestCase):
+    databases = {'default', 'core'}
+
+    def test_create_property_stores_coordinates(self):
+        """Coordinates in the location are stored when a property is created"""
+        owner = create_user('geo-owner@example.com')
+        response = self.client.post('/api/property/create/', data=json.dumps({
+            'title': 'Geo Property',
+            'property_type': '1_bedroom',
+            'description': 'A located property',
+            'location': 'Osu, Accra. GPS: 5.5560, -0.1820',
+            'owner_id': owner.id
+        }), content_type='application/json')
+
+        self.assertEqual(response.status_code, 201)
+        property = Property.objects.using('core').get(id=response['X-Resource-Id'])
+        self.assertEqual((property.latitude, property.longitude), (5.556, -0.182))
+        self.assertEqual(property.geohash, encode_geohash(5.556, -0.182))
+        property.delete()
+        owner.delete()
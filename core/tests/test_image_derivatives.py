@@ -0,0 +1,108 @@
+import io
+import shutil
+import tempfile
+
+from django.core.cache import caches
+from django.core.files.base import ContentFile
+from django.core.files.storage import FileSystemStorage
+from django.test import SimpleTestCase, TransactionTestCase, override_settings
+from PIL import Image
+from rest_framework_simplejwt.tokens import AccessToken
+
+from core.images import generate_derivatives
+from core.models import PropertyImage
+from core.tests.factories import create_user, create_listed_property
+from ops import listing_search
+
+
+def png_bytes(width, height):
+    buffer = io.BytesIO()
+    Image.new('RGB', (width, height), (200, 80, 40)).save(buffer, 'PNG')
+    return buffer.getvalue()
+
+
+@override_settings(IMAGE_DERIVATIVE_SIZES={'thumbnail': (32, 32), 'medium': (128, 128)})
+class GenerateDerivativesTests(SimpleTestCase):
+
+    def setUp(self):
+        self.location = tempfile.mkdtemp()
+        self.storage = FileSystemStorage(location=self.location)
+
+    def tearDown(self):
+        shutil.rmtree(self.location)
+
+    def test_renditions_fit_their_boxes(self):
+        name = self.storage.save('property_images/house.png', ContentFile(png_bytes(400, 200)))
+
+        paths = generate_derivatives(name, self.storage)
+
+        self.assertEqual(set(paths), {'thumbnail', 'medium'})
+        for size, box in [('thumbnail', (32, 16)), ('medium', (128, 64))]:
+            self.assertRegex(paths[size], rf'^property_images/derivatives/{size}/[0-9a-f]{{2}}/[0-9a-f]{{2}}/house\.')
+            with self.storage.open(paths[size]) as rendition:
+                self.assertEqual(Image.open(rendition).size, box)
+
+    def test_small_images_are_not_upscaled(self):
+        name = self.storage.save('property_images/tiny.png', ContentFile(png_bytes(20, 10)))
+
+        paths = generate_derivatives(name, self.storage)
+
+        with self.storage.open(paths['medium']) as rendition:
+            self.assertEqual(Image.open(rendition).size, (20, 10))
+
+
+class ImageSizeParameterTests(TransactionTestCase):
+    databases = {'default', 'core', 'ops'}
+
+    def setUp(self):
+        caches['browse'].clear()
+        caches['auth'].clear()
+        owner = create_user()
+        token = AccessToken()
+        token['user_id'] = owner.id
+        self.auth = {'HTTP_AUTHORIZATION': f'Bearer {token}'}
+        self.property, _, _ = create_listed_property(owner, 'Sized Property')
+        self.processed = PropertyImage.objects.using('core').create(
+            property=self.property,
+            image='property_images/processed.png',
+            thumbnail='property_images/derivatives/thumbnail/processed.webp',
+            medium='property_images/derivatives/medium/processed.webp'
+        )
+        self.pending = PropertyImage.objects.using('core').create(
+            property=self.property, image='property_images/pending.png'
+        )
+        listing_search.refresh_listing_search(property_ids=[self.property.id])
+
+    def image_paths(self, url):
+        response = self.client.get(url, **self.auth)
+        self.assertEqual(response.status_code, 200)
+        body = response.json()
+        if 'images' in body:
+            return sorted(body['images'])
+        return sorted(image['image'] for image in body['properties'][0]['images'])
+
+    def test_thumbnail_falls_back_to_original(self):
+        """Images without derivatives yet are served at their original size"""
+        expected = ['property_images/derivatives/thumbnail/processed.webp', 'property_images/pending.png']
+        self.assertEqual(self.image_paths('/api/properties/?size=thumbnail'), expected)
+        self.assertEqual(self.image_paths(f'/api/property/{self.property.id}/?size=thumbnail'), expected)
+        with override_settings(LISTING_SEARCH_READ_MODEL=True):
+            self.assertEqual(self.image_paths('/api/properties/?size=thumbnail&page=1'), expected)
+
+    def test_original_is_the_default(self):
+        expected = ['property_images/pending.png', 'property_images/processed.png']
+        self.assertEqual(self.image_paths('/api/properties/'), expected)
+        self.assertEqual(self.image_paths(f'/api/property/{self.property.id}/'), expected)
+
+    def test_detail_etag_varies_by_size(self):
+        url = f'/api/property/{self.property.id}/'
+        etag = self.client.get(url, **self.auth)['ETag']
+
+        response = self.client.get(f'{url}?size=medium', HTTP_IF_NONE_MATCH=etag, **self.auth)
+        self.assertEqual(response.status_code, 200)
+        self.assertIn('property_images/derivatives/medium/processed.webp', response.json()['images'])
+
+    def test_invalid_size_rejected(self):
+        for url in ['/api/properties/', '/api/listings/', f'/api/property/{self.property.id}/']:
+            response = self.client.get(f'{url}?size=huge', **self.auth)
+            self.assertEqual(response.status_code, 400)
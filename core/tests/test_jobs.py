@@ -0,0 +1,162 @@
+import io
+import shutil
+import tempfile
+from concurrent.futures import ThreadPoolExecutor
+from datetime import timedelta
+
+from django.core.management import call_command
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.test import TransactionTestCase, override_settings
+from django.utils import timezone
+from PIL import Image
+
+from core import jobs
+from core.models import Job, PropertyImage
+from core.tests.factories import bearer, create_user, create_property, create_ownership
+
+calls = []
+
+
+@jobs.task('test_echo')
+def echo(value):
+    calls.append(value)
+    return {'echo': value}
+
+
+@jobs.task('test_flaky')
+def flaky():
+    calls.append('flaky')
+    raise ValueError('storage unavailable')
+
+
+class JobQueueTests(TransactionTestCase):
+    databases = {'default', 'core'}
+
+    def setUp(self):
+        calls.clear()
+        self.executor = ThreadPoolExecutor(max_workers=2)
+
+    def tearDown(self):
+        self.executor.shutdown()
+
+    def test_idempotency_key_returns_existing_job(self):
+        first = jobs.enqueue('test_echo', {'value': 1}, idempotency_key='echo:1')
+        second = jobs.enqueue('test_echo', {'value': 2}, idempotency_key='echo:1')
+
+        self.assertEqual(first, second)
+        self.assertEqual(Job.objects.using('core').count(), 1)
+        self.assertNotEqual(jobs.enqueue('test_echo', {'value': 3}), first)
+
+    def test_unknown_task_rejected(self):
+        with self.assertRaises(jobs.UnknownTask):
+            jobs.enqueue('no_such_task')
+
+    def test_successful_job_records_result(self):
+        job_id = jobs.enqueue('test_echo', {'value': 'hello'})
+
+        self.assertEqual(jobs.run_pending('test-worker', self.executor, 10), {'succeeded': 1})
+
+        job = jobs.get_job(job_id)
+        self.assertEqual(job['status'], 'succeeded')
+        self.assertEqual(job['attempts'], 1)
+        self.assertEqual(job['result'], {'echo': 'hello'})
+        self.assertIsNotNone(job['finished_at'])
+        # Nothing left to claim
+        self.assertEqual(jobs.run_pending('test-worker', self.executor, 10), {})
+        self.assertEqual(calls, ['hello'])
+
+    @override_settings(JOB_RETRY_BASE_DELAY=60)
+    def test_failures_back_off_then_fail(self):
+        job_id = jobs.enqueue('test_flaky', max_attempts=2)
+
+        with self.assertLogs('core.jobs', 'ERROR'):
+            self.assertEqual(jobs.run_pending('test-worker', self.executor, 10), {'pending': 1})
+        job = jobs.get_job(job_id)
+        self.assertEqual(job['attempts'], 1)
+        self.assertEqual(job['last_error'], 'ValueError: storage unavailable')
+        self.assertGreater(job['run_after'], timezone.now() + timedelta(seconds=30))
+        # Not due again until the backoff has passed
+        self.assertEqual(jobs.run_pending('test-worker', self.executor, 10), {})
+
+        Job.objects.using('core').filter(id=job_id).update(run_after=timezone.now())
+        with self.assertLogs('core.jobs', 'ERROR'):
+            self.assertEqual(jobs.run_pending('test-worker', self.executor, 10), {'failed': 1})
+        self.assertEqual(jobs.get_job(job_id)['status'], 'failed')
+        self.assertEqual(calls, ['flaky', 'flaky'])
+
+    @override_settings(JOB_LOCK_TIMEOUT=60)
+    def test_abandoned_job_is_reclaimed(self):
+        """A job still marked running after the lock timeout belongs to a dead worker"""
+        job_id = jobs.enqueue('test_echo', {'value': 'again'})
+        jobs.claim('dead-worker', 10)
+        self.assertEqual(jobs.claim('test-worker', 10), [])
+
+        Job.objects.using('core').filter(id=job_id).update(locked_at=timezone.now() - timedelta(minutes=5))
+        self.assertEqual(jobs.run_pending('test-worker', self.executor, 10), {'succeeded': 1})
+        self.assertEqual(jobs.get_job(job_id)['attempts'], 2)
+
+    @override_settings(JOB_LOCK_TIMEOUT=60)
+    def test_job_that_keeps_killing_workers_fails(self):
+        job_id = jobs.enqueue('test_echo', {'value': 'oom'}, max_attempts=1)
+        jobs.claim('dead-worker', 10)
+
+        Job.objects.using('core').filter(id=job_id).update(locked_at=timezone.now() - timedelta(minutes=5))
+        self.assertEqual(jobs.run_pending('test-worker', self.executor, 10), {})
+        job = jobs.get_job(job_id)
+        self.assertEqual((job['status'], job['attempts']), ('failed', 1))
+        self.assertEqual(calls, [])
+
+    @override_settings(JOB_LOCK_TIMEOUT=60)
+    def test_slow_worker_cannot_overwrite_reclaimed_job(self):
+        job_id = jobs.enqueue('test_echo', {'value': 'slow'})
+        [slow_job] = jobs.claim('slow-worker', 10)
+        Job.objects.using('core').filter(id=job_id).update(locked_at=timezone.now() - timedelta(minutes=5))
+        jobs.claim('test-worker', 10)
+
+        with self.assertLogs('core.jobs', 'WARNING'):
+            self.assertEqual(jobs.run_job(slow_job, 'slow-worker'), 'lost')
+        job = Job.objects.using('core').get(id=job_id)
+        self.assertEqual((job.status, job.locked_by), ('running', 'test-worker'))
+
+
+class ImageProcessingJobTests(TransactionTestCase):
+    databases = {'default', 'core', 'ops'}
+
+    def setUp(self):
+        self.media_root = tempfile.mkdtemp()
+        self.settings_override = override_settings(MEDIA_ROOT=self.media_root)
+        self.settings_override.enable()
+        self.owner = create_user()
+        self.property = create_property('Job Property')
+        create_ownership(self.owner, self.property)
+
+    def tearDown(self):
+        self.settings_override.disable()
+        shutil.rmtree(self.media_root)
+
+    def test_upload_enqueues_derivatives(self):
+        """The upload returns before derivatives exist; the worker creates them"""
+        buffer = io.BytesIO()
+        Image.new('RGB', (64, 48)).save(buffer, 'PNG')
+        response = self.client.post('/api/property/upload-image/', {
+            'property_id': self.property.id,
+            'user_id': self.owner.id,
+            'image': SimpleUploadedFile('house.png', buffer.getvalue(), content_type='image/png'),
+        })
+        self.assertEqual(response.status_code, 200)
+        job_id = response.json()['job_id']
+
+        image = PropertyImage.objects.using('core').get(property=self.property)
+        self.assertFalse(image.thumbnail)
+        self.assertEqual(self.client.get(f'/api/jobs/{job_id}/').status_code, 401)
+        self.assertEqual(self.client.get(f'/api/jobs/{job_id}/', **bearer(self.owner)).json()['status'], 'pending')
+
+        call_command('run_jobs', once=True, threads=1, stdout=io.StringIO())
+
+        image.refresh_from_db()
+        self.assertTrue(image.thumbnail.name.startswith('property_images/derivatives/thumbnail/'))
+        self.assertTrue(image.medium)
+        self.assertEqual(self.client.get(f'/api/jobs/{job_id}/', **bearer(self.owner)).json()['status'], 'succeeded')
+
+    def test_unknown_job_is_404(self):
+        self.assertEqual(self.client.get('/api/jobs/999999/', **bearer(self.owner)).status_code, 404)
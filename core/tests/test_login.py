@@ -0,0 +1,95 @@
+import json
+
+from django.db import connections
+from django.test import TransactionTestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+
+from core import hashing, logins, throttle
+from core.models import User
+
+REGISTRATION = {
+    'firstname': 'Ama',
+    'lastname': 'Mensah',
+    'email': 'ama@example.com',
+    'phone_number': '+233555555555',
+    'password': 'correct horse',
+    'role': 'property_seeker',
+    'id_type': 'Ghana Card',
+    'id_value': 'GHA-123456789-0',
+}
+
+
+class AsyncLoginTests(TransactionTestCase):
+    databases = {'default', 'core', 'ops'}
+
+    def setUp(self):
+        throttle.reset()
+        hashing.reset()
+
+    def tearDown(self):
+        logins.flush()
+        hashing.reset()
+
+    def post(self, url, data):
+        return self.client.post(url, data=json.dumps(data), content_type='application/json')
+
+    def login(self, password='correct horse'):
+        return self.post('/api/user/login/', {'email': REGISTRATION['email'], 'password': password})
+
+    def test_register_then_login(self):
+        response = self.post('/api/user/register/', REGISTRATION)
+        self.assertEqual(response.status_code, 201)
+        user = User.objects.using('core').get(id=response['X-User-Id'])
+        self.assertTrue(user.password_hash.startswith('pbkdf2_sha256$'))
+
+        self.assertEqual(self.login().status_code, 403)
+        user.is_verified = True
+        user.save()
+        self.assertEqual(self.login('wrong password').status_code, 401)
+        response = self.login()
+        self.assertEqual(response.status_code, 200)
+        self.assertIn('token', response.json())
+
+    @override_settings(PASSWORD_HASHING_WORKERS=1, PASSWORD_HASHING_QUEUE=0)
+    def test_saturated_pool_answers_503(self):
+        hashing.reset()
+        self.assertEqual(self.post('/api/user/register/', REGISTRATION).status_code, 201)
+
+        _, slots = hashing._pool()
+        slots.acquire()  # A hash in progress takes the only slot
+        try:
+            response = self.login()
+        finally:
+            slots.release()
+        self.assertEqual(response.status_code, 503)
+        self.assertEqual(response['Retry-After'], '1')
+        self.assertEqual(self.login().status_code, 403)
+
+    @override_settings(LAST_LOGIN_FLUSH_INTERVAL=3600)
+    def test_last_login_is_written_in_batches(self):
+        logins.flush()
+        user_id = self.post('/api/user/register/', REGISTRATION)['X-User-Id']
+        User.objects.using('core').filter(id=user_id).update(is_verified=True)
+
+        with CaptureQueriesContext(connections['core']) as queries:
+            for _ in range(3):
+                self.assertEqual(self.login().status_code, 200)
+        self.assertFalse([query for query in queries.captured_queries if query['sql'].startswith('UPDATE')])
+        self.assertIsNone(User.objects.using('core').get(id=user_id).last_login)
+
+        with self.assertNumQueries(1, using='core'):
+            self.assertEqual(logins.flush(), 1)
+        self.assertIsNotNone(User.objects.using('core').get(id=user_id).last_login)
+
+    @override_settings(LAST_LOGIN_FLUSH_INTERVAL=3600)
+    def test_legacy_hash_upgrade_writes_only_the_hash(self):
+        user_id = self.post('/api/user/register/', REGISTRATION)['X-User-Id']
+        # Stored in plain text, as by accounts created before hashing
+        User.objects.using('core').filter(id=user_id).update(password_hash='correct horse', is_verified=True)
+
+        with CaptureQueriesContext(connections['core']) as queries:
+            self.assertEqual(self.login().status_code, 200)
+        updates = [query['sql'] for query in queries.captured_queries if query['sql'].startswith('UPDATE')]
+        self.assertEqual(len(updates), 1)
+        self.assertIn('SET "password_hash"', updates[0])
+        self.assertNotIn('"firstname"', updates[0])
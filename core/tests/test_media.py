@@ -0,0 +1,186 @@
+import shutil
+import tempfile
+from datetime import timedelta
+from io import StringIO
+from unittest import mock
+
+from django.core.files.base import ContentFile
+from django.core.files.storage import FileSystemStorage, default_storage
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import call_command
+from django.db import connections
+from django.test import SimpleTestCase, TransactionTestCase, override_settings
+
+from core.media import collect_garbage, save_deduplicated
+from core.models import MediaBlob, PropertyImage
+from core.storage import shard_name
+from core.tests.factories import create_user, create_property, create_ownership
+from core.uploads import UploadTooLarge
+
+
+class SaveDeduplicatedTests(SimpleTestCase):
+
+    def setUp(self):
+        self.location = tempfile.mkdtemp()
+        self.storage = FileSystemStorage(location=self.location)
+
+    def tearDown(self):
+        shutil.rmtree(self.location)
+
+    def test_identical_content_is_stored_once(self):
+        first = save_deduplicated(SimpleUploadedFile('a.PNG', b'same bytes'), 'property_images', storage=self.storage)
+        second = save_deduplicated(SimpleUploadedFile('b.png', b'same bytes'), 'property_images', storage=self.storage)
+
+        checksum = first[1]
+        self.assertEqual(first[0], f'property_images/{checksum[:2]}/{checksum[2:4]}/{checksum}.png')
+        self.assertEqual(first[:3], second[:3])
+        self.assertEqual((first[3], second[3]), (True, False))
+        self.assertEqual(self.storage.listdir(f'property_images/{checksum[:2]}/{checksum[2:4]}')[1], [f'{checksum}.png'])
+
+    def test_oversize_leaves_nothing_behind(self):
+        with self.assertRaises(UploadTooLarge):
+            save_deduplicated(SimpleUploadedFile('big.pdf', b'x' * 5000), 'title_deeds',
+                              max_size=4096, storage=self.storage)
+        self.assertEqual(self.storage.listdir('title_deeds/incoming'), ([], []))
+
+    def test_upload_is_read_once(self):
+        upload = SimpleUploadedFile('a.png', b'some bytes')
+        with mock.patch.object(upload, 'chunks', wraps=upload.chunks) as chunks:
+            save_deduplicated(upload, 'property_images', storage=self.storage)
+        self.assertEqual(chunks.call_count, 1)
+
+
+class MediaReferenceTests(TransactionTestCase):
+    databases = {'default', 'core', 'ops'}
+
+    def setUp(self):
+        self.media_root = tempfile.mkdtemp()
+        self.settings_override = override_settings(MEDIA_ROOT=self.media_root)
+        self.settings_override.enable()
+        self.owner = create_user()
+        self.property = create_property('Media Property')
+        create_ownership(self.owner, self.property)
+
+    def tearDown(self):
+        self.settings_override.disable()
+        shutil.rmtree(self.media_root)
+
+    def upload(self, content=b'image bytes'):
+        response = self.client.post('/api/property/upload-image/', {
+            'property_id': self.property.id,
+            'user_id': self.owner.id,
+            'image': SimpleUploadedFile('house.png', content, content_type='image/png'),
+        })
+        self.assertEqual(response.status_code, 200)
+        return response.json()['sha256']
+
+    def test_reuploads_share_one_file(self):
+        checksum = self.upload()
+        self.upload()
+
+        images = PropertyImage.objects.using('core').filter(property=self.property)
+        name = shard_name(f'property_images/{checksum}.png')
+        self.assertEqual({image.image.name for image in images}, {name})
+        self.assertEqual(MediaBlob.objects.using('core').get(sha256=checksum).ref_count, 2)
+        self.assertEqual(default_storage.listdir(name.rsplit('/', 1)[0])[1], [f'{checksum}.png'])
+
+    def test_file_is_collected_after_its_last_reference(self):
+        checksum = self.upload()
+        self.upload()
+        name = shard_name(f'property_images/{checksum}.png')
+        first, second = PropertyImage.objects.using('core').filter(property=self.property)
+
+        first.delete()
+        self.assertEqual(collect_garbage(grace=timedelta(0))['blobs'], 0)
+        self.assertTrue(default_storage.exists(name))
+
+        second.delete()
+        self.assertEqual(collect_garbage(grace=timedelta(0), dry_run=True)['blobs'], 1)
+        self.assertTrue(default_storage.exists(name))
+        self.assertEqual(collect_garbage(grace=timedelta(0))['blobs'], 1)
+        self.assertFalse(default_storage.exists(name))
+        self.assertFalse(MediaBlob.objects.using('core').exists())
+
+    def test_collection_repairs_drifted_counts(self):
+        """A raw DELETE skips the signal; the recount still frees the file"""
+        checksum = self.upload()
+        with connections['core'].cursor() as cursor:
+            cursor.execute("DELETE FROM core_propertyimage WHERE sha256 = %s", [checksum])
+
+        stats = collect_garbage(grace=timedelta(0))
+        self.assertEqual((stats['recounted'], stats['blobs']), (1, 1))
+        self.assertFalse(default_storage.exists(shard_name(f'property_images/{checksum}.png')))
+
+    def test_recent_orphans_are_kept(self):
+        checksum = self.upload()
+        PropertyImage.objects.using('core').filter(property=self.property).delete()
+
+        self.assertEqual(collect_garbage()['blobs'], 0)
+        self.assertTrue(default_storage.exists(shard_name(f'property_images/{checksum}.png')))
+
+    def test_scan_removes_unreferenced_legacy_files(self):
+        default_storage.save('property_images/property_1_old.png', ContentFile(b'old'))
+        default_storage.save('property_images/property_1_kept.png', ContentFile(b'kept'))
+        PropertyImage.objects.using('core').create(property=self.property, image='property_images/property_1_kept.png')
+
+        stats = collect_garbage(grace=timedelta(0), scan_files=True)
+
+        self.assertEqual(stats['files'], 1)
+        self.assertEqual(default_storage.listdir('property_images')[1], ['property_1_kept.png'])
+
+    def test_scan_finds_orphans_in_shards(self):
+        """A crash between the file write and the row insert leaves a file in its shard"""
+        orphan = shard_name(f'property_images/{"ab" * 32}.png')
+        staged = 'title_deeds/incoming/0123456789abcdef.pdf'
+        default_storage.save(orphan, ContentFile(b'orphan'))
+        default_storage.save(staged, ContentFile(b'staged'))
+
+        stats = collect_garbage(grace=timedelta(0), scan_files=True)
+
+        self.assertEqual(stats['files'], 2)
+        self.assertFalse(default_storage.exists(orphan))
+        self.assertFalse(default_storage.exists(staged))
+
+
+class ShardedLayoutTests(TransactionTestCase):
+    databases = {'default', 'core', 'ops'}
+
+    def setUp(self):
+        self.media_root = tempfile.mkdtemp()
+        self.settings_override = override_settings(MEDIA_ROOT=self.media_root)
+        self.settings_override.enable()
+        self.property = create_property('Legacy Property')
+
+    def tearDown(self):
+        self.settings_override.disable()
+        shutil.rmtree(self.media_root)
+
+    def test_shard_name(self):
+        checksum = 'ab12' + '0' * 60
+        self.assertEqual(shard_name(f'title_deeds/{checksum}.pdf'), f'title_deeds/ab/12/{checksum}.pdf')
+        legacy = shard_name('property_images/property_2_test_image.png')
+        self.assertRegex(legacy, r'^property_images/[0-9a-f]{2}/[0-9a-f]{2}/property_2_test_image\.png$')
+        self.assertEqual(shard_name(legacy), legacy)
+
+    def test_command_moves_files_and_rewrites_paths(self):
+        old_name = default_storage.save('property_images/property_1_test_image.png', ContentFile(b'legacy'))
+        first = PropertyImage.objects.using('core').create(property=self.property, image=old_name)
+        second = PropertyImage.objects.using('core').create(property=self.property, image=old_name)
+        PropertyImage.objects.using('core').create(property=self.property, image='property_images/missing.png')
+
+        output = StringIO()
+        call_command('shard_media', batch_size=1, stdout=output)
+
+        new_name = shard_name(old_name)
+        for image in (first, second):
+            image.refresh_from_db()
+            self.assertEqual(image.image.name, new_name)
+        self.assertFalse(default_storage.exists(old_name))
+        with default_storage.open(new_name) as moved:
+            self.assertEqual(moved.read(), b'legacy')
+        self.assertIn('Moved 1 files, rewrote 2 rows (1 paths had no file', output.getvalue())
+
+        # Nothing left to do on a second run
+        output = StringIO()
+        call_command('shard_media', stdout=output)
+        self.assertIn('Moved 0 files, rewrote 0 rows', output.getvalue())
@@ -0,0 +1,85 @@
+import json
+import time
+from unittest import mock
+
+from django.conf import settings
+from django.core.cache import caches
+from django.test import TransactionTestCase
+from rest_framework_simplejwt.tokens import AccessToken
+
+from core.tests.factories import bearer, create_user, create_listed_property
+
+
+class PropertyDetailCacheTests(TransactionTestCase):
+    databases = {'default', 'core', 'ops'}
+
+    def setUp(self):
+        caches['browse'].clear()
+        caches['auth'].clear()
+        self.owner = create_user()
+        token = AccessToken()
+        token['user_id'] = self.owner.id
+        self.auth = {'HTTP_AUTHORIZATION': f'Bearer {token}'}
+        self.property, self.user_property, self.listing = create_listed_property(self.owner, 'Detail Property')
+        self.url = f'/api/property/{self.property.id}/'
+
+    def test_conditional_request_skips_the_database(self):
+        """A matching If-None-Match gets a 304 without any query"""
+        response = self.client.get(self.url, **self.auth)
+        self.assertEqual(response.status_code, 200)
+        etag = response['ETag']
+
+        with self.assertNumQueries(0, using='core'), self.assertNumQueries(0, using='ops'):
+            response = self.client.get(self.url, HTTP_IF_NONE_MATCH=etag, **self.auth)
+            cached = self.client.get(self.url, **self.auth)
+        self.assertEqual(response.status_code, 304)
+        self.assertEqual(response['ETag'], etag)
+        self.assertEqual(cached.status_code, 200)
+        self.assertEqual(cached['ETag'], etag)
+
+    def test_listing_update_changes_the_etag(self):
+        """A price change invalidates the cached document and its ETag"""
+        etag = self.client.get(self.url, **self.auth)['ETag']
+
+        self.client.patch(
+            f'/api/listing/{self.listing.id}/',
+            data=json.dumps({'price': 1500}),
+            content_type='application/json'
+        )
+
+        response = self.client.get(self.url, HTTP_IF_NONE_MATCH=etag, **self.auth)
+        self.assertEqual(response.status_code, 200)
+        self.assertNotEqual(response['ETag'], etag)
+        self.assertEqual(float(response.json()['price']), 1500.0)
+
+    def test_rejection_removes_the_property(self):
+        """Rejecting the ownership record makes the detail 404"""
+        etag = self.client.get(self.url, **self.auth)['ETag']
+
+        rep = create_user('rep@example.com', 'land_commission_rep', id_value='rep')
+        response = self.client.patch(
+            '/api/property/reject/',
+            data=json.dumps({'user_property_id': self.user_property.id}),
+            content_type='application/json',
+            **bearer(rep)
+        )
+        self.assertEqual(response.status_code, 200)
+
+        response = self.client.get(self.url, HTTP_IF_NONE_MATCH=etag, **self.auth)
+        self.assertEqual(response.status_code, 404)
+
+    def test_versions_expire_with_the_documents(self):
+        """A worker that missed an invalidation stops answering 304 once the detail timeout passes"""
+        etag = self.client.get(self.url, **self.auth)['ETag']
+
+        later = time.time() + settings.PROPERTY_DETAIL_CACHE_TIMEOUT + 1
+        with mock.patch('django.core.cache.backends.locmem.time.time', return_value=later):
+            response = self.client.get(self.url, HTTP_IF_NONE_MATCH=etag, **self.auth)
+        self.assertEqual(response.status_code, 200)
+        self.assertNotEqual(response['ETag'], etag)
+
+    def test_authentication_is_still_required(self):
+        """Cached documents are not served to unauthenticated requests"""
+        self.client.get(self.url, **self.auth)
+        response = self.client.get(self.url)
+        self.assertEqual(response.status_code, 401)
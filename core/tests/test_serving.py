@@ -0,0 +1,92 @@
+import shutil
+import tempfile
+
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.test import SimpleTestCase, override_settings
+
+from core.storage import shard_name
+
+CONTENT = bytes(range(256)) * 40
+CHECKSUM = 'ab12' + '0' * 60
+
+
+class ServeMediaTests(SimpleTestCase):
+
+    def setUp(self):
+        self.media_root = tempfile.mkdtemp()
+        self.settings_override = override_settings(MEDIA_ROOT=self.media_root, MEDIA_SERVE_MODE=None)
+        self.settings_override.enable()
+        self.pdf = default_storage.save(shard_name(f'property_images/{CHECKSUM}.pdf'), ContentFile(CONTENT))
+        self.legacy = default_storage.save('property_images/property_1_test_image.png', ContentFile(b'png'))
+
+    def tearDown(self):
+        self.settings_override.disable()
+        shutil.rmtree(self.media_root)
+
+    def test_full_response_and_cache_headers(self):
+        response = self.client.get(f'/media/{self.pdf}')
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(b''.join(response.streaming_content), CONTENT)
+        self.assertEqual(response['Content-Type'], 'application/pdf')
+        self.assertEqual(response['ETag'], f'"{CHECKSUM}"')
+        self.assertEqual(response['Accept-Ranges'], 'bytes')
+        self.assertEqual(response['Cache-Control'], 'public, max-age=31536000, immutable')
+
+        legacy = self.client.get(f'/media/{self.legacy}')
+        self.assertEqual(legacy['Cache-Control'], 'public, max-age=3600')
+
+    def test_conditional_requests_get_304(self):
+        first = self.client.get(f'/media/{self.legacy}')
+
+        by_etag = self.client.get(f'/media/{self.legacy}', HTTP_IF_NONE_MATCH=first['ETag'])
+        by_date = self.client.get(f'/media/{self.legacy}', HTTP_IF_MODIFIED_SINCE=first['Last-Modified'])
+        self.assertEqual((by_etag.status_code, by_date.status_code), (304, 304))
+        self.assertEqual(by_etag['ETag'], first['ETag'])
+
+    def test_byte_ranges(self):
+        url = f'/media/{self.pdf}'
+
+        response = self.client.get(url, HTTP_RANGE='bytes=100-199')
+        self.assertEqual(response.status_code, 206)
+        self.assertEqual(response['Content-Range'], f'bytes 100-199/{len(CONTENT)}')
+        self.assertEqual(response['Content-Length'], '100')
+        self.assertEqual(b''.join(response.streaming_content), CONTENT[100:200])
+
+        suffix = self.client.get(url, HTTP_RANGE='bytes=-10')
+        self.assertEqual(b''.join(suffix.streaming_content), CONTENT[-10:])
+        open_ended = self.client.get(url, HTTP_RANGE=f'bytes={len(CONTENT) - 5}-')
+        self.assertEqual(b''.join(open_ended.streaming_content), CONTENT[-5:])
+
+        unsatisfiable = self.client.get(url, HTTP_RANGE=f'bytes={len(CONTENT)}-')
+        self.assertEqual(unsatisfiable.status_code, 416)
+        self.assertEqual(unsatisfiable['Content-Range'], f'bytes */{len(CONTENT)}')
+
+        stale = self.client.get(url, HTTP_RANGE='bytes=0-9', HTTP_IF_RANGE='"another-version"')
+        self.assertEqual(stale.status_code, 200)
+
+    def test_missing_and_escaping_paths_are_404(self):
+        self.assertEqual(self.client.get('/media/property_images/nope.png').status_code, 404)
+        self.assertEqual(self.client.get('/media/../manage.py').status_code, 404)
+        self.assertEqual(self.client.get('/media/property_images').status_code, 404)
+
+    def test_title_deeds_are_not_public(self):
+        deed = default_storage.save(shard_name(f'title_deeds/{CHECKSUM}.pdf'), ContentFile(CONTENT))
+        self.assertEqual(self.client.get(f'/media/{deed}').status_code, 404)
+        self.assertEqual(self.client.get(f'/media/property_images/../{deed}').status_code, 404)
+
+    @override_settings(MEDIA_SERVE_MODE='x-accel-redirect')
+    def test_accel_redirect_offload(self):
+        response = self.client.get(f'/media/{self.pdf}')
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response['X-Accel-Redirect'], f'/protected-media/{self.pdf}')
+        self.assertEqual(response.content, b'')
+
+    @override_settings(MEDIA_SERVE_MODE='x-sendfile')
+    def test_sendfile_offload(self):
+        response = self.client.get(f'/media/{self.legacy}')
+
+        self.assertEqual(response['X-Sendfile'], default_storage.path(self.legacy))
+        self.assertEqual(response['Content-Type'], 'image/png')
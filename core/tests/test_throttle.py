@@ -0,0 +1,110 @@
+import json
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from unittest import mock
+
+from django.core.cache import caches
+from django.test import SimpleTestCase, TransactionTestCase, override_settings
+
+from core import throttle
+from core.tests.factories import bearer, create_user
+
+NOW = 1_000_000 * 300.0
+
+
+@override_settings(LOGIN_THROTTLE_WINDOW=300, LOGIN_THROTTLE_EMAIL_LIMIT=3, LOGIN_THROTTLE_IP_LIMIT=5)
+class SlidingWindowTests(SimpleTestCase):
+
+    def setUp(self):
+        throttle.reset()
+        caches['default'].clear()
+
+    def attempts(self, email, ip, count, at=NOW):
+        with mock.patch('core.throttle.time.time', return_value=at):
+            return [throttle.check(email, ip) for _ in range(count)]
+
+    def test_email_limit(self):
+        self.assertEqual(self.attempts('a@example.com', '10.0.0.1', 3), [None] * 3)
+        self.assertEqual(self.attempts('A@example.com ', '10.0.0.2', 1), [300])
+        self.assertEqual(self.attempts('b@example.com', '10.0.0.1', 1), [None])
+
+        metrics = throttle.stats()
+        self.assertEqual((metrics['allowed'], metrics['rejected_email']), (4, 1))
+
+    def test_address_limit_across_emails(self):
+        results = [self.attempts(f'user{i}@example.com', '10.0.0.1', 1)[0] for i in range(6)]
+        self.assertEqual(results, [None] * 5 + [300])
+        self.assertEqual(throttle.stats()['rejected_ip'], 1)
+
+    def test_window_slides(self):
+        self.attempts('a@example.com', '10.0.0.1', 3)
+        # Half way through the next window half of the old attempts still count
+        self.assertEqual(self.attempts('a@example.com', '10.0.0.1', 3, at=NOW + 450), [None, None, 150])
+        self.assertEqual(self.attempts('a@example.com', '10.0.0.1', 1, at=NOW + 900), [None])
+
+    @override_settings(LOGIN_THROTTLE_MAX_KEYS=4)
+    def test_local_counters_are_bounded(self):
+        throttle.reset()
+        for i in range(4):
+            self.attempts(f'user{i}@example.com', f'10.0.0.{i}', 1)
+        counters = throttle.stats()['counters']
+        self.assertEqual((counters['keys'], counters['evictions']), (4, 4))
+
+    @override_settings(LOGIN_THROTTLE_CACHE='default')
+    def test_shared_cache_backend(self):
+        throttle.reset()
+        self.assertEqual(self.attempts('a@example.com', '10.0.0.1', 4), [None] * 3 + [300])
+        throttle.reset()
+        # Another process sees the same counts
+        self.assertEqual(self.attempts('a@example.com', '10.0.0.2', 1), [300])
+        self.assertEqual(throttle.stats()['counters'], {'backend': 'cache', 'cache': 'default'})
+
+
+    def concurrent_attempts(self, count):
+        barrier = threading.Barrier(count)
+
+        def attempt(_):
+            barrier.wait()
+            return throttle.check('a@example.com', '10.0.0.1')
+
+        with mock.patch('core.throttle.time.time', return_value=NOW):
+            with ThreadPoolExecutor(max_workers=count) as executor:
+                return list(executor.map(attempt, range(count)))
+
+    def test_concurrent_attempts_respect_the_limit(self):
+        self.assertEqual(self.concurrent_attempts(8).count(None), 3)
+
+    @override_settings(LOGIN_THROTTLE_CACHE='default')
+    def test_concurrent_attempts_respect_the_limit_in_a_shared_cache(self):
+        throttle.reset()
+        self.assertEqual(self.concurrent_attempts(8).count(None), 3)
+        # Turned away attempts are taken back: the address has used 3 of its 5
+        self.assertEqual(self.attempts('b@example.com', '10.0.0.1', 3), [None, None, 300])
+
+
+class LoginThrottleTests(TransactionTestCase):
+    databases = {'default', 'core', 'ops'}
+
+    def setUp(self):
+        throttle.reset()
+
+    @override_settings(LOGIN_THROTTLE_EMAIL_LIMIT=2)
+    def test_throttled_attempts_skip_the_lookup(self):
+        body = json.dumps({'email': 'target@example.com', 'password': 'guess'})
+        for _ in range(2):
+            response = self.client.post('/api/user/login/', data=body, content_type='application/json')
+            self.assertEqual(response.status_code, 401)
+
+        with self.assertNumQueries(0, using='core'):
+            response = self.client.post('/api/user/login/', data=body, content_type='application/json')
+        self.assertEqual(response.status_code, 429)
+        self.assertTrue(int(response['Retry-After']) > 0)
+
+        admin = create_user('admin@example.com', 'sys_admin')
+        stats = self.client.get('/api/health/login-throttle/', **bearer(admin)).json()
+        self.assertEqual((stats['allowed'], stats['rejected_email']), (2, 1))
+
+    def test_non_string_email_is_rejected(self):
+        body = json.dumps({'email': ['target@example.com'], 'password': 'guess'})
+        response = self.client.post('/api/user/login/', data=body, content_type='application/json')
+        self.assertEqual(response.status_code, 400)
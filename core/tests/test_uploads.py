@@ -0,0 +1,64 @@
+import hashlib
+import shutil
+import tempfile
+
+from django.core.files.storage import FileSystemStorage
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.test import SimpleTestCase, override_settings
+
+from core.uploads import UploadTooLarge, save_upload
+
+
+class SaveUploadTests(SimpleTestCase):
+
+    def setUp(self):
+        self.location = tempfile.mkdtemp()
+        self.storage = FileSystemStorage(location=self.location)
+
+    def tearDown(self):
+        shutil.rmtree(self.location)
+
+    @override_settings(UPLOAD_CHUNK_SIZE=1024)
+    def test_streams_and_hashes(self):
+        content = b'x' * 10_000
+        name, checksum, size = save_upload(
+            SimpleUploadedFile('deed.pdf', content), 'title_deeds/deed.pdf', storage=self.storage
+        )
+
+        self.assertEqual(name, 'title_deeds/deed.pdf')
+        self.assertEqual(checksum, hashlib.sha256(content).hexdigest())
+        self.assertEqual(size, len(content))
+        with self.storage.open(name) as saved:
+            self.assertEqual(saved.read(), content)
+
+    @override_settings(UPLOAD_CHUNK_SIZE=1024)
+    def test_oversize_leaves_nothing_behind(self):
+        with self.assertRaises(UploadTooLarge):
+            save_upload(
+                SimpleUploadedFile('big.png', b'x' * 5000), 'property_images/big.png',
+                max_size=4096, storage=self.storage
+            )
+        self.assertFalse(self.storage.exists('property_images/big.png'))
+
+
+@override_settings(UPLOAD_MAX_IMAGE_SIZE=1024)
+class UploadSizeLimitTests(SimpleTestCase):
+
+    def test_declared_size_rejected_before_reading(self):
+        """A request already too large by its Content-Length is refused outright"""
+        response = self.client.post('/api/property/upload-image/', {
+            'property_id': 1,
+            'user_id': 1,
+            'image': SimpleUploadedFile('big.png', b'x' * 200_000, content_type='image/png'),
+        })
+        self.assertEqual(response.status_code, 413)
+        self.assertEqual(response.json()['error'], 'Image size too large. Maximum size is 1KB.')
+
+    def test_oversize_file_stops_the_upload(self):
+        """A file passing the limit is dropped while the body is parsed"""
+        response = self.client.post('/api/property/upload-image/', {
+            'property_id': 1,
+            'user_id': 1,
+            'image': SimpleUploadedFile('big.png', b'x' * 4096, content_type='image/png'),
+        })
+        self.assertEqual(response.status_code, 413)
@@ -0,0 +1,62 @@
+import json
+
+from django.test import TransactionTestCase, override_settings
+
+from core.auth import user_status
+from core.models import User
+from core.tests.factories import bearer, create_user
+
+
+class BulkVerifyUsersTests(TransactionTestCase):
+    databases = {'default', 'core', 'ops'}
+
+    def setUp(self):
+        self.admin = create_user('admin@example.com', 'sys_admin', id_value='admin')
+
+    def make_user(self, n, id_type='Ghana Card', id_value='GHA-123456789-0', is_verified=False):
+        return create_user(
+            f'user{n}@example.com', 'property_seeker', id_type=id_type, id_value=id_value, is_verified=is_verified
+        ).id
+
+    def patch(self, data, user=None):
+        return self.client.patch('/api/user/verify-bulk/', data=json.dumps(data), content_type='application/json',
+                                 **bearer(user or self.admin))
+
+    def test_per_id_results_from_one_update(self):
+        card = self.make_user(1)
+        passport = self.make_user(2, 'Passport', 'L1234567')
+        bad_format = self.make_user(3, 'Passport', 'l1234567')
+        unsupported = self.make_user(4, 'Voter ID', '1234')
+        done = self.make_user(5, is_verified=True)
+        # Cached as unverified by an earlier request, as the admin's status is by their last one
+        self.assertEqual(user_status(card), (False, True))
+        user_status(self.admin.id)
+
+        with self.assertNumQueries(2, using='core'):
+            response = self.patch({'user_ids': [card, passport, bad_format, unsupported, done, 999999, card]})
+        self.assertEqual(response.status_code, 200)
+        body = response.json()
+        self.assertEqual({result['user_id']: result['status'] for result in body['results']}, {
+            card: 'verified', passport: 'verified', bad_format: 'invalid_id_format',
+            unsupported: 'unsupported_id_type', done: 'already_verified', 999999: 'not_found',
+        })
+        self.assertEqual(body['summary']['verified'], 2)
+
+        verified = set(User.objects.using('core').filter(is_verified=True).values_list('id', flat=True))
+        self.assertEqual(verified, {card, passport, done, self.admin.id})
+        self.assertEqual(user_status(card), (True, True))
+
+    @override_settings(USER_VERIFY_BATCH_MAX=2)
+    def test_rejects_bad_batches(self):
+        self.assertEqual(self.patch({'user_ids': [1, 2, 3]}).status_code, 400)
+        self.assertEqual(self.patch({'user_ids': ['1']}).status_code, 400)
+        self.assertEqual(self.patch({'user_ids': []}).status_code, 400)
+        self.assertEqual(self.client.post('/api/user/verify-bulk/').status_code, 405)
+
+    def test_admins_only(self):
+        pending = self.make_user(1)
+        response = self.client.patch('/api/user/verify-bulk/', data=json.dumps({'user_ids': [pending]}),
+                                     content_type='application/json')
+        self.assertEqual(response.status_code, 401)
+        self.assertEqual(self.patch({'user_ids': [pending]}, user=create_user('seeker@example.com', 'property_seeker')).status_code, 403)
+        self.assertFalse(User.objects.using('core').get(id=pending).is_verified)
@@ -0,0 +1,194 @@
+"""
+Sliding-window throttle for login attempts.
+
+Every attempt is counted against the email it names and against the client
+address, and login_user turns away an attempt over either limit with a 429
+before it looks the user up or hashes anything. A window is approximated
+with two fixed windows of LOGIN_THROTTLE_WINDOW seconds: the count of the
+previous window, scaled by how much of it still overlaps the sliding
+window, plus the count of the current one. A key therefore costs two
+integers. Emails and addresses are kept as short digests.
+
+Counters live in process by default, a bounded LRU of LOGIN_THROTTLE_MAX_KEYS
+keys, so each worker process applies the limits on its own. Setting
+LOGIN_THROTTLE_CACHE to the alias of a shared cache (Redis, Memcached)
+counts attempts across all workers with add() and incr(). The counters are
+built from the settings on first use; tests that override them call
+reset(). stats() reports the counts behind the limits, for
+/api/health/login-throttle/.
+"""
+import hashlib
+import math
+import threading
+import time
+from collections import OrderedDict
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.core.cache import caches
+
+_lock = threading.Lock()
+_backend_state = None
+_metrics = {'allowed': 0, 'rejected_email': 0, 'rejected_ip': 0}
+
+
+class LocalCounters:
+    """Per-process counters: key -> [window index, current count, previous count]"""
+
+    def __init__(self, max_keys):
+        self.max_keys = max_keys
+        self.evictions = 0
+        self._counts = OrderedDict()
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _roll(entry, index):
+        if entry is None or entry[0] < index - 1:
+            return [index, 0, 0]
+        if entry[0] == index - 1:
+            return [index, 0, entry[1]]
+        return entry
+
+    def hit(self, keys, limits, index, overlap):
+        """
+        Count an attempt against every key and return None, or, without
+        counting it, the position of the first key already at its limit.
+        """
+        with self._lock:
+            entries = [self._roll(self._counts.get(key), index) for key in keys]
+            for position, (entry, limit) in enumerate(zip(entries, limits)):
+                if entry[1] + entry[2] * overlap >= limit:
+                    return position
+            for key, entry in zip(keys, entries):
+                entry[1] += 1
+                self._counts[key] = entry
+                self._counts.move_to_end(key)
+            while len(self._counts) > self.max_keys:
+                self._counts.popitem(last=False)
+                self.evictions += 1
+        return None
+
+    def stats(self):
+        return {'backend': 'local', 'keys': len(self._counts), 'max_keys': self.max_keys,
+                'evictions': self.evictions}
+
+
+class CacheCounters:
+    """Counters shared by every process through a cache, one entry per key and window"""
+
+    def __init__(self, alias, window):
+        self.alias = alias
+        self.window = window
+
+    def _cache(self):
+        return caches[self.alias]
+
+    def _incr(self, cache, name, delta):
+        # Kept until the next window no longer looks back at it
+        cache.add(name, 0, self.window * 2)
+        try:
+            return cache.incr(name, delta)
+        except ValueError:
+            # Evicted between add() and incr()
+            cache.set(name, max(delta, 0), self.window * 2)
+            return max(delta, 0)
+
+    def hit(self, keys, limits, index, overlap):
+        """
+        LocalCounters.hit() across processes. Each count is incremented
+        before it is compared, so concurrent attempts see distinct counts,
+        and taken back when the attempt is turned away.
+        """
+        cache = self._cache()
+        previous = cache.get_many([f'login-throttle:{key}:{index - 1}' for key in keys])
+        counted = []
+        for position, (key, limit) in enumerate(zip(keys, limits)):
+            name = f'login-throttle:{key}:{index}'
+            current = self._incr(cache, name, 1)
+            counted.append(name)
+            if current - 1 + previous.get(f'login-throttle:{key}:{index - 1}', 0) * overlap >= limit:
+                for name in counted:
+                    self._incr(cache, name, -1)
+                return position
+        return None
+
+    def stats(self):
+        return {'backend': 'cache', 'cache': self.alias}
+
+
+def _backend():
+    global _backend_state
+    if _backend_state is None:
+        with _lock:
+            if _backend_state is None:
+                if settings.LOGIN_THROTTLE_CACHE:
+                    _backend_state = CacheCounters(settings.LOGIN_THROTTLE_CACHE, settings.LOGIN_THROTTLE_WINDOW)
+                else:
+                    _backend_state = LocalCounters(settings.LOGIN_THROTTLE_MAX_KEYS)
+    return _backend_state
+
+
+def _digest(kind, value):
+    return kind + hashlib.blake2b(value.encode(), digest_size=8).hexdigest()
+
+
+def client_ip(request):
+    """The client address, from LOGIN_THROTTLE_IP_HEADER when a proxy in front sets it"""
+    if settings.LOGIN_THROTTLE_IP_HEADER:
+        forwarded = request.headers.get(settings.LOGIN_THROTTLE_IP_HEADER)
+        if forwarded:
+            # The last address is the one our own proxy saw
+            return forwarded.split(',')[-1].strip()
+    return request.META.get('REMOTE_ADDR', '')
+
+
+def check(email, ip):
+    """
+    Count a login attempt and return None, or, when the email or the address
+    is over its limit, the seconds to wait (the attempt is not counted).
+    """
+    window = settings.LOGIN_THROTTLE_WINDOW
+    now = time.time()
+    index = int(now // window)
+    overlap = 1 - (now % window) / window
+    keys = [_digest('e:', email.strip().lower()), _digest('i:', ip)]
+    limits = [settings.LOGIN_THROTTLE_EMAIL_LIMIT, settings.LOGIN_THROTTLE_IP_LIMIT]
+
+    rejected = _backend().hit(keys, limits, index, overlap)
+    with _lock:
+        if rejected is None:
+            _metrics['allowed'] += 1
+        else:
+            _metrics[('rejected_email', 'rejected_ip')[rejected]] += 1
+    if rejected is None:
+        return None
+    return max(math.ceil(window - now % window), 1)
+
+
+async def acheck(email, ip):
+    """check() for async views; a shared cache is queried off the event loop"""
+    if isinstance(_backend(), CacheCounters):
+        return await sync_to_async(check, thread_sensitive=False)(email, ip)
+    return check(email, ip)
+
+
+def reset():
+    """Forget every count and metric of this process, and rebuild the counters from the settings"""
+    global _backend_state
+    with _lock:
+        _backend_state = None
+        for metric in _metrics:
+            _metrics[metric] = 0
+
+
+def stats():
+    """Attempt counts since the process started, the limits and the counter store"""
+    with _lock:
+        metrics = dict(_metrics)
+    return {
+        **metrics,
+        'window_seconds': settings.LOGIN_THROTTLE_WINDOW,
+        'email_limit': settings.LOGIN_THROTTLE_EMAIL_LIMIT,
+        'ip_limit': settings.LOGIN_THROTTLE_IP_LIMIT,
+        'counters': _backend().stats(),
+    }
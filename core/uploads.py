@@ -0,0 +1,135 @@
+"""
+Constant-memory handling of uploaded files.
+
+limit_upload_size() refuses a request whose declared size is already over
+the limit before any of the body is read. It also installs
+MaxSizeUploadHandler, which stops parsing as soon as a file grows past the
+limit. save_upload() copies an upload into storage chunk by chunk, hashing
+and re-checking the size on the way, so no more than one chunk of the file
+is ever held in memory and the file is read only once.
+"""
+import hashlib
+from functools import wraps
+
+from django.conf import settings
+from django.core.files.base import File
+from django.core.files.storage import default_storage
+from django.core.files.uploadhandler import FileUploadHandler, SkipFile, StopUpload
+from django.http import JsonResponse
+
+# Room for the multipart boundaries and the other form fields
+MULTIPART_OVERHEAD = 64 * 1024
+
+
+class UploadTooLarge(Exception):
+    pass
+
+
+def too_large_response(label, max_size):
+    if max_size >= 1024 * 1024:
+        limit = f'{max_size // (1024 * 1024)}MB'
+    else:
+        limit = f'{max_size // 1024}KB'
+    return JsonResponse({'error': f'{label} size too large. Maximum size is {limit}.'}, status=413)
+
+
+class MaxSizeUploadHandler(FileUploadHandler):
+    """
+    Stops the upload once any file passes max_size bytes, before it is
+    buffered. With skip_oversize only that file is dropped, and its name
+    recorded in request.oversize_files.
+    """
+
+    def __init__(self, request, max_size, skip_oversize=False):
+        super().__init__(request)
+        self.max_size = max_size
+        self.skip_oversize = skip_oversize
+        self.received = 0
+        request.oversize_files = []
+
+    def new_file(self, *args, **kwargs):
+        super().new_file(*args, **kwargs)
+        self.received = 0
+
+    def receive_data_chunk(self, raw_data, start):
+        self.received += len(raw_data)
+        if self.received > self.max_size:
+            if self.skip_oversize:
+                self.request.oversize_files.append(self.file_name)
+                raise SkipFile()
+            self.request.upload_too_large = True
+            raise StopUpload(connection_reset=False)
+        return raw_data
+
+    def file_complete(self, file_size):
+        return None
+
+
+def limit_upload_size(setting_name, label='File', total_setting_name=None):
+    """
+    Reject uploads over the byte limit held in the named setting with a 413,
+    without reading them into memory. With total_setting_name the request
+    may carry several files: only the request as a whole is held to that
+    limit, and a file over the per-file limit is dropped and listed in
+    request.oversize_files for the view to report.
+    """
+    def decorator(view):
+        @wraps(view)
+        def wrapper(request, *args, **kwargs):
+            max_size = getattr(settings, setting_name)
+            max_request_size = getattr(settings, total_setting_name) if total_setting_name else max_size
+            try:
+                content_length = int(request.META.get('CONTENT_LENGTH') or 0)
+            except ValueError:
+                content_length = 0
+            if content_length > max_request_size + MULTIPART_OVERHEAD:
+                return too_large_response(label, max_request_size)
+
+            request.upload_handlers.insert(
+                0, MaxSizeUploadHandler(request, max_size, skip_oversize=bool(total_setting_name))
+            )
+            request.FILES  # Parse now so an oversize file is reported here
+            if getattr(request, 'upload_too_large', False):
+                return too_large_response(label, max_size)
+            return view(request, *args, **kwargs)
+        return wrapper
+    return decorator
+
+
+class _HashingFile(File):
+    """Yields the upload's chunks to storage, hashing and counting them"""
+
+    def __init__(self, uploaded_file, max_size, digests=()):
+        super().__init__(uploaded_file, name=uploaded_file.name)
+        self.max_size = max_size
+        self.sha256 = hashlib.sha256()
+        self.digests = digests
+        self.bytes_written = 0
+
+    def chunks(self, chunk_size=None):
+        for chunk in self.file.chunks(chunk_size or settings.UPLOAD_CHUNK_SIZE):
+            self.bytes_written += len(chunk)
+            if self.max_size is not None and self.bytes_written > self.max_size:
+                raise UploadTooLarge()
+            self.sha256.update(chunk)
+            for digest in self.digests:
+                digest.update(chunk)
+            yield chunk
+
+
+def save_upload(uploaded_file, name, max_size=None, storage=default_storage, digests=()):
+    """
+    Stream uploaded_file into storage under name. Returns the stored name,
+    the SHA-256 hex digest and the size in bytes; raises UploadTooLarge
+    (leaving nothing behind) when the file passes max_size. Each object in
+    digests (hashlib-like) is fed the same chunks.
+    """
+    name = storage.get_available_name(name)
+    content = _HashingFile(uploaded_file, max_size, digests)
+    try:
+        saved_name = storage.save(name, content)
+    except UploadTooLarge:
+        if storage.exists(name):
+            storage.delete(name)
+        raise
+    return saved_name, content.sha256.hexdigest(), content.bytes_written
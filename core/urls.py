@@ -4,17 +4,24 @@ from .views import (
     login_user,
     get_unverified_users,
     verify_user,
+    verify_users,
     create_property,
     upload_document,
     get_unverified_properties,
     verify_property,
     reject_property,
     upload_property_image,
+    upload_property_images,
     get_all_properties,
     get_property_detail,
     request_document_access,
     respond_to_document_request,
-    get_document_requests
+    get_document_requests,
+    revoke_document_access,
+    download_document,
+    database_health,
+    login_throttle_health,
+    get_job_status
 )
 
 urlpatterns = [
@@ -23,11 +30,13 @@ urlpatterns = [
     path('user/login/', login_user, name='login_user'),
     path('user/unverified/', get_unverified_users, name='get_unverified_users'),
     path('user/verify/', verify_user, name='verify_user'),
+    path('user/verify-bulk/', verify_users, name='verify_users'),
     
     # Property endpoints - specific routes first
     path('property/create/', create_property, name='create_property'),
     path('property/upload-document/', upload_document, name='upload_document'),
     path('property/upload-image/', upload_property_image, name='upload_property_image'),
+    path('property/upload-images/', upload_property_images, name='upload_property_images'),
     path('property/unverified/', get_unverified_properties, name='get_unverified_properties'),
     path('property/verify/', verify_property, name='verify_property'),
     path('property/reject/', reject_property, name='reject_property'),
@@ -38,4 +47,11 @@ urlpatterns = [
     path('document/request-access/', request_document_access, name='request_document_access'),
     path('document/respond/', respond_to_document_request, name='respond_to_document_request'),
     path('document/requests/', get_document_requests, name='get_document_requests'),
+    path('document/revoke/', revoke_document_access, name='revoke_document_access'),
+    path('document/download/<str:token>/', download_document, name='download_document'),
+
+    # Operations
+    path('health/db/', database_health, name='database_health'),
+    path('health/login-throttle/', login_throttle_health, name='login_throttle_health'),
+    path('jobs/<int:job_id>/', get_job_status, name='get_job_status'),
 ]
\ No newline at end of file
@@ -1,7 +1,16 @@
-from django.http import JsonResponse
+from django.http import HttpResponseNotModified, JsonResponse
 from django.views.decorators.csrf import csrf_exempt
 import json
 from .models import User, Property
+from .deeds import DeedFingerprint, InvalidDeed, check_pdf
+from .geo import location_fields
+from . import downloads, hashing, jobs, logins, throttle
+from .auth import invalidate_users, require_auth
+from .images import IMAGE_SIZES, image_column
+from .media import reference_blob, reference_blobs, save_deduplicated
+from .serving import file_response
+from .uploads import UploadTooLarge, limit_upload_size, too_large_response
+from asgiref.sync import sync_to_async
 from django.views.decorators.http import require_http_methods
 from django.contrib.auth.hashers import make_password, check_password
 from django.utils.timezone import now
@@ -10,16 +19,27 @@ from django.shortcuts import render
 from django.utils import timezone
 from django.db import connections
 from django.views.decorators.http import require_POST
-from django.core.files.storage import default_storage
-from django.core.files.base import ContentFile
 from django.core.validators import validate_email
 from django.core.exceptions import ValidationError
 from rest_framework_simplejwt.tokens import RefreshToken
+from django.conf import settings
+from ops import browse_cache, listing_search
+from TrustRent import db_pool
+from concurrent.futures import ThreadPoolExecutor
+
+ALLOWED_IMAGE_TYPES = ['image/jpeg', 'image/png', 'image/jpg']
+
+# ID number formats, checked at registration and again when an admin verifies
+ID_PATTERNS = {
+    'Ghana Card': re.compile(r'^GHA-\d{9}-\d$'),
+    'Passport': re.compile(r'^[A-Z]{1}\d{7}$'),
+}
+ID_FORMATS = {'Ghana Card': 'GHA-XXXXXXXXX-X', 'Passport': 'LXXXXXXX'}
 
 # Registering a new user
 @csrf_exempt
 @require_http_methods(["POST", "OPTIONS"])
-def register_user(request):
+async def register_user(request):
     if request.method == "OPTIONS":
         response = JsonResponse({})
         response["Access-Control-Allow-Origin"] = "*"
@@ -45,7 +65,7 @@ def register_user(request):
             return JsonResponse({'error': 'Invalid email format'}, status=400)
 
         # Check if email already exists
-        if User.objects.filter(email=data['email']).exists():
+        if await User.objects.filter(email=data['email']).aexists():
             return JsonResponse({'error': 'Email already registered'}, status=400)
 
         # Validate phone number format (Ghana format: +233XXXXXXXXX)
@@ -63,25 +83,19 @@ def register_user(request):
             return JsonResponse({'error': f'Invalid role. Must be one of: {", ".join(valid_roles)}'}, status=400)
 
         # Validate ID type and value
-        valid_id_types = ['Ghana Card', 'Passport']
-        if data['id_type'] not in valid_id_types:
-            return JsonResponse({'error': f'Invalid ID type. Must be one of: {", ".join(valid_id_types)}'}, status=400)
+        if data['id_type'] not in ID_PATTERNS:
+            return JsonResponse({'error': f'Invalid ID type. Must be one of: {", ".join(ID_PATTERNS)}'}, status=400)
 
         # Validate ID value format
-        id_patterns = {
-            'Ghana Card': r'^GHA-\d{9}-\d$',
-            'Passport': r'^[A-Z]{1}\d{7}$'
-        }
-        if not re.match(id_patterns[data['id_type']], data['id_value']):
+        if not ID_PATTERNS[data['id_type']].match(data['id_value']):
             return JsonResponse({
-                'error': f'Invalid {data["id_type"]} format. ' + 
-                        ('Use format: GHA-XXXXXXXXX-X' if data['id_type'] == 'Ghana Card' else 'Use format: LXXXXXXX')
+                'error': f'Invalid {data["id_type"]} format. Use format: {ID_FORMATS[data["id_type"]]}'
             }, status=400)
 
-        # Hash the password before saving
-        hashed_password = make_password(data['password'])
+        # Hash the password before saving, on the hashing pool
+        hashed_password = await hashing.run(make_password, data['password'])
 
-        user = User.objects.create(
+        user = await User.objects.acreate(
             firstname=data['firstname'],
             lastname=data['lastname'],
             email=data['email'],
@@ -103,6 +117,8 @@ def register_user(request):
         response['X-User-Id'] = str(user.id)
         return response
     
+    except hashing.HashingBusy:
+        return hashing.busy_response()
     except json.JSONDecodeError:
         return JsonResponse({'error': 'Invalid JSON data'}, status=400)
     except Exception as e:
@@ -110,7 +126,7 @@ def register_user(request):
 
 # Logging in a user
 @csrf_exempt
-def login_user(request):
+async def login_user(request):
     if request.method != 'POST':
         return JsonResponse({'error': 'Only POST requests allowed'}, status=405)
 
@@ -121,16 +137,25 @@ def login_user(request):
 
         if not email or not password:
             return JsonResponse({'error': 'Email and password required'}, status=400)
+        if not isinstance(email, str) or not isinstance(password, str):
+            return JsonResponse({'error': 'Email and password must be strings'}, status=400)
+
+        # Turned away before the lookup and the hash (see core.throttle)
+        retry_after = await throttle.acheck(email, throttle.client_ip(request))
+        if retry_after:
+            response = JsonResponse({'error': 'Too many login attempts, please try again later'}, status=429)
+            response['Retry-After'] = str(retry_after)
+            return response
 
         try:
-            user = User.objects.get(email=email)
+            user = await User.objects.aget(email=email)
             
             # For users registered before password hashing was implemented
             if not user.password_hash.startswith('pbkdf2_sha256$'):
-                user.password_hash = make_password(user.password_hash)
-                user.save()
+                user.password_hash = await hashing.run(make_password, user.password_hash)
+                await user.asave(update_fields=['password_hash'])
 
-            if not check_password(password, user.password_hash):
+            if not await hashing.run(check_password, password, user.password_hash):
                 return JsonResponse({'error': 'Invalid email or password'}, status=401)
             
             # Only check verification after password is confirmed
@@ -146,9 +171,9 @@ def login_user(request):
             refresh['email'] = user.email
             refresh['role'] = user.role
 
-            # Updating last_login
-            user.last_login = now()
-            user.save()
+            # Updating last_login, in batches (see core.logins)
+            if logins.record(user.id, now()):
+                await sync_to_async(logins.flush)()
 
             return JsonResponse({
                 'message': 'Login successful',
@@ -161,6 +186,8 @@ def login_user(request):
         except User.DoesNotExist:
             return JsonResponse({'error': 'Invalid email or password'}, status=401)
 
+    except hashing.HashingBusy:
+        return hashing.busy_response()
     except json.JSONDecodeError:
         return JsonResponse({'error': 'Invalid JSON'}, status=400)
     except Exception as e:
@@ -169,12 +196,13 @@ def login_user(request):
 #function for admin to get all unverified users
 @csrf_exempt
 @require_http_methods(["GET", "OPTIONS"])
+@require_auth(roles=('sys_admin', 'land_commission_rep'))
 def get_unverified_users(request):
     if request.method == "OPTIONS":
         response = JsonResponse({})
         response["Access-Control-Allow-Origin"] = "*"
         response["Access-Control-Allow-Methods"] = "GET, OPTIONS"
-        response["Access-Control-Allow-Headers"] = "Content-Type"
+        response["Access-Control-Allow-Headers"] = "Content-Type, Authorization"
         return response
 
     if request.method == 'GET':
@@ -187,27 +215,20 @@ def get_unverified_users(request):
 
 #function for admin to verify users using id regex validation
 @csrf_exempt
+@require_http_methods(["PATCH"])
+@require_auth(roles=('sys_admin', 'land_commission_rep'))
 def verify_user(request):
-    if request.method != 'PATCH':
-        return JsonResponse({'error': 'PATCH only'}, status=405)
-
     try:
         data = json.loads(request.body)
         user_id = data.get('user_id')
 
         user = User.objects.get(id=user_id)
 
-        # Regex patterns
-        patterns = {
-            'Ghana Card': r'^GHA-\d{9}-\d$',
-            'Passport': r'^[A-Z]{1}\d{7}$'
-        }
-
-        pattern = patterns.get(user.id_type)
+        pattern = ID_PATTERNS.get(user.id_type)
         if not pattern:
             return JsonResponse({'error': 'Unsupported ID type'}, status=400)
 
-        if not re.match(pattern, user.id_value):
+        if not pattern.match(user.id_value):
             return JsonResponse({'error': f'{user.id_type} format is invalid'}, status=400)
 
         user.is_verified = True
@@ -218,7 +239,75 @@ def verify_user(request):
         return JsonResponse({'error': 'User not found'}, status=404)
     except Exception as e:
         return JsonResponse({'error': str(e)}, status=500)
-    
+
+
+#function for admin to verify many users at once, with the same id checks as verify_user
+@csrf_exempt
+@require_http_methods(["PATCH"])
+@require_auth(roles=('sys_admin', 'land_commission_rep'))
+def verify_users(request):
+    """
+    Verify up to USER_VERIFY_BATCH_MAX users in one request. The users are
+    read with one query, their ID numbers checked against ID_PATTERNS, and
+    every user that passes is approved with one UPDATE. Answers the outcome
+    of each id: verified, already_verified, not_found, unsupported_id_type
+    or invalid_id_format.
+    """
+    try:
+        data = json.loads(request.body)
+        user_ids = data.get('user_ids')
+        if not isinstance(user_ids, list) or not user_ids:
+            return JsonResponse({'error': 'user_ids must be a non-empty list'}, status=400)
+        if len(user_ids) > settings.USER_VERIFY_BATCH_MAX:
+            return JsonResponse({'error': f'At most {settings.USER_VERIFY_BATCH_MAX} user_ids per request'}, status=400)
+        if not all(isinstance(user_id, int) and not isinstance(user_id, bool) for user_id in user_ids):
+            return JsonResponse({'error': 'user_ids must be integers'}, status=400)
+        user_ids = list(dict.fromkeys(user_ids))
+
+        results = dict.fromkeys(user_ids, 'not_found')
+        with connections['core'].cursor() as cursor:
+            cursor.execute(
+                "SELECT id, id_type, id_value, is_verified FROM core_user WHERE id = ANY(%s)", [user_ids]
+            )
+            approved = []
+            for user_id, id_type, id_value, is_verified in cursor.fetchall():
+                pattern = ID_PATTERNS.get(id_type)
+                if is_verified:
+                    results[user_id] = 'already_verified'
+                elif not pattern:
+                    results[user_id] = 'unsupported_id_type'
+                elif not pattern.match(id_value):
+                    results[user_id] = 'invalid_id_format'
+                else:
+                    approved.append(user_id)
+
+            verified = []
+            if approved:
+                cursor.execute(
+                    "UPDATE core_user SET is_verified = true WHERE id = ANY(%s) AND NOT is_verified RETURNING id",
+                    [approved]
+                )
+                verified = [row[0] for row in cursor.fetchall()]
+            for user_id in approved:
+                # Verified by a concurrent request meanwhile
+                results[user_id] = 'already_verified'
+            for user_id in verified:
+                results[user_id] = 'verified'
+
+        # The UPDATE bypasses the post_save receiver
+        invalidate_users(verified)
+
+        summary = {}
+        for outcome in results.values():
+            summary[outcome] = summary.get(outcome, 0) + 1
+        return JsonResponse({
+            'summary': summary,
+            'results': [{'user_id': user_id, 'status': outcome} for user_id, outcome in results.items()],
+        })
+
+    except Exception as e:
+        return JsonResponse({'error': str(e)}, status=500)
+
 
 # Creating a property by property owner only
 @csrf_exempt
@@ -252,18 +341,23 @@ def create_property(request):
                     'error': 'A property with this title and location already exists'
                 }, status=400)
 
-            # Create Property
+            # Create Property, with coordinates if the location includes GPS coordinates
+            latitude, longitude, geohash = location_fields(data['location'])
             cursor.execute("""
                 INSERT INTO core_property 
-                (title, property_type, description, location, status, created_at) 
-                VALUES (%s, %s, %s, %s, %s, %s) RETURNING id
+                (title, property_type, description, location, status, created_at,
+                 latitude, longitude, geohash) 
+                VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s) RETURNING id
                 """, [
                     data['title'],
                     data['property_type'],
                     data['description'],
                     data['location'],
                     'unlisted',
-                    timezone.now()
+                    timezone.now(),
+                    latitude,
+                    longitude,
+                    geohash
                 ])
             property_id = cursor.fetchone()[0]
 
@@ -304,6 +398,7 @@ def create_property(request):
 # Uploading a document by property owner only
 @csrf_exempt
 @require_POST
+@limit_upload_size('UPLOAD_MAX_DOCUMENT_SIZE', 'Document')
 def upload_document(request):
     try:
         user_id = request.POST.get('user_id')
@@ -325,6 +420,12 @@ def upload_document(request):
                 'error': 'Invalid file type. File must be a valid PDF document.'
             }, status=400)
 
+        # The content must be a PDF too; only its header and trailer are read here
+        try:
+            pdf = check_pdf(file, file.size)
+        except InvalidDeed as e:
+            return JsonResponse({'error': str(e)}, status=400)
+
         # Verify ownership and get current status
         with connections['core'].cursor() as cursor:
             cursor.execute("""
@@ -340,36 +441,50 @@ def upload_document(request):
             user_property_id = result[0]
             current_status = result[1]
 
-            # Save the file with a PDF extension
-            file_name = f"{user_property_id}_{file.name}"
-            saved_file_path = default_storage.save(f'title_deeds/{file_name}', ContentFile(file.read()))
+            # Stored under its content hash; a resubmitted deed is not written again
+            fingerprint = DeedFingerprint()
+            try:
+                saved_file_path, checksum, size, _ = save_deduplicated(
+                    file, 'title_deeds', settings.UPLOAD_MAX_DOCUMENT_SIZE, digests=[fingerprint]
+                )
+            except UploadTooLarge:
+                return too_large_response('Document', settings.UPLOAD_MAX_DOCUMENT_SIZE)
+            reference_blob(cursor, checksum, saved_file_path, size)
 
             # Create PropertyDocument and update verification status if property was rejected
             cursor.execute("""
                 INSERT INTO core_propertydocument 
-                (user_property_id, attachment, uploaded_at) 
-                VALUES (%s, %s, %s)
+                (user_property_id, attachment, sha256, fingerprint, pdf_version, encrypted, page_count, uploaded_at) 
+                VALUES (%s, %s, %s, %s, %s, %s, %s, %s) RETURNING id
                 """, [
                     user_property_id,
                     saved_file_path,
+                    checksum,
+                    fingerprint.hexdigest(),
+                    pdf['pdf_version'],
+                    pdf['encrypted'],
+                    pdf['page_count'],
                     timezone.now()
                 ])
+            document_id = cursor.fetchone()[0]
 
             # If property was previously rejected, reset status to pending
+            message = 'Document uploaded successfully. The document will be reviewed during property verification.'
             if current_status == 'rejected':
                 cursor.execute("""
                     UPDATE core_userproperty 
                     SET verification_status = 'pending'
                     WHERE id = %s
                     """, [user_property_id])
-                return JsonResponse({
-                    'message': 'New document uploaded successfully. Your property has been resubmitted for verification.',
-                    'status': 'pending_review'
-                }, status=201)
+                message = 'New document uploaded successfully. Your property has been resubmitted for verification.'
+
+        # Page count and producer are read by the run_jobs worker
+        jobs.enqueue('inspect_deed', {'document_id': document_id}, idempotency_key=f'inspect_deed:{document_id}')
 
         return JsonResponse({
-            'message': 'Document uploaded successfully. The document will be reviewed during property verification.',
-            'status': 'pending_review'
+            'message': message,
+            'status': 'pending_review',
+            'sha256': checksum
         }, status=201)
 
     except Exception as e:
@@ -379,6 +494,7 @@ def upload_document(request):
 # Getting all unverified properties by land commission representative 
 @csrf_exempt
 @require_http_methods(["GET"])
+@require_auth(roles=('land_commission_rep', 'sys_admin'))
 def get_unverified_properties(request):
     try:
         with connections['core'].cursor() as cursor:
@@ -392,7 +508,21 @@ def get_unverified_properties(request):
                     p.title as property_title,
                     p.location as property_location,
                     up.verification_status,
-                    pd.attachment as document_url
+                    pd.attachment as document_url,
+                    pd.pdf_version,
+                    pd.encrypted,
+                    pd.page_count,
+                    pd.producer,
+                    pd.inspected_at,
+                    -- Other properties filed with the same deed, found through
+                    -- the sha256 and fingerprint indexes
+                    ARRAY(
+                        SELECT DISTINCT other.user_property_id
+                        FROM core_propertydocument other
+                        WHERE (other.sha256 = pd.sha256 OR other.fingerprint = pd.fingerprint)
+                            AND other.user_property_id <> up.id
+                        ORDER BY other.user_property_id
+                    ) as duplicate_of
                 FROM 
                     core_userproperty up
                     JOIN core_user u ON up.owner_id = u.id
@@ -414,7 +544,18 @@ def get_unverified_properties(request):
                 "property_title": row[5],
                 "property_location": row[6],
                 "verification_status": row[7],
-                "document_url": row[8] if row[8] else None
+                "document_url": row[8] if row[8] else None,
+                # Deeds are only served through signed links
+                "document_download_url": downloads.sign_download(row[8])[0] if row[8] else None,
+                "document_metadata": {
+                    "pdf_version": row[9],
+                    "encrypted": row[10],
+                    "page_count": row[11],
+                    "producer": row[12],
+                    "inspected_at": row[13]
+                } if row[8] else None,
+                "duplicate_deed": bool(row[14]),
+                "duplicate_user_property_ids": row[14]
             })
         
         return JsonResponse(data, safe=False)
@@ -425,6 +566,7 @@ def get_unverified_properties(request):
 # Verifying a property by land commission representative
 @csrf_exempt
 @require_http_methods(["PATCH"])
+@require_auth(roles=('land_commission_rep', 'sys_admin'))
 def verify_property(request):
     """
     Endpoint for lands commission representative to verify property ownership.
@@ -491,6 +633,9 @@ def verify_property(request):
                         timezone.now()
                     ])
 
+        listing_search.refresh_listing_search(user_property_ids=[user_property_id])
+        browse_cache.invalidate(user_property_ids=[user_property_id])
+
         # Simple user-facing messages
         if verification_status == 'approved':
             message = 'Property ownership verification approved successfully.'
@@ -507,6 +652,7 @@ def verify_property(request):
 # Rejecting a property by land commission representative
 @csrf_exempt
 @require_http_methods(["PATCH"])
+@require_auth(roles=('land_commission_rep', 'sys_admin'))
 def reject_property(request):
     try:
         data = json.loads(request.body)
@@ -523,6 +669,9 @@ def reject_property(request):
             if not cursor.fetchone():
                 return JsonResponse({'error': 'UserProperty not found.'}, status=404)
 
+        listing_search.refresh_listing_search(user_property_ids=[user_property_id])
+        browse_cache.invalidate(user_property_ids=[user_property_id])
+
         return JsonResponse({'message': 'Property rejected, documents not correct'})
 
     except Exception as e:
@@ -530,6 +679,7 @@ def reject_property(request):
 
 @csrf_exempt
 @require_http_methods(["POST"])
+@limit_upload_size('UPLOAD_MAX_IMAGE_SIZE', 'Image')
 def upload_property_image(request):
     """Upload an image for a property"""
     try:
@@ -540,13 +690,9 @@ def upload_property_image(request):
             return JsonResponse({'error': 'Missing required fields'}, status=400)
 
         # Validate image type
-        allowed_types = ['image/jpeg', 'image/png', 'image/jpg']
-        if image.content_type not in allowed_types:
+        if image.content_type not in ALLOWED_IMAGE_TYPES:
             return JsonResponse({'error': 'Invalid image type. Only JPEG and PNG are allowed.'}, status=400)
 
-        # Validate image size (max 10MB)
-        if image.size > 10 * 1024 * 1024:
-            return JsonResponse({'error': 'Image size too large. Maximum size is 10MB.'}, status=400)
 
         # Verify property exists and user has access
         with connections['core'].cursor() as cursor:
@@ -560,22 +706,131 @@ def upload_property_image(request):
             if not cursor.fetchone():
                 return JsonResponse({'error': 'Property not found or access denied'}, status=404)
 
-            # Save the image file
-            file_name = f"property_{property_id}_{image.name}"
-            saved_file_path = default_storage.save(f'property_images/{file_name}', ContentFile(image.read()))
+            # Save the image file under its content hash; a re-upload is not written again
+            try:
+                saved_file_path, checksum, size, _ = save_deduplicated(
+                    image, 'property_images', settings.UPLOAD_MAX_IMAGE_SIZE
+                )
+            except UploadTooLarge:
+                return too_large_response('Image', settings.UPLOAD_MAX_IMAGE_SIZE)
+            reference_blob(cursor, checksum, saved_file_path, size)
 
             # Create PropertyImage record
             cursor.execute("""
                 INSERT INTO core_propertyimage 
-                (property_id, image, is_active, uploaded_at) 
-                VALUES (%s, %s, %s, %s) RETURNING id
-            """, [property_id, saved_file_path, True, timezone.now()])
+                (property_id, image, sha256, is_active, uploaded_at) 
+                VALUES (%s, %s, %s, %s, %s) RETURNING id
+            """, [property_id, saved_file_path, checksum, True, timezone.now()])
             
             image_id = cursor.fetchone()[0]
 
+        listing_search.refresh_listing_search(property_ids=[property_id])
+        browse_cache.invalidate(property_ids=[property_id])
+        # Derivatives are created by the run_jobs worker
+        job_id = jobs.enqueue(
+            'process_property_image',
+            {'image_id': image_id, 'property_id': int(property_id)},
+            idempotency_key=f'process_property_image:{image_id}'
+        )
+
         return JsonResponse({
             'message': 'Image uploaded successfully. The image will be displayed once processed.',
-            'status': 'processing'
+            'status': 'processing',
+            'sha256': checksum,
+            'job_id': job_id
+        }, status=200)
+
+    except Exception as e:
+        return JsonResponse({'error': str(e)}, status=500)
+
+def _store_image(image):
+    """Save one image of a batch upload; runs on a worker thread, without database access"""
+    if image.content_type not in ALLOWED_IMAGE_TYPES:
+        return {'file': image.name, 'status': 'failed',
+                'error': 'Invalid image type. Only JPEG and PNG are allowed.'}
+    try:
+        name, checksum, size, _ = save_deduplicated(image, 'property_images', settings.UPLOAD_MAX_IMAGE_SIZE)
+    except UploadTooLarge:
+        return {'file': image.name, 'status': 'failed', 'error': 'Image too large'}
+    except Exception as e:
+        return {'file': image.name, 'status': 'failed', 'error': str(e)}
+    return {'file': image.name, 'status': 'uploaded', 'path': name, 'sha256': checksum, 'size': size}
+
+
+@csrf_exempt
+@require_http_methods(["POST"])
+@limit_upload_size('UPLOAD_MAX_IMAGE_SIZE', 'Image', total_setting_name='UPLOAD_MAX_BATCH_SIZE')
+def upload_property_images(request):
+    """
+    Upload several images of a property in one request. The files are
+    written to storage on a bounded thread pool and recorded with a single
+    INSERT; each file gets its own status, so one bad file does not fail
+    the rest.
+    """
+    try:
+        property_id = request.POST.get('property_id')
+        images = request.FILES.getlist('images')
+        oversize = request.oversize_files
+
+        if not property_id or not (images or oversize):
+            return JsonResponse({'error': 'Missing required fields'}, status=400)
+        if len(images) + len(oversize) > settings.UPLOAD_MAX_BATCH_FILES:
+            return JsonResponse(
+                {'error': f'At most {settings.UPLOAD_MAX_BATCH_FILES} images can be uploaded at once'},
+                status=400
+            )
+
+        # Verify property exists and user has access
+        with connections['core'].cursor() as cursor:
+            cursor.execute("""
+                SELECT up.id 
+                FROM core_userproperty up
+                JOIN core_property p ON up.property_id = p.id
+                WHERE p.id = %s AND up.owner_id = %s AND up.is_active = true
+            """, [property_id, request.POST.get('user_id')])
+
+            if not cursor.fetchone():
+                return JsonResponse({'error': 'Property not found or access denied'}, status=404)
+
+        with ThreadPoolExecutor(max_workers=settings.UPLOAD_BATCH_WORKERS) as executor:
+            results = list(executor.map(_store_image, images))
+        results += [{'file': name, 'status': 'failed', 'error': 'Image too large'} for name in oversize]
+
+        stored = [result for result in results if result['status'] == 'uploaded']
+        if not stored:
+            return JsonResponse({'error': 'No images were uploaded', 'files': results}, status=400)
+
+        uploaded_at = timezone.now()
+        with connections['core'].cursor() as cursor:
+            reference_blobs(cursor, [(result['sha256'], result['path'], result['size']) for result in stored])
+            cursor.execute(f"""
+                INSERT INTO core_propertyimage 
+                (property_id, image, sha256, is_active, uploaded_at) 
+                VALUES {', '.join(['(%s, %s, %s, %s, %s)'] * len(stored))}
+                RETURNING id
+            """, [value for result in stored
+                  for value in (property_id, result['path'], result['sha256'], True, uploaded_at)])
+            # Rows come back in VALUES order
+            image_ids = [row[0] for row in cursor.fetchall()]
+
+        for result, image_id in zip(stored, image_ids):
+            result['image_id'] = image_id
+            del result['path'], result['size']
+
+        listing_search.refresh_listing_search(property_ids=[property_id])
+        browse_cache.invalidate(property_ids=[property_id])
+        # Derivatives are created by the run_jobs worker
+        job_id = jobs.enqueue(
+            'process_property_images',
+            {'image_ids': image_ids, 'property_id': int(property_id)},
+            idempotency_key=f'process_property_images:{image_ids[0]}-{image_ids[-1]}'
+        )
+
+        return JsonResponse({
+            'message': f'{len(stored)} of {len(results)} images uploaded. They will be displayed once processed.',
+            'status': 'processing',
+            'files': results,
+            'job_id': job_id
         }, status=200)
 
     except Exception as e:
@@ -583,8 +838,12 @@ def upload_property_image(request):
 
 @csrf_exempt
 @require_http_methods(["GET"])
+@browse_cache.cached_browse_response
 def get_all_properties(request):
     try:
+        if settings.LISTING_SEARCH_READ_MODEL:
+            return JsonResponse(listing_search.all_properties(), safe=False)
+
         with connections['core'].cursor() as cursor:
             cursor.execute("""
                 SELECT 
@@ -638,90 +897,113 @@ def get_all_properties(request):
 
 @csrf_exempt
 @require_http_methods(["GET"])
+@require_auth
 def get_property_detail(request, property_id):
     """Get detailed information about a specific property"""
-    # Check for authentication
-    auth_header = request.headers.get('Authorization')
-    if not auth_header or not auth_header.startswith('Bearer '):
-        return JsonResponse({'error': 'Authentication required'}, status=401)
+    image_size = request.GET.get('size', 'original')
+    if image_size not in IMAGE_SIZES:
+        return JsonResponse({'error': f"Invalid size. Must be one of: {', '.join(IMAGE_SIZES)}"}, status=400)
     
     try:
-        property_data = {}
-        
-        # First get property details from core database
-        with connections['core'].cursor() as cursor:
-            cursor.execute("""
-                SELECT 
-                    p.id, p.title, p.property_type, p.description, 
-                    p.location, p.status,
-                    u.firstname, u.lastname, u.phone_number,
-                    up.id as user_property_id
-                FROM core_property p
-                JOIN core_userproperty up ON p.id = up.property_id
-                JOIN core_user u ON up.owner_id = u.id
-                WHERE 
-                    p.id = %s 
-                    AND up.is_verified = true 
-                    AND up.is_active = true
-                    AND p.status = 'available'
-            """, [property_id])
-            
-            result = cursor.fetchone()
-            if not result:
+        # The ETag changes whenever a write touches the property, so a client
+        # holding the current one is answered without touching the database
+        etag = browse_cache.detail_etag(property_id, image_size)
+        if browse_cache.etag_matches(request, etag):
+            response = HttpResponseNotModified()
+            response['ETag'] = etag
+            return response
+
+        property_data = browse_cache.get_detail(etag)
+        if property_data is None:
+            property_data = _load_property_detail(property_id, image_size)
+            if property_data is None:
                 return JsonResponse({'error': 'Property not found or not available'}, status=404)
-            
-            columns = ['id', 'title', 'property_type', 'description', 'location', 'status', 
-                      'owner_firstname', 'owner_lastname', 'owner_phone', 'user_property_id']
-            property_data = dict(zip(columns, result))
-            
-            # Format owner information
-            property_data['owner'] = {
-                'name': f"{property_data.pop('owner_firstname')} {property_data.pop('owner_lastname')}",
-                'phone': property_data.pop('owner_phone')
-            }
-            
-            user_property_id = property_data.pop('user_property_id')  # We'll use this to get listing info
-            
-            # Get only active property images
-            cursor.execute("""
-                SELECT image
-                FROM core_propertyimage
-                WHERE property_id = %s AND is_active = true
-                ORDER BY uploaded_at DESC
-            """, [property_id])
-            property_data['images'] = [row[0] for row in cursor.fetchall()]
+            browse_cache.set_detail(etag, property_data)
 
-        # Then get listing details from ops database
-        with connections['ops'].cursor() as cursor:
-            cursor.execute("""
-                SELECT id, listing_type, price
-                FROM ops_propertylisting 
-                WHERE user_property_id = %s AND is_active = true
-            """, [user_property_id])
-            
-            listing = cursor.fetchone()
-            if listing:
-                listing_columns = ['listing_id', 'listing_type', 'price']
-                listing_data = dict(zip(listing_columns, listing))
-                # Add listing data to property data
-                property_data.update(listing_data)
-            
-        return JsonResponse(property_data)
+        response = JsonResponse(property_data)
+        response['ETag'] = etag
+        return response
             
     except Exception as e:
         return JsonResponse({'error': str(e)}, status=500)
 
+
+def _load_property_detail(property_id, image_size='original'):
+    """Detail document of an available, verified property, or None"""
+    property_data = {}
+    
+    # First get property details from core database
+    with connections['core'].cursor() as cursor:
+        cursor.execute("""
+            SELECT 
+                p.id, p.title, p.property_type, p.description, 
+                p.location, p.status,
+                u.firstname, u.lastname, u.phone_number,
+                up.id as user_property_id
+            FROM core_property p
+            JOIN core_userproperty up ON p.id = up.property_id
+            JOIN core_user u ON up.owner_id = u.id
+            WHERE 
+                p.id = %s 
+                AND up.is_verified = true 
+                AND up.is_active = true
+                AND p.status = 'available'
+        """, [property_id])
+        
+        result = cursor.fetchone()
+        if not result:
+            return None
+        
+        columns = ['id', 'title', 'property_type', 'description', 'location', 'status', 
+                  'owner_firstname', 'owner_lastname', 'owner_phone', 'user_property_id']
+        property_data = dict(zip(columns, result))
+        
+        # Format owner information
+        property_data['owner'] = {
+            'name': f"{property_data.pop('owner_firstname')} {property_data.pop('owner_lastname')}",
+            'phone': property_data.pop('owner_phone')
+        }
+        
+        user_property_id = property_data.pop('user_property_id')  # We'll use this to get listing info
+        
+        # Get only active property images
+        cursor.execute(f"""
+            SELECT {image_column('pi', image_size)}
+            FROM core_propertyimage pi
+            WHERE pi.property_id = %s AND pi.is_active = true
+            ORDER BY pi.uploaded_at DESC
+        """, [property_id])
+        property_data['images'] = [row[0] for row in cursor.fetchall()]
+
+    # Then get listing details from ops database
+    with connections['ops'].cursor() as cursor:
+        cursor.execute("""
+            SELECT id, listing_type, price
+            FROM ops_propertylisting 
+            WHERE user_property_id = %s AND is_active = true
+        """, [user_property_id])
+        
+        listing = cursor.fetchone()
+        if listing:
+            listing_columns = ['listing_id', 'listing_type', 'price']
+            listing_data = dict(zip(listing_columns, listing))
+            # Add listing data to property data
+            property_data.update(listing_data)
+
+    return property_data
+
 @csrf_exempt
 @require_http_methods(["POST"])
+@require_auth
 def request_document_access(request):
     """Endpoint for property seekers to request access to a property's title deed"""
     try:
         data = json.loads(request.body)
         property_id = data.get('property_id')
-        requester_id = data.get('requester_id')
+        requester_id = request.auth_user.id
         reason = data.get('reason')
 
-        if not all([property_id, requester_id, reason]):
+        if not all([property_id, reason]):
             return JsonResponse({'error': 'Missing required fields'}, status=400)
 
         # Verify property exists and is available
@@ -798,16 +1080,17 @@ def request_document_access(request):
 
 @csrf_exempt
 @require_http_methods(["POST"])
+@require_auth
 def respond_to_document_request(request):
     """Endpoint for property owners to approve or deny document access requests"""
     try:
         data = json.loads(request.body)
         request_id = data.get('request_id')
-        owner_id = data.get('owner_id')
+        owner_id = request.auth_user.id
         decision = data.get('decision')
         response_note = data.get('response_note', '')
 
-        if not all([request_id, owner_id, decision]):
+        if not all([request_id, decision]):
             return JsonResponse({'error': 'Missing required fields'}, status=400)
 
         if decision not in ['approved', 'denied']:
@@ -830,7 +1113,7 @@ def respond_to_document_request(request):
             current_status, request_owner_id, requester_email = result
 
             # Verify ownership
-            if int(owner_id) != request_owner_id:
+            if owner_id != request_owner_id:
                 return JsonResponse({'error': 'You do not have permission to respond to this request'}, status=403)
 
             # Check if request is still pending
@@ -844,24 +1127,70 @@ def respond_to_document_request(request):
                 WHERE id = %s
             """, [decision, timezone.now(), response_note, request_id])
 
-        return JsonResponse({
+        response_data = {
             'message': f'Document access request {decision}',
             'requester_email': requester_email
-        })
+        }
+        if decision == 'approved':
+            # Signed links the requester can download the deeds with until they expire
+            response_data['download_urls'] = downloads.download_urls([int(request_id)])[int(request_id)]
+        return JsonResponse(response_data)
 
     except Exception as e:
         return JsonResponse({'error': str(e)}, status=500)
 
+@csrf_exempt
+@require_http_methods(["POST"])
+@require_auth
+def revoke_document_access(request):
+    """Endpoint for property owners to withdraw an approved document access request"""
+    try:
+        data = json.loads(request.body)
+        request_id = data.get('request_id')
+        owner_id = request.auth_user.id
+
+        if not request_id:
+            return JsonResponse({'error': 'Missing required fields'}, status=400)
+
+        with connections['core'].cursor() as cursor:
+            cursor.execute("""
+                UPDATE core_documentaccessrequest dar
+                SET status = 'denied', response_date = %s
+                FROM core_userproperty up
+                WHERE dar.id = %s
+                AND dar.user_property_id = up.id
+                AND up.owner_id = %s
+                AND dar.status = 'approved'
+                RETURNING dar.id
+            """, [timezone.now(), request_id, owner_id])
+
+            if not cursor.fetchone():
+                return JsonResponse({'error': 'Approved request not found'}, status=404)
+
+        # Links already handed out stop working at once
+        downloads.revoke(int(request_id))
+        return JsonResponse({'message': 'Document access revoked'})
+
+    except Exception as e:
+        return JsonResponse({'error': str(e)}, status=500)
+
+@require_http_methods(["GET", "HEAD"])
+def download_document(request, token):
+    """Serve a title deed to the holder of a signed download link, without touching the database"""
+    try:
+        path = downloads.verify_download(token)
+    except downloads.InvalidDownload as e:
+        return JsonResponse({'error': str(e)}, status=403)
+    return file_response(request, path)
+
 @csrf_exempt
 @require_http_methods(["GET"])
+@require_auth
 def get_document_requests(request):
-    """Get document access requests based on user role"""
+    """Get the document access requests of the authenticated user, based on their role"""
     try:
-        user_id = request.GET.get('user_id')
-        role = request.GET.get('role')
-
-        if not user_id or not role:
-            return JsonResponse({'error': 'Missing required parameters'}, status=400)
+        user_id = request.auth_user.id
+        role = request.auth_user.role
 
         with connections['core'].cursor() as cursor:
             if role == 'property_owner':
@@ -919,7 +1248,53 @@ def get_document_requests(request):
                     request_data['response_date'] = request_data['response_date'].isoformat()
                 requests.append(request_data)
 
+        if role == 'property_seeker':
+            urls = downloads.download_urls([r['id'] for r in requests if r['status'] == 'approved'])
+            for request_data in requests:
+                if request_data['id'] in urls:
+                    request_data['download_urls'] = urls[request_data['id']]
+
         return JsonResponse(requests, safe=False)
 
     except Exception as e:
-        return JsonResponse({'error': str(e)}, status=500)
\ No newline at end of file
+        return JsonResponse({'error': str(e)}, status=500)
+
+
+@csrf_exempt
+@require_http_methods(["GET"])
+@require_auth(roles=('sys_admin',))
+def database_health(request):
+    """Check every database alias and report its connection pool metrics"""
+    statuses = {}
+    for alias in connections:
+        try:
+            with connections[alias].cursor() as cursor:
+                cursor.execute("SELECT 1")
+            statuses[alias] = {'status': 'ok'}
+        except Exception as e:
+            statuses[alias] = {'status': 'error', 'error': str(e)}
+
+    stats = db_pool.pool_stats()
+    for alias, alias_status in statuses.items():
+        stats[alias].update(alias_status)
+    healthy = all(alias_status['status'] == 'ok' for alias_status in statuses.values())
+    return JsonResponse({'healthy': healthy, 'databases': stats}, status=200 if healthy else 503)
+
+
+@csrf_exempt
+@require_http_methods(["GET"])
+@require_auth(roles=('sys_admin',))
+def login_throttle_health(request):
+    """Report the login throttle's counters, for sizing its limits"""
+    return JsonResponse(throttle.stats())
+
+
+@csrf_exempt
+@require_http_methods(["GET"])
+@require_auth
+def get_job_status(request, job_id):
+    """Progress of a background job queued by an upload"""
+    job = jobs.get_job(job_id)
+    if job is None:
+        return JsonResponse({'error': 'Job not found'}, status=404)
+    return JsonResponse(job)
@@ -1,6 +1,17 @@
 from django.apps import AppConfig
+from django.db.models.signals import post_delete, post_save
 
 
 class OpsConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'ops'
+
+    def ready(self):
+        from core.models import Property, PropertyImage, UserProperty
+        from . import browse_cache
+        from .models import PropertyListing
+
+        # ORM writes (admin, shell, scripts); the raw SQL write views invalidate explicitly
+        for model in (Property, PropertyImage, UserProperty, PropertyListing):
+            post_save.connect(browse_cache.invalidate_on_save, sender=model)
+            post_delete.connect(browse_cache.invalidate_on_save, sender=model)
@@ -0,0 +1,159 @@
+"""
+Read-through caches for the public browse endpoints and the property detail.
+
+Responses are cached per endpoint and normalized query string in the cache
+named by BROWSE_CACHE_ALIAS (local memory by default; point it at Redis or
+Memcached when running several processes). Every key carries a shared
+version number, so invalidate() makes all cached pages stale at once with a
+single counter bump; the old entries age out through the backend's TTL and
+eviction. Listing, property, image and verification writes call invalidate().
+
+The property detail document is cached per property under its own version
+counter, which also serves as the detail endpoint's ETag, so a conditional
+request is answered from the cache alone. The detail counters expire with
+the documents (PROPERTY_DETAIL_CACHE_TIMEOUT), so a process whose local
+cache missed an invalidation stops answering 304 for the old ETag once
+that timeout has passed.
+"""
+import hashlib
+import logging
+import time
+from functools import wraps
+
+from django.conf import settings
+from django.core.cache import caches
+from django.db import connections
+from django.http import HttpResponse
+from django.utils.http import parse_etags
+
+logger = logging.getLogger(__name__)
+
+VERSION_KEY = 'browse:version'
+
+
+def _cache():
+    return caches[settings.BROWSE_CACHE_ALIAS]
+
+
+def _version(cache, key=VERSION_KEY, timeout=None):
+    version = cache.get(key)
+    if version is None:
+        _start_version(cache, key, timeout)
+        version = cache.get(key)
+    return version
+
+
+def _start_version(cache, key, timeout=None):
+    # Start from the clock rather than 1 so a counter lost to eviction or
+    # expiry never comes back at a version whose pages are still cached;
+    # add() keeps a counter another process set in the meantime
+    cache.add(key, time.time_ns(), timeout=timeout)
+
+
+def _bump(cache, key, timeout=None):
+    try:
+        cache.incr(key)
+    except ValueError:
+        _start_version(cache, key, timeout)
+
+
+def _detail_version_key(property_id):
+    return f'detail:version:{property_id}'
+
+
+def _detail_version_timeout():
+    # incr() keeps a key's expiry, so a counter lives this long from its start
+    return max(settings.PROPERTY_DETAIL_CACHE_TIMEOUT, 1)
+
+
+def cache_key(endpoint, params, version):
+    """Key for an endpoint and its query parameters; order and blank values do not matter"""
+    normalized = sorted(
+        (name, value.strip())
+        for name in params
+        for value in params.getlist(name)
+        if value.strip()
+    )
+    digest = hashlib.sha256(repr(normalized).encode()).hexdigest()
+    return f'browse:{version}:{endpoint}:{digest}'
+
+
+def invalidate(property_ids=(), user_property_ids=()):
+    """
+    Make every cached browse response stale, along with the detail documents
+    of the given properties (or of the properties behind the given ownership records).
+    """
+    try:
+        cache = _cache()
+        _bump(cache, VERSION_KEY)
+
+        property_ids = {int(property_id) for property_id in property_ids}
+        if user_property_ids:
+            with connections['core'].cursor() as cursor:
+                cursor.execute(
+                    "SELECT property_id FROM core_userproperty WHERE id = ANY(%s)",
+                    [[int(user_property_id) for user_property_id in user_property_ids]]
+                )
+                property_ids.update(row[0] for row in cursor.fetchall())
+        for property_id in property_ids:
+            _bump(cache, _detail_version_key(property_id), _detail_version_timeout())
+    except Exception:
+        logger.exception('Failed to invalidate the browse cache')
+
+
+def invalidate_on_save(sender, instance, **kwargs):
+    """post_save/post_delete receiver for the models the browse endpoints read"""
+    if sender._meta.model_name == 'property':
+        invalidate(property_ids=[instance.pk])
+    elif hasattr(instance, 'property_id'):
+        invalidate(property_ids=[instance.property_id])
+    else:
+        invalidate(user_property_ids=[instance.user_property_id])
+
+
+def detail_etag(property_id, image_size='original'):
+    """Strong ETag of a property's current detail document at an image size"""
+    version = _version(_cache(), _detail_version_key(property_id), _detail_version_timeout())
+    if image_size == 'original':
+        return f'"property-{property_id}-{version}"'
+    return f'"property-{property_id}-{version}-{image_size}"'
+
+
+def etag_matches(request, etag):
+    """Whether the request's If-None-Match already names etag"""
+    etags = parse_etags(request.headers.get('If-None-Match', ''))
+    return '*' in etags or etag in etags
+
+
+def get_detail(etag):
+    """Cached detail document for an ETag from detail_etag(), or None"""
+    return _cache().get(f'detail:{etag}')
+
+
+def set_detail(etag, document):
+    if settings.PROPERTY_DETAIL_CACHE_TIMEOUT:
+        _cache().set(f'detail:{etag}', document, settings.PROPERTY_DETAIL_CACHE_TIMEOUT)
+
+
+def cached_browse_response(view):
+    """Serve successful GET responses of a browse view from the cache"""
+    @wraps(view)
+    def wrapper(request, *args, **kwargs):
+        if request.method != 'GET' or not settings.BROWSE_CACHE_TIMEOUT:
+            return view(request, *args, **kwargs)
+
+        cache = _cache()
+        key = cache_key(view.__name__, request.GET, _version(cache))
+        cached = cache.get(key)
+        if cached is not None:
+            content, content_type = cached
+            response = HttpResponse(content, content_type=content_type)
+            response['X-Cache'] = 'HIT'
+            return response
+
+        response = view(request, *args, **kwargs)
+        if response.status_code == 200 and not response.streaming:
+            cache.set(key, (response.content, response['Content-Type']), settings.BROWSE_CACHE_TIMEOUT)
+        response['X-Cache'] = 'MISS'
+        return response
+    return wrapper
@@ -0,0 +1,380 @@
+"""
+Listing search read model.
+
+The browse endpoints need data from core (property, ownership, owner, images)
+and ops (listing), which live in different databases. The listing_search table
+in the ops database keeps one flattened row per ownership record so those
+endpoints can be served from a single table. Write views call
+refresh_listing_search() after changing any of the source rows; the
+rebuild_listing_search command repopulates the whole table.
+"""
+import json
+import logging
+
+from django.db import connections, transaction
+
+from core.geo import geo_condition
+from core.images import pick_image
+from core.search import prefix_tsquery, rank_expression, search_condition
+
+logger = logging.getLogger(__name__)
+
+SEARCH_COLUMNS = [
+    'user_property_id', 'property_id', 'title', 'property_type', 'description',
+    'location', 'property_status', 'property_created_at',
+    'owner_firstname', 'owner_lastname', 'owner_email', 'owner_phone',
+    'is_verified', 'is_active', 'latitude', 'longitude', 'geohash',
+    'listing_id', 'listing_type', 'price', 'listing_created_at',
+    'images', 'synced_at'
+]
+
+
+def refresh_listing_search(user_property_ids=None, property_ids=None):
+    """
+    Re-sync the listing_search rows of the given ownership records (or of every
+    ownership record of the given properties) from core and ops.
+
+    Failures are logged rather than raised: the source write has already been
+    committed, and a rebuild brings the read model back in line.
+    """
+    try:
+        _refresh(user_property_ids or [], property_ids or [])
+    except Exception:
+        logger.exception(
+            'Failed to refresh listing_search for user properties %s / properties %s',
+            user_property_ids, property_ids
+        )
+
+
+def rebuild_listing_search(batch_size=500):
+    """
+    Re-sync every ownership record in id-ordered batches, dropping rows whose
+    ownership record no longer exists in core. Returns the number of rows synced.
+    """
+    refreshed = 0
+    last_id = 0
+    while True:
+        with connections['core'].cursor() as cursor:
+            cursor.execute("""
+                SELECT id FROM core_userproperty
+                WHERE id > %s
+                ORDER BY id
+                LIMIT %s
+            """, [last_id, batch_size])
+            ids = [row[0] for row in cursor.fetchall()]
+
+        with connections['ops'].cursor() as cursor:
+            if ids:
+                cursor.execute("""
+                    DELETE FROM listing_search
+                    WHERE user_property_id > %s AND user_property_id < %s
+                    AND NOT (user_property_id = ANY(%s))
+                """, [last_id, ids[-1], ids])
+            else:
+                cursor.execute("DELETE FROM listing_search WHERE user_property_id > %s", [last_id])
+                break
+
+        _refresh(ids, [])
+        refreshed += len(ids)
+        last_id = ids[-1]
+    return refreshed
+
+
+def _refresh(user_property_ids, property_ids):
+    user_property_ids = sorted({int(user_property_id) for user_property_id in user_property_ids})
+    property_ids = sorted({int(property_id) for property_id in property_ids})
+    if not user_property_ids and not property_ids:
+        return
+
+    with connections['core'].cursor() as cursor:
+        cursor.execute("""
+            SELECT
+                up.id, p.id, p.title, p.property_type, p.description,
+                p.location, p.status, p.created_at,
+                u.firstname, u.lastname, u.email, u.phone_number,
+                up.is_verified, up.is_active, p.latitude, p.longitude, p.geohash,
+                COALESCE((
+                    SELECT json_agg(
+                        json_build_object(
+                            'image', pi.image, 'thumbnail', pi.thumbnail, 'medium', pi.medium,
+                            'uploaded_at', pi.uploaded_at
+                        )
+                        ORDER BY pi.uploaded_at DESC, pi.id DESC
+                    )
+                    FROM core_propertyimage pi
+                    WHERE pi.property_id = p.id AND pi.is_active = true
+                ), '[]'::json) as images
+            FROM core_userproperty up
+            JOIN core_property p ON up.property_id = p.id
+            JOIN core_user u ON up.owner_id = u.id
+            WHERE up.id = ANY(%s) OR up.property_id = ANY(%s)
+        """, [user_property_ids, property_ids])
+        core_rows = cursor.fetchall()
+
+    found_ids = [row[0] for row in core_rows]
+    # Requested ownership records that no longer exist in core
+    missing_ids = sorted(set(user_property_ids) - set(found_ids))
+
+    with transaction.atomic(using='ops'), connections['ops'].cursor() as cursor:
+        listings = {}
+        if found_ids:
+            cursor.execute("""
+                SELECT user_property_id, id, listing_type, price, created_at
+                FROM ops_propertylisting
+                WHERE user_property_id = ANY(%s) AND is_active = true
+                ORDER BY created_at
+            """, [found_ids])
+            # Only one listing per property should be active; the newest wins
+            listings = {row[0]: row[1:] for row in cursor.fetchall()}
+
+        if core_rows:
+            values, params = [], []
+            for row in core_rows:
+                listing = listings.get(row[0], (None, None, None, None))
+                values.append('(' + ', '.join(['%s'] * len(SEARCH_COLUMNS[:-1])) + ', NOW())')
+                params.extend(list(row[:-1]) + list(listing) + [json.dumps(_as_list(row[-1]))])
+
+            updates = ', '.join(
+                f'{column} = EXCLUDED.{column}' for column in SEARCH_COLUMNS if column != 'user_property_id'
+            )
+            cursor.execute(f"""
+                INSERT INTO listing_search ({', '.join(SEARCH_COLUMNS)})
+                VALUES {', '.join(values)}
+                ON CONFLICT (user_property_id) DO UPDATE SET {updates}
+            """, params)
+
+        if missing_ids:
+            cursor.execute("DELETE FROM listing_search WHERE user_property_id = ANY(%s)", [missing_ids])
+
+
+def _as_list(images):
+    # psycopg2 decodes json columns, other drivers may hand back the raw text
+    return json.loads(images) if isinstance(images, str) else images
+
+
+# Sort keys of the browse endpoints mapped onto listing_search columns
+PROPERTY_SORT_FIELDS = {
+    'price': 'ls.price',
+    'created_at': 'ls.property_created_at',
+    'listing_created_at': 'ls.listing_created_at'
+}
+LISTING_SORT_FIELDS = {
+    'price': 'ls.price',
+    'created_at': 'ls.listing_created_at'
+}
+
+
+def _listed_where(filters, available_only=False):
+    """WHERE clause for ownership records with an active listing, plus the request filters"""
+    query = """
+        WHERE ls.is_verified = true
+        AND ls.is_active = true
+        AND ls.listing_id IS NOT NULL
+    """
+    params = []
+    if available_only:
+        query += " AND ls.property_status = 'available'"
+    search_query, search_params = search_condition('ls', search=filters['search'], location=filters['location'])
+    query += search_query
+    params.extend(search_params)
+    geo_query, geo_params = geo_condition('ls', near=filters['near'], bbox=filters['bbox'])
+    query += geo_query
+    params.extend(geo_params)
+    if filters['property_type']:
+        query += " AND ls.property_type = %s"
+        params.append(filters['property_type'])
+    if filters['price_range']['min']:
+        query += " AND ls.price >= %s"
+        params.append(float(filters['price_range']['min']))
+    if filters['price_range']['max']:
+        query += " AND ls.price <= %s"
+        params.append(float(filters['price_range']['max']))
+    if filters['listing_type']:
+        query += " AND ls.listing_type = %s"
+        params.append(filters['listing_type'])
+    return query, params
+
+
+def _direction(sort_order):
+    return 'ASC' if sort_order.lower() == 'asc' else 'DESC'
+
+
+def _order_by(filters, sort_by, sort_order, sort_fields, default_field):
+    """ORDER BY clause (and params) for a browse query; 'rank' sorts by search relevance"""
+    if sort_by == 'rank' and prefix_tsquery(filters['search']):
+        rank, params = rank_expression('ls', filters['search'])
+        return f"ORDER BY {rank} DESC, ls.listing_id DESC", params
+    direction = _direction(sort_order)
+    return f"ORDER BY {sort_fields.get(sort_by, default_field)} {direction}, ls.listing_id {direction}", []
+
+
+def browse_properties(filters, sort_by, sort_order, page, per_page, max_images=None, image_size='original'):
+    """Read-model version of ops.views.get_properties"""
+    where, params = _listed_where(filters, available_only=True)
+    order_by, order_params = _order_by(
+        filters, sort_by, sort_order, PROPERTY_SORT_FIELDS, 'ls.property_created_at'
+    )
+
+    with connections['ops'].cursor() as cursor:
+        cursor.execute("SELECT COUNT(*) FROM listing_search ls " + where, params)
+        total_count = cursor.fetchone()[0]
+
+        cursor.execute(f"""
+            SELECT
+                ls.property_id, ls.title, ls.property_type, ls.description,
+                ls.location, ls.property_status, ls.property_created_at,
+                ls.owner_firstname, ls.owner_lastname, ls.owner_email, ls.owner_phone,
+                ls.listing_id, ls.listing_type, ls.price, ls.listing_created_at, ls.images
+            FROM listing_search ls
+            {where}
+            {order_by}
+            LIMIT %s OFFSET %s
+        """, params + order_params + [per_page, (page - 1) * per_page])
+        rows = cursor.fetchall()
+
+    properties = []
+    for row in rows:
+        images = _sized_images(row[15], image_size)
+        if max_images is not None:
+            images = images[:max_images]
+        properties.append({
+            'id': row[0],
+            'title': row[1],
+            'property_type': row[2],
+            'description': row[3],
+            'location': row[4],
+            'status': row[5],
+            'created_at': row[6],
+            'firstname': row[7],
+            'lastname': row[8],
+            'email': row[9],
+            'phone_number': row[10],
+            'listing_id': row[11],
+            'listing_type': row[12],
+            'price': row[13],
+            'listing_status': True,
+            'listing_created_at': row[14],
+            'images': images,
+            'property_image': images[0]['image'] if images else None
+        })
+    return properties, total_count
+
+
+LISTING_SELECT = """
+    SELECT
+        ls.listing_id, ls.price, ls.listing_type, ls.listing_created_at,
+        ls.title, ls.property_type, ls.description, ls.location,
+        ls.owner_firstname, ls.owner_lastname, ls.owner_phone, ls.images
+"""
+
+
+def _sized_images(images, image_size):
+    """The stored images with 'image' set to the requested size"""
+    return [
+        {'image': pick_image(image, image_size), 'uploaded_at': image['uploaded_at']}
+        for image in _as_list(images)
+    ]
+
+
+def _listing_from_search_row(row, image_size='original'):
+    images = _sized_images(row[11], image_size)
+    return {
+        'id': row[0],
+        'price': float(row[1]),
+        'listing_type': row[2],
+        'created_at': row[3].isoformat() if row[3] else None,
+        'title': row[4],
+        'property_type': row[5],
+        'description': row[6],
+        'location': row[7],
+        'owner': {
+            'name': f"{row[8]} {row[9]}",
+            'phone': row[10]
+        },
+        'main_image': images[0]['image'] if images else None
+    }
+
+
+def browse_listings(filters, sort_by, sort_order, page, per_page, image_size='original'):
+    """Read-model version of the page/per_page mode of ops.views.get_all_listings"""
+    where, params = _listed_where(filters)
+    order_by, order_params = _order_by(
+        filters, sort_by, sort_order, LISTING_SORT_FIELDS, 'ls.listing_created_at'
+    )
+
+    with connections['ops'].cursor() as cursor:
+        cursor.execute("SELECT COUNT(*) FROM listing_search ls " + where, params)
+        total_count = cursor.fetchone()[0]
+
+        cursor.execute(f"""
+            {LISTING_SELECT}
+            FROM listing_search ls
+            {where}
+            {order_by}
+            LIMIT %s OFFSET %s
+        """, params + order_params + [per_page, (page - 1) * per_page])
+        listings = [_listing_from_search_row(row, image_size) for row in cursor.fetchall()]
+    return listings, total_count
+
+
+def browse_listings_after(filters, sort_by, sort_order, position, limit, image_size='original'):
+    """
+    Read-model version of the cursor mode of ops.views.get_all_listings: up to
+    limit listings after position, each paired with its (sort value, listing id).
+    """
+    where, params = _listed_where(filters)
+    sort_field = LISTING_SORT_FIELDS[sort_by]
+    direction = _direction(sort_order)
+    if position:
+        where += f" AND ({sort_field}, ls.listing_id) {'<' if direction == 'DESC' else '>'} (%s, %s)"
+        params.extend([position['value'], position['id']])
+
+    with connections['ops'].cursor() as cursor:
+        cursor.execute(f"""
+            {LISTING_SELECT}, {sort_field}
+            FROM listing_search ls
+            {where}
+            ORDER BY {sort_field} {direction}, ls.listing_id {direction}
+            LIMIT %s
+        """, params + [limit])
+        return [
+            (_listing_from_search_row(row, image_size), (str(row[12]), row[0]))
+            for row in cursor.fetchall()
+        ]
+
+
+def all_properties():
+    """Read-model version of core.views.get_all_properties"""
+    with connections['ops'].cursor() as cursor:
+        cursor.execute("""
+            SELECT
+                ls.property_id, ls.title, ls.property_type, ls.description,
+                ls.location, ls.property_status, ls.property_created_at,
+                ls.owner_firstname, ls.owner_lastname, ls.is_verified,
+                ls.images, ls.price, ls.listing_type
+            FROM listing_search ls
+            WHERE ls.is_verified = true
+            AND ls.is_active = true
+            AND ls.property_status != 'unlisted'
+            ORDER BY ls.user_property_id
+        """)
+        rows = cursor.fetchall()
+
+    properties = []
+    for row in rows:
+        images = _as_list(row[10])
+        properties.append({
+            "id": row[0],
+            "title": row[1],
+            "property_type": row[2],
+            "description": row[3],
+            "location": row[4],
+            "status": row[5],
+            "created_at": row[6].isoformat() if row[6] else None,
+            "owner_name": f"{row[7]} {row[8]}",
+            "is_verified": row[9],
+            "property_image": images[0]['image'] if images else None,
+            "price": float(row[11]) if row[11] else None,
+            "listing_type": row[12]
+        })
+    return properties
@@ -0,0 +1,170 @@
+"""
+Listing creation across the core and ops databases.
+
+create_listing() needs one statement per database. On core, a single UPDATE
+checks that the ownership record is verified and active, marks the property
+available and locks the row. On ops, a single INSERT ... ON CONFLICT against
+ops_listing_active_unique adds the listing together with its ListingOutbox
+entry. Both run in open transactions: a conflict or error rolls back both, and
+ops commits before core. If the core commit then fails, the listing is
+deactivated on the spot. If the process dies in between, the outbox entry lets
+process_pending_outbox() reconcile the two sides later.
+"""
+import logging
+from datetime import timedelta
+
+from django.db import connections, transaction
+from django.utils import timezone
+
+logger = logging.getLogger(__name__)
+
+
+class ListingError(Exception):
+    """A listing could not be created; str(error) is the user-facing message"""
+    status = 400
+
+
+class PropertyNotListable(ListingError):
+    status = 404
+
+    def __init__(self):
+        super().__init__('Property not found or not verified')
+
+
+class ActiveListingExists(ListingError):
+    def __init__(self):
+        super().__init__('An active listing already exists for this property')
+
+
+def create_listing(user_property_id, listing_type, price):
+    """
+    Create an active listing for a verified ownership record and mark its
+    property available. Returns listing_id, property_id and property_title;
+    raises a ListingError when the property cannot be listed.
+    """
+    now = timezone.now()
+    listing_id = None
+    try:
+        with transaction.atomic(using='core'):
+            with connections['core'].cursor() as cursor:
+                cursor.execute("""
+                    UPDATE core_property p
+                    SET status = 'available'
+                    FROM core_userproperty up
+                    WHERE up.id = %s
+                    AND up.property_id = p.id
+                    AND up.is_verified = true
+                    AND up.is_active = true
+                    RETURNING p.id, p.title
+                """, [user_property_id])
+                result = cursor.fetchone()
+            if not result:
+                raise PropertyNotListable()
+            property_id, property_title = result
+
+            with transaction.atomic(using='ops'), connections['ops'].cursor() as cursor:
+                cursor.execute("""
+                    WITH listing AS (
+                        INSERT INTO ops_propertylisting
+                        (user_property_id, listing_type, price, is_active, created_at)
+                        VALUES (%s, %s, %s, true, %s)
+                        ON CONFLICT (user_property_id) WHERE is_active = true DO NOTHING
+                        RETURNING id, user_property_id
+                    ), outbox AS (
+                        INSERT INTO ops_listingoutbox (listing_id, user_property_id, property_id, created_at)
+                        SELECT id, user_property_id, %s, %s FROM listing
+                    )
+                    SELECT id FROM listing
+                """, [user_property_id, listing_type, price, now, property_id, now])
+                listing = cursor.fetchone()
+                if not listing:
+                    raise ActiveListingExists()
+            # ops has committed; core commits when this block exits
+            listing_id = listing[0]
+    except Exception:
+        if listing_id is not None:
+            logger.exception('Core commit failed for listing %s; deactivating it', listing_id)
+            _compensate([listing_id])
+        raise
+
+    return {'listing_id': listing_id, 'property_id': property_id, 'property_title': property_title}
+
+
+def _compensate(listing_ids):
+    """Deactivate listings whose core side never committed"""
+    try:
+        with connections['ops'].cursor() as cursor:
+            cursor.execute("""
+                WITH deactivated AS (
+                    UPDATE ops_propertylisting SET is_active = false WHERE id = ANY(%s)
+                )
+                UPDATE ops_listingoutbox SET processed_at = %s, outcome = 'compensated'
+                WHERE listing_id = ANY(%s) AND processed_at IS NULL
+            """, [listing_ids, timezone.now(), listing_ids])
+    except Exception:
+        # The outbox entries stay pending for process_pending_outbox()
+        logger.exception('Failed to compensate listings %s', listing_ids)
+
+
+def process_pending_outbox(older_than=timedelta(minutes=1), batch_size=500):
+    """
+    Reconcile pending outbox entries older than older_than (younger ones may
+    belong to requests still committing). An entry is confirmed when its
+    property is available, rolled forward (property marked available) while
+    the ownership record is still verified and active, and compensated
+    (listing deactivated) otherwise. Returns the processed ownership record
+    ids per outcome.
+    """
+    with connections['ops'].cursor() as cursor:
+        cursor.execute("""
+            SELECT o.id, o.listing_id, o.user_property_id, o.property_id
+            FROM ops_listingoutbox o
+            WHERE o.processed_at IS NULL AND o.created_at < %s
+            ORDER BY o.created_at
+            LIMIT %s
+        """, [timezone.now() - older_than, batch_size])
+        entries = cursor.fetchall()
+    if not entries:
+        return {}
+
+    with connections['core'].cursor() as cursor:
+        cursor.execute("""
+            SELECT up.id, p.status, up.is_verified AND up.is_active
+            FROM core_userproperty up
+            JOIN core_property p ON p.id = up.property_id
+            WHERE up.id = ANY(%s)
+        """, [[entry[2] for entry in entries]])
+        ownership = {row[0]: (row[1], row[2]) for row in cursor.fetchall()}
+
+    outcomes = {}
+    for entry_id, listing_id, user_property_id, property_id in entries:
+        status, listable = ownership.get(user_property_id, (None, False))
+        if status == 'available':
+            outcomes[entry_id] = 'confirmed'
+        elif listable:
+            outcomes[entry_id] = 'rolled_forward'
+        else:
+            outcomes[entry_id] = 'compensated'
+
+    entries_by_id = {entry[0]: entry for entry in entries}
+    roll_forward = [entries_by_id[entry_id][3] for entry_id, outcome in outcomes.items() if outcome == 'rolled_forward']
+    compensate = [entries_by_id[entry_id][1] for entry_id, outcome in outcomes.items() if outcome == 'compensated']
+
+    if roll_forward:
+        with connections['core'].cursor() as cursor:
+            cursor.execute("UPDATE core_property SET status = 'available' WHERE id = ANY(%s)", [roll_forward])
+
+    with transaction.atomic(using='ops'), connections['ops'].cursor() as cursor:
+        if compensate:
+            cursor.execute("UPDATE ops_propertylisting SET is_active = false WHERE id = ANY(%s)", [compensate])
+        cursor.execute("""
+            UPDATE ops_listingoutbox o
+            SET processed_at = %s, outcome = v.outcome
+            FROM (SELECT unnest(%s::bigint[]) AS id, unnest(%s::text[]) AS outcome) v
+            WHERE o.id = v.id
+        """, [timezone.now(), list(outcomes), list(outcomes.values())])
+
+    processed = {}
+    for entry_id, outcome in outcomes.items():
+        processed.setdefault(outcome, []).append(entries_by_id[entry_id][2])
+    return processed
@@ -0,0 +1,38 @@
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand
+
+from ops import browse_cache
+from ops.listing_search import refresh_listing_search
+from ops.listing_service import process_pending_outbox
+
+
+class Command(BaseCommand):
+    help = 'Reconcile listings whose core-side write may not have committed'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--older-than', type=int, default=60,
+                            help='Only process entries at least this many seconds old')
+        parser.add_argument('--batch-size', type=int, default=500,
+                            help='Entries processed per batch')
+
+    def handle(self, *args, **options):
+        totals = {}
+        while True:
+            processed = process_pending_outbox(
+                older_than=timedelta(seconds=options['older_than']),
+                batch_size=options['batch_size']
+            )
+            if not processed:
+                break
+            for outcome, user_property_ids in processed.items():
+                totals[outcome] = totals.get(outcome, 0) + len(user_property_ids)
+
+            # Confirmed entries changed nothing
+            changed = processed.get('rolled_forward', []) + processed.get('compensated', [])
+            if changed:
+                refresh_listing_search(user_property_ids=changed)
+                browse_cache.invalidate(user_property_ids=changed)
+
+        summary = ', '.join(f'{count} {outcome}' for outcome, count in sorted(totals.items())) or 'nothing pending'
+        self.stdout.write(self.style.SUCCESS(f'Processed listing outbox: {summary}'))
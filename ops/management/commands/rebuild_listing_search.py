@@ -0,0 +1,15 @@
+from django.core.management.base import BaseCommand
+
+from ops.listing_search import rebuild_listing_search
+
+
+class Command(BaseCommand):
+    help = 'Rebuild the listing_search read model from the core and ops databases'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=500,
+                            help='Ownership records synced per batch')
+
+    def handle(self, *args, **options):
+        refreshed = rebuild_listing_search(batch_size=options['batch_size'])
+        self.stdout.write(self.style.SUCCESS(f'Successfully rebuilt listing_search ({refreshed} rows)'))
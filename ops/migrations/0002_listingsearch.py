@@ -0,0 +1,42 @@
+# Generated by Django 5.2.18 on 2026-10-18 16:37
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('ops', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ListingSearch',
+            fields=[
+                ('user_property_id', models.IntegerField(primary_key=True, serialize=False)),
+                ('property_id', models.IntegerField()),
+                ('title', models.CharField(max_length=100)),
+                ('property_type', models.CharField(max_length=20)),
+                ('description', models.TextField()),
+                ('location', models.CharField(max_length=150)),
+                ('property_status', models.CharField(max_length=20)),
+                ('property_created_at', models.DateTimeField()),
+                ('owner_firstname', models.CharField(max_length=100)),
+                ('owner_lastname', models.CharField(max_length=100)),
+                ('owner_email', models.EmailField(max_length=254)),
+                ('owner_phone', models.CharField(max_length=15)),
+                ('is_verified', models.BooleanField(default=False)),
+                ('is_active', models.BooleanField(default=True)),
+                ('listing_id', models.BigIntegerField(blank=True, null=True)),
+                ('listing_type', models.CharField(blank=True, max_length=10, null=True)),
+                ('price', models.DecimalField(blank=True, decimal_places=2, max_digits=12, null=True)),
+                ('listing_created_at', models.DateTimeField(blank=True, null=True)),
+                ('images', models.JSONField(default=list)),
+                ('synced_at', models.DateTimeField(auto_now=True)),
+            ],
+            options={
+                'db_table': 'listing_search',
+                'indexes': [models.Index(condition=models.Q(('is_active', True), ('is_verified', True), ('listing_id__isnull', False)), fields=['listing_created_at', 'listing_id'], name='listing_search_created_idx'), models.Index(condition=models.Q(('is_active', True), ('is_verified', True), ('listing_id__isnull', False)), fields=['price', 'listing_id'], name='listing_search_price_idx'), models.Index(fields=['property_id'], name='listing_search_property_idx')],
+            },
+        ),
+    ]
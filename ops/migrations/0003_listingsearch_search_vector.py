@@ -0,0 +1,26 @@
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('ops', '0002_listingsearch'),
+    ]
+
+    operations = [
+        migrations.RunSQL(
+            sql="""
+                ALTER TABLE listing_search ADD COLUMN search_vector tsvector
+                GENERATED ALWAYS AS (
+                    setweight(to_tsvector('english'::regconfig, coalesce(title, '')), 'A') ||
+                    setweight(to_tsvector('english'::regconfig, coalesce(description, '')), 'B') ||
+                    setweight(to_tsvector('simple'::regconfig, coalesce(location, '')), 'C')
+                ) STORED;
+                CREATE INDEX listing_search_search_vector_idx ON listing_search USING GIN (search_vector);
+            """,
+            reverse_sql="""
+                DROP INDEX IF EXISTS listing_search_search_vector_idx;
+                ALTER TABLE listing_search DROP COLUMN IF EXISTS search_vector;
+            """,
+        ),
+    ]
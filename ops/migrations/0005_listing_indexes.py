@@ -0,0 +1,43 @@
+# Generated by Django 5.2.18 on 2026-10-18 16:45
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('ops', '0004_listingsearch_coordinates'),
+    ]
+
+    operations = [
+        # The old check-then-insert could leave several active listings for one
+        # property; keep the newest so the unique index can be built.
+        migrations.RunSQL(
+            sql="""
+                UPDATE ops_propertylisting SET is_active = false
+                WHERE is_active = true AND id NOT IN (
+                    SELECT DISTINCT ON (user_property_id) id
+                    FROM ops_propertylisting
+                    WHERE is_active = true
+                    ORDER BY user_property_id, created_at DESC, id DESC
+                )
+            """,
+            reverse_sql=migrations.RunSQL.noop,
+        ),
+        migrations.AddIndex(
+            model_name='propertylisting',
+            index=models.Index(fields=['user_property_id'], name='ops_listing_user_property_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='propertylisting',
+            index=models.Index(condition=models.Q(('is_active', True)), fields=['-created_at', '-id'], name='ops_listing_active_created_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='propertylisting',
+            index=models.Index(condition=models.Q(('is_active', True)), fields=['price', 'id'], name='ops_listing_active_price_idx'),
+        ),
+        migrations.AddConstraint(
+            model_name='propertylisting',
+            constraint=models.UniqueConstraint(condition=models.Q(('is_active', True)), fields=('user_property_id',), name='ops_listing_active_unique'),
+        ),
+    ]
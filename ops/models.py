@@ -21,6 +21,21 @@ class PropertyListing(models.Model):
     def __str__(self):
         return f"{self.listing_type.title()} Listing (ID: {self.user_property_id})"
 
+    class Meta:
+        constraints = [
+            # At most one active listing per ownership record
+            models.UniqueConstraint(fields=['user_property_id'], name='ops_listing_active_unique',
+                                    condition=models.Q(is_active=True)),
+        ]
+        indexes = [
+            models.Index(fields=['user_property_id'], name='ops_listing_user_property_idx'),
+            # Browse sort orders, with id as the keyset tie-breaker
+            models.Index(fields=['-created_at', '-id'], name='ops_listing_active_created_idx',
+                         condition=models.Q(is_active=True)),
+            models.Index(fields=['price', 'id'], name='ops_listing_active_price_idx',
+                         condition=models.Q(is_active=True)),
+        ]
+
 
 # Property Review Request Model
 class PropertyReviewRequest(models.Model):
@@ -67,3 +82,88 @@ class RentalReview(models.Model):
     def __str__(self):
         return f"Review for agreement {self.agreement_id}"
 
+
+
+# Listing search read model
+class ListingSearch(models.Model):
+    """
+    Flattened copy of what the browse endpoints return: one row per ownership
+    record with its property, owner, active images and active listing.
+    Kept in sync by ops.listing_search; rebuild with `manage.py rebuild_listing_search`.
+    """
+    user_property_id = models.IntegerField(primary_key=True)
+    property_id = models.IntegerField()
+    title = models.CharField(max_length=100)
+    property_type = models.CharField(max_length=20)
+    description = models.TextField()
+    location = models.CharField(max_length=150)
+    property_status = models.CharField(max_length=20)
+    property_created_at = models.DateTimeField()
+    owner_firstname = models.CharField(max_length=100)
+    owner_lastname = models.CharField(max_length=100)
+    owner_email = models.EmailField()
+    owner_phone = models.CharField(max_length=15)
+    is_verified = models.BooleanField(default=False)
+    is_active = models.BooleanField(default=True)
+    # Active listing, if any
+    listing_id = models.BigIntegerField(null=True, blank=True)
+    listing_type = models.CharField(max_length=10, null=True, blank=True)
+    price = models.DecimalField(max_digits=12, decimal_places=2, null=True, blank=True)
+    listing_created_at = models.DateTimeField(null=True, blank=True)
+    latitude = models.FloatField(null=True, blank=True)
+    longitude = models.FloatField(null=True, blank=True)
+    geohash = models.CharField(max_length=12, null=True, blank=True)
+    # Active images, newest first: [{'image': ..., 'uploaded_at': ...}]
+    images = models.JSONField(default=list)
+    synced_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        db_table = 'listing_search'
+        indexes = [
+            models.Index(
+                fields=['listing_created_at', 'listing_id'], name='listing_search_created_idx',
+                condition=models.Q(is_verified=True, is_active=True, listing_id__isnull=False)
+            ),
+            models.Index(
+                fields=['price', 'listing_id'], name='listing_search_price_idx',
+                condition=models.Q(is_verified=True, is_active=True, listing_id__isnull=False)
+            ),
+            models.Index(fields=['property_id'], name='listing_search_property_idx'),
+            models.Index(fields=['geohash'], name='listing_search_geohash_idx',
+                         opclasses=['varchar_pattern_ops']),
+        ]
+
+    def __str__(self):
+        return f"Search entry for {self.title} (Listing: {self.listing_id})"
+
+
+# Listing creation outbox
+class ListingOutbox(models.Model):
+    """
+    Written in the same ops transaction as a new listing, recording the core
+    write (core_property.status = 'available') that has to commit with it.
+    `manage.py process_listing_outbox` reconciles entries whose core side may
+    not have committed: it re-applies the status change while the ownership is
+    still verified and otherwise deactivates the listing.
+    """
+    OUTCOME_CHOICES = [
+        ('confirmed', 'Confirmed'),
+        ('rolled_forward', 'Rolled forward'),
+        ('compensated', 'Compensated'),
+    ]
+
+    listing_id = models.BigIntegerField()
+    user_property_id = models.IntegerField()
+    property_id = models.IntegerField()
+    created_at = models.DateTimeField(auto_now_add=True)
+    processed_at = models.DateTimeField(null=True, blank=True)
+    outcome = models.CharField(max_length=20, choices=OUTCOME_CHOICES, null=True, blank=True)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['created_at'], name='ops_listing_outbox_pending_idx',
+                         condition=models.Q(processed_at__isnull=True)),
+        ]
+
+    def __str__(self):
+        return f"Outbox entry for listing {self.listing_id} ({self.outcome or 'pending'})"
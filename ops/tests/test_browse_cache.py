@@ -0,0 +1,55 @@
+import json
+
+from django.core.cache import caches
+from django.test import TransactionTestCase
+
+from core.tests.factories import create_user, create_listed_property
+
+
+class BrowseCacheTests(TransactionTestCase):
+    databases = {'default', 'core', 'ops'}
+
+    def setUp(self):
+        caches['browse'].clear()
+        self.owner = create_user()
+        _, self.user_property, self.listing = create_listed_property(self.owner, 'Cached Property')
+
+    def test_repeated_requests_skip_the_database(self):
+        """A second identical request is answered from the cache"""
+        for url in ['/api/properties/', '/api/listings/', '/api/property/all/']:
+            first = self.client.get(url)
+            self.assertEqual(first['X-Cache'], 'MISS')
+            with self.assertNumQueries(0, using='core'), self.assertNumQueries(0, using='ops'):
+                second = self.client.get(url)
+            self.assertEqual(second['X-Cache'], 'HIT')
+            self.assertEqual(second.json(), first.json())
+
+    def test_parameters_are_normalized(self):
+        """Parameter order and blank parameters share one cache entry"""
+        self.client.get('/api/properties/?sort_by=price&sort_order=asc')
+        response = self.client.get('/api/properties/?sort_order=asc&location=&sort_by=price')
+        self.assertEqual(response['X-Cache'], 'HIT')
+        response = self.client.get('/api/properties/?sort_order=desc&sort_by=price')
+        self.assertEqual(response['X-Cache'], 'MISS')
+
+    def test_listing_update_invalidates(self):
+        """A price change is visible on the next request"""
+        self.assertEqual(self.client.get('/api/listings/').json()['listings'][0]['price'], 1000.0)
+
+        response = self.client.patch(
+            f'/api/listing/{self.listing.id}/',
+            data=json.dumps({'price': 1500}),
+            content_type='application/json'
+        )
+        self.assertEqual(response.status_code, 200)
+
+        response = self.client.get('/api/listings/')
+        self.assertEqual(response['X-Cache'], 'MISS')
+        self.assertEqual(response.json()['listings'][0]['price'], 1500.0)
+
+    def test_errors_are_not_cached(self):
+        """Rejected requests are recomputed"""
+        self.client.get('/api/listings/?lat=123&lon=0')
+        response = self.client.get('/api/listings/?lat=123&lon=0')
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(response['X-Cache'], 'MISS')
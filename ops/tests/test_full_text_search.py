@@ -0,0 +1,81 @@
+from django.test import SimpleTestCase, TransactionTestCase, override_settings
+
+from core.search import prefix_tsquery
+from core.tests.factories import create_user, create_listed_property
+from ops.listing_search import refresh_listing_search
+
+
+class PrefixQueryTests(SimpleTestCase):
+    def test_words_become_prefix_terms(self):
+        self.assertEqual(prefix_tsquery('East Leg'), 'east:* & leg:*')
+
+    def test_weights_and_punctuation(self):
+        self.assertEqual(prefix_tsquery("Osu, (Accra)'", weights='C'), 'osu:*C & accra:*C')
+
+    def test_no_words(self):
+        self.assertIsNone(prefix_tsquery(' %&! '))
+        self.assertIsNone(prefix_tsquery(None))
+
+
+class FullTextSearchTests(TransactionTestCase):
+    databases = {'default', 'core', 'ops'}
+
+    def setUp(self):
+        self.owner = create_user()
+        self.villa = self.create_listing(
+            'Garden Villa', 'Villa with a large garden and a swimming pool', 'East Legon, Accra'
+        )
+        self.apartment = self.create_listing(
+            'City Apartment', 'Apartment close to the garden market', 'Osu, Accra'
+        )
+        self.chamber = self.create_listing(
+            'Legon Chamber', 'Single room near the university', 'Adum, Kumasi'
+        )
+
+    def create_listing(self, title, description, location):
+        _, user_property, listing = create_listed_property(
+            self.owner, title, description=description, location=location
+        )
+        refresh_listing_search(user_property_ids=[user_property.id])
+        return listing
+
+    def property_titles(self, query):
+        response = self.client.get(f'/api/properties/?{query}')
+        self.assertEqual(response.status_code, 200)
+        return [property['title'] for property in response.json()['properties']]
+
+    def listing_titles(self, query):
+        response = self.client.get(f'/api/listings/?{query}')
+        self.assertEqual(response.status_code, 200)
+        return [listing['title'] for listing in response.json()['listings']]
+
+    def test_search_matches_word_prefixes(self):
+        """Partial words match for type-ahead, including stemmed forms"""
+        self.assertEqual(self.property_titles('search=swim'), ['Garden Villa'])
+        self.assertEqual(self.property_titles('search=gard%20vil'), ['Garden Villa'])
+
+    def test_location_filter_only_matches_location(self):
+        """'Legon' in a title does not satisfy the location filter"""
+        self.assertEqual(self.property_titles('location=legon'), ['Garden Villa'])
+        self.assertEqual(sorted(self.property_titles('location=accra')), ['City Apartment', 'Garden Villa'])
+
+    def test_rank_sort(self):
+        """Title matches outrank description matches"""
+        self.assertEqual(self.property_titles('search=garden&sort_by=rank'), ['Garden Villa', 'City Apartment'])
+        self.assertEqual(self.listing_titles('search=garden&sort_by=rank'), ['Garden Villa', 'City Apartment'])
+
+    def test_rank_sort_without_search_words(self):
+        """Filters other than search leave nothing to rank by, so the default order applies"""
+        self.assertEqual(self.property_titles('location=accra&sort_by=rank'), ['City Apartment', 'Garden Villa'])
+        self.assertEqual(
+            self.property_titles('location=accra&sort_by=rank&sort_order=asc'), ['Garden Villa', 'City Apartment']
+        )
+        self.assertEqual(self.property_titles('search=%25%26&sort_by=rank&sort_order=asc'),
+                         ['Garden Villa', 'City Apartment', 'Legon Chamber'])
+
+    @override_settings(LISTING_SEARCH_READ_MODEL=True)
+    def test_read_model_search(self):
+        """The read model supports the same search, location and rank behaviour"""
+        self.assertEqual(self.property_titles('search=garden&sort_by=rank'), ['Garden Villa', 'City Apartment'])
+        self.assertEqual(self.listing_titles('location=legon'), ['Garden Villa'])
+        self.assertEqual(self.listing_titles('search=univ'), ['Legon Chamber'])
@@ -0,0 +1,91 @@
+from datetime import timedelta
+
+from django.test import TransactionTestCase, override_settings
+from django.utils import timezone
+
+from core.models import PropertyImage
+from core.tests.factories import create_user, create_listed_property
+
+
+class GetPropertiesImageLoadingTests(TransactionTestCase):
+    databases = {'default', 'core', 'ops'}
+
+    def setUp(self):
+        self.owner = create_user()
+
+    def create_listed_property(self, title, image_count):
+        property, _, _ = create_listed_property(self.owner, title)
+        uploaded_at = timezone.now()
+        for index in range(image_count):
+            image = PropertyImage.objects.using('core').create(
+                property=property,
+                image=f'property_images/{title}_{index}.png'
+            )
+            # Spread upload times so ordering is deterministic
+            PropertyImage.objects.using('core').filter(id=image.id).update(
+                uploaded_at=uploaded_at + timedelta(minutes=index)
+            )
+        return property
+
+    def test_query_count_is_independent_of_page_size(self):
+        """Images for the whole page are loaded in a single query"""
+        for index in range(5):
+            self.create_listed_property(f'Property {index}', image_count=3)
+
+        # count + page + images, regardless of how many properties are on the page
+        with self.assertNumQueries(3, using='core'):
+            response = self.client.get('/api/properties/?per_page=1')
+        self.assertEqual(len(response.json()['properties']), 1)
+
+        with self.assertNumQueries(3, using='core'):
+            response = self.client.get('/api/properties/?per_page=100')
+        self.assertEqual(response.status_code, 200)
+
+        properties = response.json()['properties']
+        self.assertEqual(len(properties), 5)
+        self.assertEqual(response.json()['pagination']['total'], 5)
+        for property in properties:
+            self.assertEqual(len(property['images']), 3)
+
+    def test_images_are_newest_first(self):
+        """Images keep the newest-first order and the main image is the newest one"""
+        self.create_listed_property('Ordered', image_count=3)
+
+        response = self.client.get('/api/properties/')
+        property = response.json()['properties'][0]
+
+        self.assertEqual(
+            [image['image'] for image in property['images']],
+            ['property_images/Ordered_2.png', 'property_images/Ordered_1.png', 'property_images/Ordered_0.png']
+        )
+        self.assertEqual(property['property_image'], 'property_images/Ordered_2.png')
+
+    def test_property_without_images(self):
+        """Properties without images are still listed, once"""
+        self.create_listed_property('No Images', image_count=0)
+
+        response = self.client.get('/api/properties/')
+        properties = response.json()['properties']
+
+        self.assertEqual(len(properties), 1)
+        self.assertEqual(properties[0]['images'], [])
+        self.assertIsNone(properties[0]['property_image'])
+
+    def test_max_images_per_property(self):
+        """The max_images parameter caps the images returned per property"""
+        self.create_listed_property('Capped', image_count=4)
+
+        response = self.client.get('/api/properties/?max_images=2')
+        images = response.json()['properties'][0]['images']
+
+        self.assertEqual(len(images), 2)
+        self.assertEqual(images[0]['image'], 'property_images/Capped_3.png')
+
+    @override_settings(LISTING_MAX_IMAGES_PER_PROPERTY=1)
+    def test_max_images_cannot_exceed_setting(self):
+        """The configured cap cannot be raised by the client"""
+        self.create_listed_property('Configured', image_count=3)
+
+        response = self.client.get('/api/properties/?max_images=50')
+
+        self.assertEqual(len(response.json()['properties'][0]['images']), 1)
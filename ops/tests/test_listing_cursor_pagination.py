@@ -0,0 +1,107 @@
+from django.test import TransactionTestCase, override_settings
+
+from core.tests.factories import create_user, create_listed_property
+
+
+@override_settings(LISTING_CURSOR_BATCH_SIZE=2)
+class ListingCursorPaginationTests(TransactionTestCase):
+    databases = {'default', 'core', 'ops'}
+
+    def setUp(self):
+        self.owner = create_user()
+        # Prices 100..700; the properties priced 300 and 600 are not verified
+        self.listings = {}
+        for index in range(1, 8):
+            price = index * 100
+            self.listings[price] = self.create_listing(
+                title=f'Property {price}',
+                price=price,
+                location='Accra' if index % 2 else 'Kumasi',
+                is_verified=price not in (300, 600)
+            )
+
+    def create_listing(self, title, price, location, is_verified=True):
+        return create_listed_property(self.owner, title, price, is_verified, location=location)[2]
+
+    def collect_pages(self, query):
+        prices, pages = [], 0
+        response = self.client.get(f'/api/listings/?pagination=cursor&{query}')
+        while True:
+            self.assertEqual(response.status_code, 200)
+            data = response.json()
+            prices.extend(listing['price'] for listing in data['listings'])
+            pages += 1
+            if not data['pagination']['has_more']:
+                self.assertIsNone(data['pagination']['next_cursor'])
+                return prices, pages
+            response = self.client.get(f"/api/listings/?cursor={data['pagination']['next_cursor']}&{query}")
+
+    def test_pages_cover_all_visible_listings_in_order(self):
+        """Walking the cursors returns each visible listing once, in sort order"""
+        prices, pages = self.collect_pages('sort_by=price&sort_order=asc&per_page=2')
+
+        self.assertEqual(prices, [100.0, 200.0, 400.0, 500.0, 700.0])
+        self.assertEqual(pages, 3)
+
+    def test_descending_order(self):
+        """Descending sort walks the catalog from the most expensive listing"""
+        prices, _ = self.collect_pages('sort_by=price&sort_order=desc&per_page=3')
+
+        self.assertEqual(prices, [700.0, 500.0, 400.0, 200.0, 100.0])
+
+    def test_core_filters_are_applied_across_batches(self):
+        """Core-side filters are applied while the page is being filled"""
+        prices, _ = self.collect_pages('sort_by=price&sort_order=asc&per_page=2&location=accra')
+
+        self.assertEqual(prices, [100.0, 500.0, 700.0])
+
+    @override_settings(LISTING_CURSOR_MAX_BATCHES=1)
+    def test_selective_filters_return_partial_pages(self):
+        """A page stops after LISTING_CURSOR_MAX_BATCHES reads and its cursor resumes the scan"""
+        response = self.client.get('/api/listings/?pagination=cursor&sort_by=price&sort_order=asc'
+                                   '&per_page=2&location=kumasi')
+        pagination = response.json()['pagination']
+        # The first batch (100, 200) holds one Kumasi listing
+        self.assertEqual([listing['price'] for listing in response.json()['listings']], [200.0])
+        self.assertTrue(pagination['partial'])
+        self.assertTrue(pagination['has_more'])
+
+        prices, _ = self.collect_pages('sort_by=price&sort_order=asc&per_page=2&location=kumasi')
+        self.assertEqual(prices, [200.0, 400.0])
+
+    def test_ties_are_broken_by_listing_id(self):
+        """Listings with the same sort value are neither skipped nor repeated"""
+        for index in range(3):
+            self.create_listing(title=f'Same Price {index}', price=250, location='Accra')
+
+        prices, _ = self.collect_pages('sort_by=price&sort_order=asc&per_page=1')
+
+        self.assertEqual(prices, [100.0, 200.0, 250.0, 250.0, 250.0, 400.0, 500.0, 700.0])
+
+    def test_estimated_total(self):
+        """total=estimate adds a planner estimate to the pagination block"""
+        response = self.client.get('/api/listings/?pagination=cursor&total=estimate')
+
+        self.assertEqual(response.status_code, 200)
+        self.assertIsInstance(response.json()['pagination']['estimated_total'], int)
+
+    def test_tampered_cursor_is_rejected(self):
+        """Cursor tokens are signed and cannot be forged"""
+        response = self.client.get('/api/listings/?cursor=not-a-valid-cursor')
+
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(response.json()['error'], 'Invalid cursor')
+
+    def test_invalid_sort_is_rejected(self):
+        """Cursor pagination only accepts the indexed sort keys"""
+        response = self.client.get('/api/listings/?pagination=cursor&sort_order=sideways')
+
+        self.assertEqual(response.status_code, 400)
+
+    def test_page_mode_is_unchanged(self):
+        """Requests without a cursor keep the page/per_page response"""
+        response = self.client.get('/api/listings/?page=2&per_page=2&sort_by=price&sort_order=asc')
+
+        data = response.json()
+        self.assertEqual([listing['price'] for listing in data['listings']], [400.0, 500.0])
+        self.assertEqual(data['pagination']['total'], 5)
@@ -0,0 +1,119 @@
+import json
+from io import StringIO
+
+from django.core.management import call_command
+from django.db import connections
+from django.test import TransactionTestCase, override_settings
+
+from core.models import PropertyImage
+from core.tests.factories import bearer, create_user, create_property, create_ownership
+from ops.models import ListingSearch
+
+
+class ListingSearchReadModelTests(TransactionTestCase):
+    databases = {'default', 'core', 'ops'}
+
+    def setUp(self):
+        self.owner = create_user()
+        self.property = create_property(location='Accra', status='unlisted')
+        self.user_property = create_ownership(self.owner, self.property, is_verified=False)
+        self.rep = bearer(create_user('rep@example.com', 'land_commission_rep', id_value='rep'))
+
+    def verify(self):
+        return self.client.patch(
+            '/api/property/verify/',
+            data=json.dumps({'user_property_id': self.user_property.id, 'verification_status': 'approved'}),
+            content_type='application/json',
+            **self.rep
+        )
+
+    def create_listing(self, price=1000):
+        response = self.client.post(
+            '/api/listing/create/',
+            data=json.dumps({'user_property_id': self.user_property.id, 'listing_type': 'rent', 'price': price}),
+            content_type='application/json'
+        )
+        self.assertEqual(response.status_code, 201)
+        return int(response['X-Listing-Id'])
+
+    def search_row(self):
+        return ListingSearch.objects.using('ops').get(user_property_id=self.user_property.id)
+
+    def test_write_paths_keep_read_model_in_sync(self):
+        """Verification, listing changes and deactivation update the read model"""
+        self.verify()
+        self.assertTrue(self.search_row().is_verified)
+        self.assertIsNone(self.search_row().listing_id)
+
+        listing_id = self.create_listing(price=1000)
+        row = self.search_row()
+        self.assertEqual(row.listing_id, listing_id)
+        self.assertEqual(row.price, 1000)
+        self.assertEqual(row.property_status, 'available')
+
+        self.client.patch(
+            f'/api/listing/{listing_id}/',
+            data=json.dumps({'price': 1500}),
+            content_type='application/json'
+        )
+        self.assertEqual(self.search_row().price, 1500)
+
+        self.client.post(f'/api/listing/{listing_id}/deactivate/')
+        self.assertIsNone(self.search_row().listing_id)
+
+        self.client.post(
+            f'/api/listing/{listing_id}/reactivate/',
+            data=json.dumps({'reactivation_reason': 'Back on the market'}),
+            content_type='application/json'
+        )
+        self.assertEqual(self.search_row().listing_id, listing_id)
+
+        self.client.patch(
+            '/api/property/reject/',
+            data=json.dumps({'user_property_id': self.user_property.id}),
+            content_type='application/json',
+            **self.rep
+        )
+        self.assertFalse(self.search_row().is_active)
+
+    def test_rebuild_command(self):
+        """The rebuild command repopulates rows and removes orphans"""
+        self.verify()
+        self.create_listing()
+        PropertyImage.objects.using('core').create(property=self.property, image='property_images/a.png')
+        with connections['ops'].cursor() as cursor:
+            cursor.execute("DELETE FROM listing_search")
+            cursor.execute("""
+                INSERT INTO listing_search
+                (user_property_id, property_id, title, property_type, description, location,
+                 property_status, property_created_at, owner_firstname, owner_lastname,
+                 owner_email, owner_phone, is_verified, is_active, images, synced_at)
+                VALUES (999999, 1, 'Gone', '1_bedroom', '', '', 'available', NOW(),
+                        '', '', '', '', true, true, '[]', NOW())
+            """)
+
+        call_command('rebuild_listing_search', batch_size=1, stdout=StringIO())
+
+        self.assertEqual(
+            list(ListingSearch.objects.using('ops').values_list('user_property_id', flat=True)),
+            [self.user_property.id]
+        )
+        self.assertEqual(self.search_row().images[0]['image'], 'property_images/a.png')
+
+    @override_settings(LISTING_SEARCH_READ_MODEL=True)
+    def test_browse_endpoints_read_from_read_model(self):
+        """With the read model enabled, browse endpoints answer from listing_search alone"""
+        self.verify()
+        listing_id = self.create_listing(price=1200)
+
+        with self.assertNumQueries(0, using='core'):
+            properties = self.client.get('/api/properties/?location=accra').json()['properties']
+            listings = self.client.get('/api/listings/?search=test').json()['listings']
+            cursor_page = self.client.get('/api/listings/?pagination=cursor').json()['listings']
+            all_properties = self.client.get('/api/property/all/').json()
+
+        self.assertEqual([p['listing_id'] for p in properties], [listing_id])
+        self.assertEqual([l['id'] for l in listings], [listing_id])
+        self.assertEqual(listings[0]['owner']['name'], 'Test Owner')
+        self.assertEqual([l['id'] for l in cursor_page], [listing_id])
+        self.assertEqual(all_properties[0]['price'], 1200.0)
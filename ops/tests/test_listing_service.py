@@ -0,0 +1,120 @@
+import threading
+from datetime import timedelta
+
+from django.db import connections
+from django.test import TransactionTestCase
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+
+from core.models import Property, UserProperty
+from core.tests.factories import create_user, create_property, create_ownership
+from ops import listing_service
+from ops.models import ListingOutbox, PropertyListing
+
+
+class ListingServiceTests(TransactionTestCase):
+    databases = {'default', 'core', 'ops'}
+
+    def setUp(self):
+        self.owner = create_user()
+        self.property, self.user_property = self.create_ownership(is_verified=True)
+
+    def create_ownership(self, is_verified):
+        property = create_property('Service Property', status='pending')
+        return property, create_ownership(self.owner, property, is_verified)
+
+    def property_status(self, property):
+        return Property.objects.using('core').get(id=property.id).status
+
+    def test_one_query_per_database(self):
+        """The listing, its outbox entry and the property status take one query on each side"""
+        with CaptureQueriesContext(connections['core']) as core, CaptureQueriesContext(connections['ops']) as ops:
+            listing = listing_service.create_listing(self.user_property.id, 'rent', 1200.0)
+
+        for queries in (core, ops):
+            statements = [query['sql'] for query in queries.captured_queries
+                          if query['sql'] not in ('BEGIN', 'COMMIT')]
+            self.assertEqual(len(statements), 1, statements)
+
+        self.assertEqual(listing['property_id'], self.property.id)
+        self.assertEqual(listing['property_title'], 'Service Property')
+        self.assertTrue(PropertyListing.objects.using('ops').get(id=listing['listing_id']).is_active)
+        self.assertTrue(ListingOutbox.objects.using('ops').filter(listing_id=listing['listing_id']).exists())
+        self.assertEqual(self.property_status(self.property), 'available')
+
+    def test_unverified_property(self):
+        property, user_property = self.create_ownership(is_verified=False)
+        with self.assertRaises(listing_service.PropertyNotListable):
+            listing_service.create_listing(user_property.id, 'rent', 1200.0)
+        self.assertEqual(self.property_status(property), 'pending')
+        self.assertFalse(PropertyListing.objects.using('ops').exists())
+
+    def test_duplicate_rolls_back_the_core_write(self):
+        """A conflicting insert leaves the property status untouched"""
+        listing_service.create_listing(self.user_property.id, 'rent', 1200.0)
+        Property.objects.using('core').filter(id=self.property.id).update(status='rented')
+
+        with self.assertRaises(listing_service.ActiveListingExists):
+            listing_service.create_listing(self.user_property.id, 'sale', 90000.0)
+
+        self.assertEqual(self.property_status(self.property), 'rented')
+        self.assertEqual(PropertyListing.objects.using('ops').count(), 1)
+        self.assertEqual(ListingOutbox.objects.using('ops').count(), 1)
+
+    def test_concurrent_creates(self):
+        """Only one of several simultaneous creates succeeds"""
+        results = []
+        barrier = threading.Barrier(5)
+
+        def create():
+            barrier.wait()
+            try:
+                listing_service.create_listing(self.user_property.id, 'rent', 1200.0)
+                results.append('created')
+            except listing_service.ActiveListingExists:
+                results.append('duplicate')
+            finally:
+                connections.close_all()
+
+        threads = [threading.Thread(target=create) for _ in range(5)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        self.assertEqual(sorted(results), ['created'] + ['duplicate'] * 4)
+        self.assertEqual(PropertyListing.objects.using('ops').filter(is_active=True).count(), 1)
+
+    def test_outbox_reconciliation(self):
+        """Entries whose core side is missing are rolled forward or compensated"""
+        confirmed = listing_service.create_listing(self.user_property.id, 'rent', 1200.0)
+
+        # Core side lost while the ownership is still verified
+        lost_property, lost_ownership = self.create_ownership(is_verified=True)
+        lost = listing_service.create_listing(lost_ownership.id, 'rent', 800.0)
+        Property.objects.using('core').filter(id=lost_property.id).update(status='pending')
+
+        # Core side lost and the ownership has since been rejected
+        rejected_property, rejected_ownership = self.create_ownership(is_verified=True)
+        rejected = listing_service.create_listing(rejected_ownership.id, 'sale', 50000.0)
+        Property.objects.using('core').filter(id=rejected_property.id).update(status='pending')
+        UserProperty.objects.using('core').filter(id=rejected_ownership.id).update(is_verified=False)
+
+        # Nothing is old enough yet
+        self.assertEqual(listing_service.process_pending_outbox(), {})
+
+        ListingOutbox.objects.using('ops').update(created_at=timezone.now() - timedelta(minutes=5))
+        processed = listing_service.process_pending_outbox()
+
+        self.assertEqual(processed, {
+            'confirmed': [self.user_property.id],
+            'rolled_forward': [lost_ownership.id],
+            'compensated': [rejected_ownership.id],
+        })
+        self.assertEqual(self.property_status(lost_property), 'available')
+        self.assertTrue(PropertyListing.objects.using('ops').get(id=lost['listing_id']).is_active)
+        self.assertFalse(PropertyListing.objects.using('ops').get(id=rejected['listing_id']).is_active)
+        self.assertEqual(
+            ListingOutbox.objects.using('ops').get(listing_id=confirmed['listing_id']).outcome, 'confirmed'
+        )
+        self.assertFalse(ListingOutbox.objects.using('ops').filter(processed_at__isnull=True).exists())
@@ -0,0 +1,51 @@
+from django.test import TransactionTestCase, override_settings
+
+from core.tests.factories import create_user, create_listed_property
+from ops.listing_search import refresh_listing_search
+
+# Osu and East Legon are about 9km apart; Kumasi is about 200km away
+OSU = 'Osu, Accra. GPS: 5.5560, -0.1820'
+EAST_LEGON = 'East Legon, Accra. GPS: 5.6350, -0.1570'
+KUMASI = 'Adum, Kumasi. GPS: 6.6885, -1.6244'
+
+
+class NearbySearchTests(TransactionTestCase):
+    databases = {'default', 'core', 'ops'}
+
+    def setUp(self):
+        self.owner = create_user()
+        for title, location in [('Osu', OSU), ('East Legon', EAST_LEGON),
+                                ('Kumasi', KUMASI), ('Unlocated', 'Somewhere in Accra')]:
+            self.create_listing(title, location)
+
+    def create_listing(self, title, location):
+        _, user_property, _ = create_listed_property(self.owner, title, location=location)
+        refresh_listing_search(user_property_ids=[user_property.id])
+
+    def titles(self, url):
+        response = self.client.get(url)
+        self.assertEqual(response.status_code, 200)
+        key = 'properties' if url.startswith('/api/properties/') else 'listings'
+        return sorted(item['title'] for item in response.json()[key])
+
+    def test_radius_search(self):
+        """Only properties within radius_km of the point are returned"""
+        self.assertEqual(self.titles('/api/properties/?lat=5.556&lon=-0.182&radius_km=2'), ['Osu'])
+        self.assertEqual(self.titles('/api/properties/?lat=5.556&lon=-0.182&radius_km=15'), ['East Legon', 'Osu'])
+        self.assertEqual(self.titles('/api/listings/?lat=5.556&lon=-0.182&radius_km=15'), ['East Legon', 'Osu'])
+
+    def test_bounding_box(self):
+        """Bounding boxes select located properties inside the box"""
+        self.assertEqual(self.titles('/api/properties/?bbox=6,-2,7,-1'), ['Kumasi'])
+        self.assertEqual(self.titles('/api/listings/?bbox=5,-1,6,0'), ['East Legon', 'Osu'])
+
+    def test_invalid_coordinates(self):
+        """Out-of-range coordinates are rejected"""
+        response = self.client.get('/api/listings/?lat=123&lon=0')
+        self.assertEqual(response.status_code, 400)
+
+    @override_settings(LISTING_SEARCH_READ_MODEL=True)
+    def test_read_model_radius_search(self):
+        """The read model carries the coordinates for the same filters"""
+        self.assertEqual(self.titles('/api/properties/?lat=5.556&lon=-0.182&radius_km=15'), ['East Legon', 'Osu'])
+        self.assertEqual(self.titles('/api/listings/?bbox=6,-2,7,-1'), ['Kumasi'])
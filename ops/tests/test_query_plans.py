@@ -0,0 +1,98 @@
+import json
+
+from django.db import IntegrityError, connections, transaction
+from django.test import TransactionTestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+
+from core.models import PropertyImage
+from core.tests.factories import bearer, create_user, create_property, create_ownership, create_listing
+from ops.models import PropertyListing
+
+
+def plan_indexes(alias, sql):
+    """Names of the indexes in the plan Postgres picks for sql when it is told to avoid sequential scans"""
+    with transaction.atomic(using=alias), connections[alias].cursor() as cursor:
+        cursor.execute("SET LOCAL enable_seqscan = off")
+        cursor.execute(f"EXPLAIN (FORMAT JSON) {sql}")
+        plan = cursor.fetchone()[0]
+    if isinstance(plan, str):
+        plan = json.loads(plan)
+
+    names = set()
+    nodes = [plan[0]['Plan']]
+    while nodes:
+        node = nodes.pop()
+        if 'Index Name' in node:
+            names.add(node['Index Name'])
+        nodes.extend(node.get('Plans', []))
+    return names
+
+
+@override_settings(BROWSE_CACHE_TIMEOUT=0)
+class QueryPlanTests(TransactionTestCase):
+    """The browse and admin queries are served by the partial indexes added for them"""
+    databases = {'default', 'core', 'ops'}
+
+    def setUp(self):
+        self.owner = create_user()
+        for index in range(20):
+            listed = index % 2 == 0
+            property = create_property(f'Property {index}', status='available' if listed else 'pending')
+            user_property = create_ownership(self.owner, property, is_verified=listed)
+            PropertyImage.objects.using('core').create(property=property, image=f'property_images/{index}.png')
+            if listed:
+                create_listing(user_property, price=1000 + index)
+        with connections['core'].cursor() as cursor:
+            cursor.execute("ANALYZE core_property, core_userproperty, core_propertyimage, ops_propertylisting")
+
+    def captured(self, alias, url, marker, **headers):
+        with CaptureQueriesContext(connections[alias]) as queries:
+            response = self.client.get(url, **headers)
+        self.assertEqual(response.status_code, 200)
+        matching = [query['sql'] for query in queries.captured_queries if marker in query['sql']]
+        self.assertTrue(matching, f'no query containing {marker!r} ran for {url}')
+        return matching[0]
+
+    def test_browse_properties(self):
+        """Listed properties are found through the active-listing unique index"""
+        sql = self.captured('core', '/api/properties/', 'JOIN ops_propertylisting pl')
+        self.assertIn('ops_listing_active_unique', plan_indexes('core', sql))
+
+    def test_property_images(self):
+        """The page's images come from the active-image index in display order"""
+        sql = self.captured('core', '/api/properties/', 'FROM core_propertyimage')
+        self.assertIn('core_propimage_active_idx', plan_indexes('core', sql))
+
+    def test_browse_listings(self):
+        """Each listing sort order walks its partial index"""
+        sql = self.captured('ops', '/api/listings/', 'FROM ops_propertylisting pl')
+        self.assertIn('ops_listing_active_created_idx', plan_indexes('ops', sql))
+
+        sql = self.captured('ops', '/api/listings/?pagination=cursor&sort_by=price&sort_order=asc',
+                            'FROM ops_propertylisting pl')
+        self.assertIn('ops_listing_active_price_idx', plan_indexes('ops', sql))
+
+        sql = self.captured('core', '/api/listings/', 'WHERE up.id = ANY')
+        self.assertIn('core_up_listed_idx', plan_indexes('core', sql))
+
+    def test_admin_queue(self):
+        """The verification queue reads the pending partial index"""
+        rep = create_user('rep@example.com', 'land_commission_rep', id_value='rep')
+        sql = self.captured('core', '/api/property/unverified/', "verification_status = 'pending'", **bearer(rep))
+        self.assertIn('core_up_pending_idx', plan_indexes('core', sql))
+
+    def test_one_active_listing_per_property(self):
+        """A second active listing for the same property is rejected by the database"""
+        listing = PropertyListing.objects.using('ops').first()
+        with self.assertRaises(IntegrityError), transaction.atomic(using='ops'):
+            PropertyListing.objects.using('ops').create(
+                user_property_id=listing.user_property_id,
+                listing_type='sale',
+                price=2000
+            )
+        PropertyListing.objects.using('ops').create(
+            user_property_id=listing.user_property_id,
+            listing_type='sale',
+            price=2000,
+            is_active=False
+        )
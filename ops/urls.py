@@ -10,5 +10,6 @@ urlpatterns = [
     path('listing/<int:listing_id>/', update_property_listing, name='update_property_listing'),
     path('listing/<int:listing_id>/deactivate/', deactivate_property_listing, name='deactivate_property_listing'),
     path('listing/<int:listing_id>/reactivate/', reactivate_property_listing, name='reactivate_property_listing'),
+    path('properties/', get_properties, name='get_properties'),
     path('listings/', get_all_listings, name='get_all_listings'),
 ]
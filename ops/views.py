@@ -1,12 +1,17 @@
 from django.shortcuts import render
+from django.conf import settings
+from django.core import signing
 from django.views.decorators.csrf import csrf_exempt
 from django.http import JsonResponse
-from django.db import connections
-from django.utils import timezone
+from django.db import IntegrityError, connections
 from django.views.decorators.http import require_http_methods
 import json
 
 from .models import PropertyListing
+from . import browse_cache, listing_search, listing_service
+from core.geo import geo_condition, parse_geo_filters
+from core.images import IMAGE_SIZES, image_column
+from core.search import prefix_tsquery, rank_expression, search_condition
 
 @csrf_exempt
 @require_http_methods(["POST"])
@@ -28,55 +33,17 @@ def create_property_listing(request):
         except (TypeError, ValueError):
             return JsonResponse({'error': 'Invalid price value'}, status=400)
 
-        # Lookup property_id from user_property_id
-        with connections['core'].cursor() as cursor:
-            cursor.execute("SELECT property_id FROM core_userproperty WHERE id = %s", [user_property_id])
-            property_id_result = cursor.fetchone()
-            property_id = property_id_result[0] if property_id_result else None
-
-        # Verify property exists and is verified
-        with connections['core'].cursor() as cursor:
-            cursor.execute("""
-                SELECT p.id, p.title 
-                FROM core_property p
-                JOIN core_userproperty up ON p.id = up.property_id
-                WHERE up.id = %s AND up.is_verified = true AND up.is_active = true
-            """, [user_property_id])
-            
-            result = cursor.fetchone()
-            if not result:
-                return JsonResponse({'error': 'Property not found or not verified'}, status=404)
-            
-            property_id_check, property_title = result
-
-        # Check for existing active listing
-        with connections['ops'].cursor() as cursor:
-            cursor.execute("""
-                SELECT id 
-                FROM ops_propertylisting 
-                WHERE user_property_id = %s AND is_active = true
-            """, [user_property_id])
-            
-            if cursor.fetchone():
-                return JsonResponse({'error': 'An active listing already exists for this property'}, status=400)
-
-        # Create new listing
-        with connections['ops'].cursor() as cursor:
-            cursor.execute("""
-                INSERT INTO ops_propertylisting 
-                (user_property_id, listing_type, price, is_active, created_at) 
-                VALUES (%s, %s, %s, %s, %s) RETURNING id
-            """, [user_property_id, listing_type, price, True, timezone.now()])
-            
-            listing_id = cursor.fetchone()[0]
+        # Verify ownership, mark the property available and insert the listing
+        try:
+            listing = listing_service.create_listing(user_property_id, listing_type, price)
+        except listing_service.ListingError as e:
+            return JsonResponse({'error': str(e)}, status=e.status)
+        listing_id = listing['listing_id']
+        property_id = listing['property_id']
+        property_title = listing['property_title']
 
-        # Update property status to 'available'
-        with connections['core'].cursor() as cursor:
-            cursor.execute("""
-                UPDATE core_property 
-                SET status = 'available'
-                WHERE id = %s
-            """, [property_id])
+        listing_search.refresh_listing_search(user_property_ids=[user_property_id])
+        browse_cache.invalidate(property_ids=[property_id])
 
         # Create response with clean body and listing_id in header
         response = JsonResponse({
@@ -95,6 +62,7 @@ def create_property_listing(request):
 
 @csrf_exempt
 @require_http_methods(["GET"])
+@browse_cache.cached_browse_response
 def get_properties(request):
     """Get a list of verified properties with optional filters"""
     try:
@@ -104,26 +72,57 @@ def get_properties(request):
         min_price = request.GET.get('min_price')
         max_price = request.GET.get('max_price')
         listing_type = request.GET.get('listing_type')  # rent or sale
-        search = request.GET.get('search')  # search in title and description
+        search = request.GET.get('search')  # full-text search in title, description and location
         sort_by = request.GET.get('sort_by', 'created_at')  # default sort by creation date
         sort_order = request.GET.get('sort_order', 'desc')  # default descending order
         page = int(request.GET.get('page', 1))  # default page 1
         per_page = int(request.GET.get('per_page', 10))  # default 10 items per page
         
+        geo_filters = parse_geo_filters(request.GET)  # lat/lon/radius_km and bbox
+        max_images = request.GET.get('max_images')
+        max_images = settings.LISTING_MAX_IMAGES_PER_PROPERTY if max_images is None else int(max_images)
+        if settings.LISTING_MAX_IMAGES_PER_PROPERTY is not None:
+            max_images = min(max_images, settings.LISTING_MAX_IMAGES_PER_PROPERTY)
+        image_size = request.GET.get('size', 'original')  # original, medium or thumbnail
+        if image_size not in IMAGE_SIZES:
+            return JsonResponse({'error': f'Invalid size. Must be one of: {", ".join(IMAGE_SIZES)}'}, status=400)
+
+        if settings.LISTING_SEARCH_READ_MODEL:
+            filters = {
+                'location': location,
+                'property_type': property_type,
+                'price_range': {'min': min_price, 'max': max_price},
+                'listing_type': listing_type,
+                'search': search,
+                **geo_filters
+            }
+            properties, total_count = listing_search.browse_properties(
+                filters, sort_by, sort_order, page, per_page, max_images, image_size
+            )
+            return JsonResponse({
+                'properties': properties,
+                'pagination': {
+                    'total': total_count,
+                    'page': page,
+                    'per_page': per_page,
+                    'total_pages': (total_count + per_page - 1) // per_page
+                }
+            }, safe=False)
+
         # Base query with all required visibility rules
-        query = """
+        select_clause = """
             SELECT 
                 p.id, p.title, p.property_type, p.description, 
                 p.location, p.status, p.created_at,
                 u.firstname, u.lastname, u.email, u.phone_number,
                 pl.id as listing_id, pl.listing_type, pl.price, pl.is_active as listing_status,
-                pl.created_at as listing_created_at,
-                pi.image as property_image
+                pl.created_at as listing_created_at
+        """
+        query = """
             FROM core_property p
             JOIN core_userproperty up ON p.id = up.property_id
             JOIN core_user u ON up.owner_id = u.id
             JOIN ops_propertylisting pl ON up.id = pl.user_property_id
-            LEFT JOIN core_propertyimage pi ON p.id = pi.property_id AND pi.is_active = true
             WHERE 
                 up.is_verified = true 
                 AND up.is_active = true
@@ -133,9 +132,12 @@ def get_properties(request):
         params = []
         
         # Add filters
-        if location:
-            query += " AND LOWER(p.location) LIKE LOWER(%s)"
-            params.append(f"%{location}%")
+        search_query, search_params = search_condition('p', search=search, location=location)
+        query += search_query
+        params.extend(search_params)
+        geo_query, geo_params = geo_condition('p', **geo_filters)
+        query += geo_query
+        params.extend(geo_params)
         if property_type:
             query += " AND p.property_type = %s"
             params.append(property_type)
@@ -148,14 +150,22 @@ def get_properties(request):
         if listing_type:
             query += " AND pl.listing_type = %s"
             params.append(listing_type)
-        if search:
-            query += " AND (LOWER(p.title) LIKE LOWER(%s) OR LOWER(p.description) LIKE LOWER(%s))"
-            params.extend([f"%{search}%", f"%{search}%"])
-            
+
+        # Total count for pagination uses the same filters without sorting or paging
+        count_query = "SELECT COUNT(*) " + query
+        count_params = list(params)
+
         # Add sorting
         valid_sort_fields = ['price', 'created_at', 'listing_created_at']
-        if sort_by in valid_sort_fields:
-            query += f" ORDER BY {sort_by} {sort_order.upper()}"
+        if sort_by == 'rank' and prefix_tsquery(search):
+            # Most relevant first
+            rank, rank_params = rank_expression('p', search)
+            query += f" ORDER BY {rank} DESC, pl.id DESC"
+            params.extend(rank_params)
+        elif sort_by in valid_sort_fields or sort_by == 'rank':
+            # Without search words there is no relevance, so rank falls back to the default order
+            sort_field = 'created_at' if sort_by == 'rank' else sort_by
+            query += f" ORDER BY {sort_field} {sort_order.upper()}"
             
         # Add pagination
         offset = (page - 1) * per_page
@@ -165,26 +175,16 @@ def get_properties(request):
         # Execute query
         with connections['core'].cursor() as cursor:
             # Get total count for pagination
-            count_query = query.replace("SELECT p.id, p.title", "SELECT COUNT(*)")
-            count_query = count_query.split("ORDER BY")[0]  # Remove ORDER BY clause
-            cursor.execute(count_query, params[:-2])  # Exclude LIMIT and OFFSET params
+            cursor.execute(count_query, count_params)
             total_count = cursor.fetchone()[0]
             
             # Get paginated results
-            cursor.execute(query, params)
+            cursor.execute(select_clause + query, params)
             columns = [col[0] for col in cursor.description]
             properties = [dict(zip(columns, row)) for row in cursor.fetchall()]
             
-            # Get all images for each property
-            for property in properties:
-                cursor.execute("""
-                    SELECT image, uploaded_at
-                    FROM core_propertyimage
-                    WHERE property_id = %s AND is_active = true
-                    ORDER BY uploaded_at DESC
-                """, [property['id']])
-                property['images'] = [dict(zip(['image', 'uploaded_at'], row)) 
-                                    for row in cursor.fetchall()]
+            # Get the images for the whole page in one round trip
+            _attach_property_images(cursor, properties, max_images, image_size)
             
         return JsonResponse({
             'properties': properties,
@@ -196,9 +196,40 @@ def get_properties(request):
             }
         }, safe=False)
         
+    except ValueError:
+        return JsonResponse({'error': 'Invalid numeric parameter'}, status=400)
     except Exception as e:
         return JsonResponse({'error': str(e)}, status=500)
 
+
+def _attach_property_images(cursor, properties, max_images=None, image_size='original'):
+    """
+    Fill 'images' (newest first) and 'property_image' for every property on a page
+    with a single query, optionally keeping at most max_images per property.
+    """
+    images_by_property = {property['id']: [] for property in properties}
+    if images_by_property:
+        cursor.execute(f"""
+            SELECT property_id, image, uploaded_at
+            FROM (
+                SELECT 
+                    pi.property_id, {image_column('pi', image_size)} AS image, pi.uploaded_at,
+                    ROW_NUMBER() OVER (
+                        PARTITION BY pi.property_id ORDER BY pi.uploaded_at DESC, pi.id DESC
+                    ) AS position
+                FROM core_propertyimage pi
+                WHERE pi.property_id = ANY(%s) AND pi.is_active = true
+            ) ranked
+            WHERE %s::integer IS NULL OR position <= %s::integer
+            ORDER BY property_id, position
+        """, [list(images_by_property), max_images, max_images])
+        for property_id, image, uploaded_at in cursor.fetchall():
+            images_by_property[property_id].append({'image': image, 'uploaded_at': uploaded_at})
+
+    for property in properties:
+        property['images'] = images_by_property[property['id']]
+        property['property_image'] = property['images'][0]['image'] if property['images'] else None
+
 @csrf_exempt
 @require_http_methods(["POST"])
 def deactivate_property_listing(request, listing_id):
@@ -223,6 +254,9 @@ def deactivate_property_listing(request, listing_id):
                 WHERE id = %s
             """, [listing_id])
 
+        listing_search.refresh_listing_search(user_property_ids=[result[0]])
+        browse_cache.invalidate(user_property_ids=[result[0]])
+
         return JsonResponse({
             'message': 'Property listing deactivated successfully'
         })
@@ -304,6 +338,8 @@ def update_property_listing(request, listing_id):
                     
                     updated_data = cursor.fetchone()
                     if updated_data:
+                        listing_search.refresh_listing_search(user_property_ids=[result[0]])
+                        browse_cache.invalidate(user_property_ids=[result[0]])
                         return JsonResponse({
                             'message': 'Listing updated successfully',
                             'price': float(updated_data[0])  # Convert Decimal to float
@@ -320,8 +356,15 @@ def update_property_listing(request, listing_id):
 
 @csrf_exempt
 @require_http_methods(["GET"])
+@browse_cache.cached_browse_response
 def get_all_listings(request):
-    """Get all active property listings with optional filters"""
+    """
+    Get all active property listings with optional filters.
+
+    Pass pagination=cursor (first page) or cursor=<next_cursor> to page with
+    keyset pagination instead of page/per_page; add total=estimate for a
+    planner-estimated total.
+    """
     try:
         # Get filter parameters
         location = request.GET.get('location')
@@ -335,6 +378,40 @@ def get_all_listings(request):
         page = int(request.GET.get('page', 1))
         per_page = int(request.GET.get('per_page', 10))
 
+        filters = {
+            'location': location,
+            'property_type': property_type,
+            'price_range': {
+                'min': min_price,
+                'max': max_price
+            },
+            'listing_type': listing_type,
+            'search': search,
+            **parse_geo_filters(request.GET)
+        }
+
+        image_size = request.GET.get('size', 'original')  # original, medium or thumbnail
+        if image_size not in IMAGE_SIZES:
+            return JsonResponse({'error': f'Invalid size. Must be one of: {", ".join(IMAGE_SIZES)}'}, status=400)
+
+        if 'cursor' in request.GET or request.GET.get('pagination') == 'cursor':
+            return _get_listings_by_cursor(request, filters, per_page, image_size)
+
+        if settings.LISTING_SEARCH_READ_MODEL:
+            paginated_listings, total_count = listing_search.browse_listings(
+                filters, sort_by, sort_order, page, per_page, image_size
+            )
+            return JsonResponse({
+                'listings': paginated_listings,
+                'pagination': {
+                    'total': total_count,
+                    'page': page,
+                    'per_page': per_page,
+                    'total_pages': (total_count + per_page - 1) // per_page
+                },
+                'filters': filters
+            })
+
         # First, get listings from ops database
         listings_query = """
             SELECT 
@@ -343,18 +420,7 @@ def get_all_listings(request):
             FROM ops_propertylisting pl
             WHERE pl.is_active = true
         """
-        listings_params = []
-
-        # Add price filters
-        if min_price:
-            listings_query += " AND pl.price >= %s"
-            listings_params.append(float(min_price))
-        if max_price:
-            listings_query += " AND pl.price <= %s"
-            listings_params.append(float(max_price))
-        if listing_type:
-            listings_query += " AND pl.listing_type = %s"
-            listings_params.append(listing_type)
+        listings_query, listings_params = _add_listing_filters(listings_query, [], filters)
 
         # Add sorting
         valid_sort_fields = {
@@ -367,17 +433,7 @@ def get_all_listings(request):
         # Execute listings query
         with connections['ops'].cursor() as cursor:
             cursor.execute(listings_query, listings_params)
-            listings = [
-                {
-                    'id': row[0],
-                    'user_property_id': int(row[1]),  # Ensure this is an integer
-                    'price': float(row[2]),
-                    'listing_type': row[3],
-                    'created_at': row[4].isoformat() if row[4] else None,
-                    'is_active': row[5]
-                }
-                for row in cursor.fetchall()
-            ]
+            listings = [_listing_from_row(row) for row in cursor.fetchall()]
 
         if not listings:
             return JsonResponse({
@@ -388,80 +444,21 @@ def get_all_listings(request):
                     'per_page': per_page,
                     'total_pages': 0
                 },
-                'filters': {
-                    'location': location,
-                    'property_type': property_type,
-                    'price_range': {'min': min_price, 'max': max_price},
-                    'listing_type': listing_type,
-                    'search': search
-                }
+                'filters': filters
             })
 
         # Get property and user details from core database
-        user_property_ids = [int(listing['user_property_id']) for listing in listings]  # Keep as integers
-        property_query = """
-            SELECT 
-                up.id as user_property_id,
-                p.title, p.property_type, p.description, p.location,
-                u.firstname, u.lastname, u.phone_number,
-                (SELECT image FROM core_propertyimage 
-                 WHERE property_id = p.id AND is_active = true 
-                 ORDER BY uploaded_at DESC LIMIT 1) as main_image
-            FROM core_userproperty up
-            JOIN core_property p ON up.property_id = p.id
-            JOIN core_user u ON up.owner_id = u.id
-            WHERE up.id = ANY(%s)
-            AND up.is_verified = true
-            AND up.is_active = true
-        """
-
-        # Add location and property type filters
-        property_params = [user_property_ids]  # Pass the list directly
-        if location:
-            property_query += " AND LOWER(p.location) LIKE LOWER(%s)"
-            property_params.append(f"%{location}%")
-        if property_type:
-            property_query += " AND p.property_type = %s"
-            property_params.append(property_type)
-        if search:
-            property_query += " AND (LOWER(p.title) LIKE LOWER(%s) OR LOWER(p.description) LIKE LOWER(%s))"
-            property_params.extend([f"%{search}%", f"%{search}%"])
-
-        # Get property details
-        property_details = {}
-        with connections['core'].cursor() as cursor:
-            cursor.execute(property_query, property_params)
-            columns = ['user_property_id', 'title', 'property_type', 'description', 
-                      'location', 'owner_firstname', 'owner_lastname', 
-                      'owner_phone', 'main_image']
-            for row in cursor.fetchall():
-                details = dict(zip(columns, row))
-                details['user_property_id'] = int(details['user_property_id'])  # Ensure this is an integer
-                details['owner'] = {
-                    'name': f"{details.pop('owner_firstname')} {details.pop('owner_lastname')}",
-                    'phone': details.pop('owner_phone')
-                }
-                property_details[details['user_property_id']] = details  # Use integer as key
-
-        # Combine the results
-        combined_listings = []
-        for listing in listings:
-            user_property_id = listing['user_property_id']  # Already an integer
-            if user_property_id in property_details:
-                details = property_details[user_property_id]
-                combined_listing = {
-                    'id': listing['id'],
-                    'price': listing['price'],
-                    'listing_type': listing['listing_type'],
-                    'created_at': listing['created_at'],
-                    'title': details['title'],
-                    'property_type': details['property_type'],
-                    'description': details['description'],
-                    'location': details['location'],
-                    'owner': details['owner'],
-                    'main_image': details['main_image']
-                }
-                combined_listings.append(combined_listing)
+        property_details = _get_listing_property_details(
+            [listing['user_property_id'] for listing in listings], filters, image_size
+        )
+        combined_listings = _combine_listings(listings, property_details)
+        if sort_by == 'rank' and prefix_tsquery(search):
+            # Relevance comes from core, so this ordering is applied after the join
+            ranks = {
+                listing['id']: property_details[listing['user_property_id']]['rank']
+                for listing in listings if listing['user_property_id'] in property_details
+            }
+            combined_listings.sort(key=lambda listing: ranks[listing['id']], reverse=True)
 
         # Apply pagination
         total_count = len(combined_listings)
@@ -477,16 +474,7 @@ def get_all_listings(request):
                 'per_page': per_page,
                 'total_pages': (total_count + per_page - 1) // per_page
             },
-            'filters': {
-                'location': location,
-                'property_type': property_type,
-                'price_range': {
-                    'min': min_price,
-                    'max': max_price
-                },
-                'listing_type': listing_type,
-                'search': search
-            }
+            'filters': filters
         })
 
     except ValueError as ve:
@@ -494,6 +482,267 @@ def get_all_listings(request):
     except Exception as e:
         return JsonResponse({'error': str(e)}, status=500)
 
+
+LISTING_CURSOR_SALT = 'ops.listings.cursor'
+
+# Sort keys usable with cursor pagination; pl.id breaks ties so the order is total
+LISTING_CURSOR_SORT_FIELDS = {
+    'price': 'pl.price',
+    'created_at': 'pl.created_at'
+}
+
+
+def _add_listing_filters(query, params, filters):
+    """Append the filters that can be answered by ops_propertylisting alone"""
+    min_price = filters['price_range']['min']
+    max_price = filters['price_range']['max']
+    if min_price:
+        query += " AND pl.price >= %s"
+        params.append(float(min_price))
+    if max_price:
+        query += " AND pl.price <= %s"
+        params.append(float(max_price))
+    if filters['listing_type']:
+        query += " AND pl.listing_type = %s"
+        params.append(filters['listing_type'])
+    return query, params
+
+
+def _listing_from_row(row):
+    return {
+        'id': row[0],
+        'user_property_id': int(row[1]),  # Ensure this is an integer
+        'price': float(row[2]),
+        'listing_type': row[3],
+        'created_at': row[4].isoformat() if row[4] else None,
+        'is_active': row[5]
+    }
+
+
+def _get_listing_property_details(user_property_ids, filters, image_size='original'):
+    """
+    Get property and owner details from the core database for the given
+    user properties, keeping only verified ones that match the core-side filters.
+    """
+    property_query = """
+        SELECT 
+            up.id as user_property_id,
+            p.title, p.property_type, p.description, p.location,
+            u.firstname, u.lastname, u.phone_number,
+            (SELECT {main_image} FROM core_propertyimage pi
+             WHERE pi.property_id = p.id AND pi.is_active = true 
+             ORDER BY pi.uploaded_at DESC LIMIT 1) as main_image,
+            {rank} as rank
+        FROM core_userproperty up
+        JOIN core_property p ON up.property_id = p.id
+        JOIN core_user u ON up.owner_id = u.id
+        WHERE up.id = ANY(%s)
+        AND up.is_verified = true
+        AND up.is_active = true
+    """
+
+    # Relevance is only meaningful when searching
+    if prefix_tsquery(filters['search']):
+        rank, property_params = rank_expression('p', filters['search'])
+    else:
+        rank, property_params = '0', []
+    property_query = property_query.format(rank=rank, main_image=image_column('pi', image_size))
+
+    # Add location, search and property type filters
+    property_params.append([int(user_property_id) for user_property_id in user_property_ids])
+    search_query, search_params = search_condition('p', search=filters['search'], location=filters['location'])
+    property_query += search_query
+    property_params.extend(search_params)
+    geo_query, geo_params = geo_condition('p', near=filters['near'], bbox=filters['bbox'])
+    property_query += geo_query
+    property_params.extend(geo_params)
+    if filters['property_type']:
+        property_query += " AND p.property_type = %s"
+        property_params.append(filters['property_type'])
+
+    property_details = {}
+    with connections['core'].cursor() as cursor:
+        cursor.execute(property_query, property_params)
+        columns = ['user_property_id', 'title', 'property_type', 'description', 
+                  'location', 'owner_firstname', 'owner_lastname', 
+                  'owner_phone', 'main_image', 'rank']
+        for row in cursor.fetchall():
+            details = dict(zip(columns, row))
+            details['user_property_id'] = int(details['user_property_id'])  # Ensure this is an integer
+            details['owner'] = {
+                'name': f"{details.pop('owner_firstname')} {details.pop('owner_lastname')}",
+                'phone': details.pop('owner_phone')
+            }
+            property_details[details['user_property_id']] = details  # Use integer as key
+    return property_details
+
+
+def _combine_listings(listings, property_details):
+    """Join ops listings with their core details, dropping listings without details"""
+    combined_listings = []
+    for listing in listings:
+        details = property_details.get(listing['user_property_id'])
+        if details:
+            combined_listings.append({
+                'id': listing['id'],
+                'price': listing['price'],
+                'listing_type': listing['listing_type'],
+                'created_at': listing['created_at'],
+                'title': details['title'],
+                'property_type': details['property_type'],
+                'description': details['description'],
+                'location': details['location'],
+                'owner': details['owner'],
+                'main_image': details['main_image']
+            })
+    return combined_listings
+
+
+def _get_listings_by_cursor(request, filters, per_page, image_size='original'):
+    """
+    Keyset pagination for get_all_listings.
+
+    Listings are read from ops in (sort key, id) order starting after the
+    cursor position, in batches that are filtered against core until the page
+    is full. When the core filters (location, property type, verified owner)
+    drop most listings, filling a page could read the whole catalog, so at
+    most LISTING_CURSOR_MAX_BATCHES batches are read per request: the worst
+    case is that many ops and core round trips of LISTING_CURSOR_BATCH_SIZE
+    rows each, after which the page is returned partly filled (possibly
+    empty) with pagination.partial set and a next_cursor that resumes the
+    scan. With LISTING_SEARCH_READ_MODEL every filter is answered in one
+    query and pages are always full.
+    """
+    token = request.GET.get('cursor')
+    if token:
+        try:
+            position = signing.loads(token, salt=LISTING_CURSOR_SALT)
+            sort_by, sort_order = position['sort_by'], position['sort_order']
+        except (signing.BadSignature, KeyError, TypeError):
+            return JsonResponse({'error': 'Invalid cursor'}, status=400)
+    else:
+        position = None
+        sort_by = request.GET.get('sort_by', 'created_at')
+        sort_order = request.GET.get('sort_order', 'desc').lower()
+
+    if sort_by not in LISTING_CURSOR_SORT_FIELDS:
+        return JsonResponse({
+            'error': f'Invalid sort_by. Must be one of: {", ".join(LISTING_CURSOR_SORT_FIELDS)}'
+        }, status=400)
+    if sort_order not in ('asc', 'desc'):
+        return JsonResponse({'error': 'Invalid sort_order. Must be one of: asc, desc'}, status=400)
+    if not 1 <= per_page <= settings.LISTING_CURSOR_MAX_PAGE_SIZE:
+        return JsonResponse({
+            'error': f'per_page must be between 1 and {settings.LISTING_CURSOR_MAX_PAGE_SIZE}'
+        }, status=400)
+
+    sort_field = LISTING_CURSOR_SORT_FIELDS[sort_by]
+    comparison = '<' if sort_order == 'desc' else '>'
+    base_query, base_params = _add_listing_filters("""
+        SELECT 
+            pl.id, pl.user_property_id, pl.price, pl.listing_type, 
+            pl.created_at, pl.is_active, {sort_field}
+        FROM ops_propertylisting pl
+        WHERE pl.is_active = true
+    """.format(sort_field=sort_field), [], filters)
+
+    # Fetch one row beyond the page to know whether another page exists
+    wanted = per_page + 1
+    batch_size = max(wanted, settings.LISTING_CURSOR_BATCH_SIZE)
+    page_listings = []
+    last_position = position
+    page_end_position = None
+    exhausted = False
+    partial = False
+    batches = 0
+
+    if settings.LISTING_SEARCH_READ_MODEL:
+        # Every filter is answered by the read model, so one query fills the page
+        exhausted = True
+        for listing, (value, listing_id) in listing_search.browse_listings_after(
+            filters, sort_by, sort_order, position, wanted, image_size
+        ):
+            last_position = {
+                'sort_by': sort_by,
+                'sort_order': sort_order,
+                'value': value,
+                'id': listing_id
+            }
+            page_listings.append(listing)
+            if len(page_listings) == per_page:
+                page_end_position = last_position
+
+    with connections['ops'].cursor() as cursor:
+        while len(page_listings) < wanted and not exhausted:
+            if batches == settings.LISTING_CURSOR_MAX_BATCHES:
+                # Every row up to last_position has been returned or filtered out
+                partial = True
+                page_end_position = page_end_position or last_position
+                break
+            batches += 1
+            query, params = base_query, list(base_params)
+            if last_position:
+                query += f" AND ({sort_field}, pl.id) {comparison} (%s, %s)"
+                params.extend([last_position['value'], last_position['id']])
+            query += f" ORDER BY {sort_field} {sort_order.upper()}, pl.id {sort_order.upper()} LIMIT %s"
+            params.append(batch_size)
+
+            cursor.execute(query, params)
+            rows = cursor.fetchall()
+            exhausted = len(rows) < batch_size
+            if not rows:
+                break
+
+            listings = [_listing_from_row(row) for row in rows]
+            property_details = _get_listing_property_details(
+                [listing['user_property_id'] for listing in listings], filters, image_size
+            )
+            for listing, row in zip(listings, rows):
+                last_position = {
+                    'sort_by': sort_by,
+                    'sort_order': sort_order,
+                    'value': str(row[6]),
+                    'id': row[0]
+                }
+                if listing['user_property_id'] in property_details:
+                    page_listings.extend(_combine_listings([listing], property_details))
+                    if len(page_listings) == per_page:
+                        # The cursor points at the last listing returned to the client
+                        page_end_position = last_position
+                    if len(page_listings) == wanted:
+                        break
+
+    has_more = len(page_listings) > per_page or partial
+    pagination = {
+        'per_page': per_page,
+        'sort_by': sort_by,
+        'sort_order': sort_order,
+        'has_more': has_more,
+        'partial': partial,
+        'next_cursor': signing.dumps(page_end_position, salt=LISTING_CURSOR_SALT) if has_more else None
+    }
+    if request.GET.get('total') == 'estimate':
+        pagination['estimated_total'] = _estimate_listing_count(base_query, base_params)
+
+    return JsonResponse({
+        'listings': page_listings[:per_page],
+        'pagination': pagination,
+        'filters': filters
+    })
+
+
+def _estimate_listing_count(query, params):
+    """
+    Planner row estimate for the ops side of a listings query. Costs no scan,
+    but ignores the core-side filters and can drift from the exact count.
+    """
+    with connections['ops'].cursor() as cursor:
+        cursor.execute("EXPLAIN (FORMAT JSON) " + query, params)
+        plan = cursor.fetchone()[0]
+    if isinstance(plan, str):
+        plan = json.loads(plan)
+    return int(plan[0]['Plan']['Plan Rows'])
+
 @csrf_exempt
 @require_http_methods(["POST"])
 def reactivate_property_listing(request, listing_id):
@@ -531,15 +780,22 @@ def reactivate_property_listing(request, listing_id):
                 }, status=400)
 
             # Reactivate the listing
-            cursor.execute("""
-                UPDATE ops_propertylisting 
-                SET is_active = true 
-                WHERE id = %s
-                RETURNING id, price, listing_type
-            """, [listing_id])
+            try:
+                cursor.execute("""
+                    UPDATE ops_propertylisting 
+                    SET is_active = true 
+                    WHERE id = %s
+                    RETURNING id, price, listing_type
+                """, [listing_id])
+            except IntegrityError:
+                return JsonResponse({
+                    'error': 'Cannot reactivate: Another active listing exists for this property'
+                }, status=400)
 
             listing_data = cursor.fetchone()
             if listing_data:
+                listing_search.refresh_listing_search(user_property_ids=[user_property_id])
+                browse_cache.invalidate(user_property_ids=[user_property_id])
                 return JsonResponse({
                     'message': 'Property listing reactivated successfully',
                     'is_active': True,